@@ -0,0 +1,79 @@
+"""add composite and partial indexes
+
+Revision ID: 3f9a1c2d7b45
+Revises: aec23bd66378
+Create Date: 2026-10-18 10:02:11.418203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b45'
+down_revision: Union[str, Sequence[str], None] = 'aec23bd66378'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Los ix_*_id duplican el indice de la primary key
+PK_DUPLICATE_INDEXES = [
+    ('ix_roles_id', 'roles'),
+    ('ix_users_id', 'users'),
+    ('ix_leave_balances_id', 'leave_balances'),
+    ('ix_time_off_requests_id', 'time_off_requests'),
+    ('ix_time_tracking_id', 'time_tracking'),
+    ('ix_tokens_id', 'tokens'),
+    ('ix_time_adjustments_id', 'time_adjustments'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no puede ir dentro de una transaccion
+    # El id desempata (timestamp, id) en la paginacion por cursor
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_time_tracking_user_id_timestamp_id', 'time_tracking',
+            ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_time_tracking_timestamp_id', 'time_tracking',
+            [sa.text('timestamp DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_time_adjustments_user_id', 'time_adjustments', ['user_id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_time_adjustments_pending', 'time_adjustments', ['create_date'],
+            postgresql_where=sa.text("status = 'PENDING'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_time_off_requests_user_id', 'time_off_requests', ['user_id'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_time_off_requests_pending', 'time_off_requests', ['create_date'],
+            postgresql_where=sa.text("status = 'PENDING'"),
+            postgresql_concurrently=True,
+        )
+        for index_name, table_name in PK_DUPLICATE_INDEXES:
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index_name, table_name in PK_DUPLICATE_INDEXES:
+        op.create_index(index_name, table_name, ['id'], unique=False)
+    op.drop_index('ix_time_off_requests_pending', table_name='time_off_requests')
+    op.drop_index('ix_time_off_requests_user_id', table_name='time_off_requests')
+    op.drop_index('ix_time_adjustments_pending', table_name='time_adjustments')
+    op.drop_index('ix_time_adjustments_user_id', table_name='time_adjustments')
+    op.drop_index('ix_time_tracking_timestamp_id', table_name='time_tracking')
+    op.drop_index('ix_time_tracking_user_id_timestamp_id', table_name='time_tracking')
@@ -0,0 +1,122 @@
+"""partition time_tracking by month
+
+Revision ID: 4a8d2f7c1e35
+Revises: 9c1f6b2e4d87
+Create Date: 2026-10-18 19:04:51.827346
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a8d2f7c1e35'
+down_revision: Union[str, Sequence[str], None] = '9c1f6b2e4d87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ('id, user_id, record_type, timestamp, description, create_date, update_date, '
+           'delete_date, is_deleted, is_disabled')
+# Meses futuros que se crean ya; despues los crea app.commands.manage_partitions
+MONTHS_AHEAD = 3
+
+
+def _columns():
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('record_type', postgresql.ENUM('CHECK_IN', 'CHECK_OUT', name='record_type_enum', create_type=False), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('create_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('update_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('delete_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_deleted', sa.Boolean(), nullable=True),
+        sa.Column('is_disabled', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    ]
+
+
+def _create_indexes():
+    op.create_index('ix_time_tracking_user_id_timestamp_id', 'time_tracking',
+                    ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')])
+    op.create_index('ix_time_tracking_timestamp_id', 'time_tracking',
+                    [sa.text('timestamp DESC'), sa.text('id DESC')])
+
+
+def _drop_old_table_indexes(table: str):
+    op.drop_index('ix_time_tracking_user_id_timestamp_id', table_name=table)
+    op.drop_index('ix_time_tracking_timestamp_id', table_name=table)
+    op.execute(f'ALTER TABLE {table} RENAME CONSTRAINT time_tracking_pkey TO {table}_pkey')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Una FK solo puede apuntar a una clave unica completa, y en la tabla
+    # particionada la clave es (id, timestamp)
+    op.drop_constraint('time_adjustments_time_record_id_fkey', 'time_adjustments', type_='foreignkey')
+
+    op.rename_table('time_tracking', 'time_tracking_unpartitioned')
+    _drop_old_table_indexes('time_tracking_unpartitioned')
+
+    op.create_table('time_tracking',
+    *_columns(),
+    sa.PrimaryKeyConstraint('id', 'timestamp', name='time_tracking_pkey'),
+    postgresql_partition_by='RANGE (timestamp)',
+    )
+
+    # Un mes UTC por particion, desde el primer fichaje hasta MONTHS_AHEAD meses vista
+    op.execute(f"""
+        DO $$
+        DECLARE
+            current_month date := date_trunc('month', now() AT TIME ZONE 'UTC')::date;
+            month date;
+        BEGIN
+            SELECT coalesce(date_trunc('month', min(timestamp) AT TIME ZONE 'UTC')::date, current_month)
+            INTO month FROM time_tracking_unpartitioned;
+            WHILE month <= current_month + interval '{MONTHS_AHEAD} months' LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF time_tracking FOR VALUES FROM (%L) TO (%L)',
+                    'time_tracking_p' || to_char(month, 'YYYYMM'),
+                    month::timestamp AT TIME ZONE 'UTC',
+                    (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+    op.execute('CREATE TABLE time_tracking_default PARTITION OF time_tracking DEFAULT')
+
+    op.execute(f'INSERT INTO time_tracking ({COLUMNS}) SELECT {COLUMNS} FROM time_tracking_unpartitioned')
+    op.drop_table('time_tracking_unpartitioned')
+    # Los indices del padre se crean en cada particion (y en las futuras)
+    _create_indexes()
+    op.execute('ANALYZE time_tracking')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('time_tracking', 'time_tracking_partitioned')
+    _drop_old_table_indexes('time_tracking_partitioned')
+
+    op.create_table('time_tracking',
+    *_columns(),
+    sa.PrimaryKeyConstraint('id', name='time_tracking_pkey'),
+    )
+    op.execute(f'INSERT INTO time_tracking ({COLUMNS}) SELECT {COLUMNS} FROM time_tracking_partitioned')
+    # Borra tambien las particiones
+    op.drop_table('time_tracking_partitioned')
+    _create_indexes()
+
+    # Ajustes que apuntan a fichajes que ya no existen (particiones desadjuntadas)
+    op.execute("""
+        UPDATE time_adjustments SET time_record_id = NULL
+        WHERE time_record_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM time_tracking WHERE time_tracking.id = time_adjustments.time_record_id)
+    """)
+    op.create_foreign_key('time_adjustments_time_record_id_fkey', 'time_adjustments', 'time_tracking',
+                          ['time_record_id'], ['id'], ondelete='SET NULL')
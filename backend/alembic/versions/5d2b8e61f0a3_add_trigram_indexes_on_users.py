@@ -0,0 +1,40 @@
+"""add trigram indexes on users
+
+Revision ID: 5d2b8e61f0a3
+Revises: a71e4c09d2b8
+Create Date: 2026-10-18 12:05:32.640117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b8e61f0a3'
+down_revision: Union[str, Sequence[str], None] = 'a71e4c09d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRGM_COLUMNS = ['full_name', 'username', 'email']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for column in TRGM_COLUMNS:
+            op.create_index(
+                f'ix_users_{column}_trgm', 'users', [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in TRGM_COLUMNS:
+        op.drop_index(f'ix_users_{column}_trgm', table_name='users')
@@ -0,0 +1,43 @@
+"""add leave_accruals
+
+Revision ID: 7b5e0d3f1a64
+Revises: e8f4a2c6d913
+Create Date: 2026-10-18 17:05:22.914310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b5e0d3f1a64'
+down_revision: Union[str, Sequence[str], None] = 'e8f4a2c6d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('leave_accruals',
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('leave_type', postgresql.ENUM('VACATION', 'SICK', 'PERSONAL', 'OTHER', name='leave_balance_type_enum', create_type=False), nullable=False),
+    sa.Column('employees', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('create_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('update_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('delete_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('is_disabled', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_leave_accruals_year_month_type', 'leave_accruals', ['year', 'month', 'leave_type'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_leave_accruals_year_month_type', table_name='leave_accruals')
+    op.drop_table('leave_accruals')
@@ -0,0 +1,34 @@
+"""add clock_states presence index
+
+Revision ID: 9c1f6b2e4d87
+Revises: 7b5e0d3f1a64
+Create Date: 2026-10-18 18:21:07.316542
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1f6b2e4d87'
+down_revision: Union[str, Sequence[str], None] = '7b5e0d3f1a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_clock_states_checked_in', 'clock_states', ['timestamp'],
+            postgresql_where=sa.text("record_type = 'CHECK_IN'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_clock_states_checked_in', table_name='clock_states', postgresql_concurrently=True)
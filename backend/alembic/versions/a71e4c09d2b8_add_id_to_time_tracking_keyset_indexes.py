@@ -0,0 +1,45 @@
+"""add id to time_tracking keyset indexes
+
+Revision ID: a71e4c09d2b8
+Revises: 3f9a1c2d7b45
+Create Date: 2026-10-18 11:20:47.093512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a71e4c09d2b8'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c2d7b45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 3f9a1c2d7b45 ya crea los indices con el id. Esto solo hace converger las
+    # bases que aplicaron su primera version, con (user_id, timestamp) sin id
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_time_tracking_user_id_timestamp_id', 'time_tracking',
+            ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_time_tracking_timestamp_id', 'time_tracking',
+            [sa.text('timestamp DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index('ix_time_tracking_user_id_timestamp', table_name='time_tracking',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_time_tracking_timestamp', table_name='time_tracking',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Los indices son de 3f9a1c2d7b45: su downgrade los borra
+    pass
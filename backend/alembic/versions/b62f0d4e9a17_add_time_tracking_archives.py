@@ -0,0 +1,45 @@
+"""add time_tracking_archives
+
+Revision ID: b62f0d4e9a17
+Revises: 4a8d2f7c1e35
+Create Date: 2026-10-18 19:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b62f0d4e9a17'
+down_revision: Union[str, Sequence[str], None] = '4a8d2f7c1e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Los meses ya archivados se registran volviendo a ejecutar
+    # app.commands.archive_time_tracking --month AAAA-MM (fusiona por id)
+    op.create_table('time_tracking_archives',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('records', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('create_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('update_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('delete_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('is_disabled', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_time_tracking_archives_month_user_id', 'time_tracking_archives', ['month', 'user_id'], unique=True)
+    op.create_index('ix_time_tracking_archives_user_id', 'time_tracking_archives', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_time_tracking_archives_user_id', table_name='time_tracking_archives')
+    op.drop_index('uq_time_tracking_archives_month_user_id', table_name='time_tracking_archives')
+    op.drop_table('time_tracking_archives')
@@ -0,0 +1,103 @@
+"""add daily_hours rollup
+
+Revision ID: c3e9d5a1b7f2
+Revises: 5d2b8e61f0a3
+Create Date: 2026-10-18 13:41:09.275520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9d5a1b7f2'
+down_revision: Union[str, Sequence[str], None] = '5d2b8e61f0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mismo calculo que _refresh_daily_hours_statement (app.services.time_tracking)
+# para todos los dias con fichajes o ajustes aprobados: con HOURS_ENGINE=rollup
+# una base existente no puede arrancar con daily_hours vacia.
+BACKFILL_DAILY_HOURS = """
+WITH user_days AS (
+    SELECT user_id, date_trunc('day', timestamp AT TIME ZONE 'UTC') AS day
+    FROM time_tracking
+    UNION
+    SELECT user_id, date_trunc('day', adjusted_timestamp AT TIME ZONE 'UTC')
+    FROM time_adjustments
+    WHERE status = 'APPROVED'
+      AND adjusted_type IN ('ENTRY_CORRECTION', 'MANUAL_ENTRY', 'EXIT_CORRECTION')
+      AND adjusted_timestamp IS NOT NULL
+),
+days AS (
+    SELECT user_id, CAST(day AS date) AS day, day AT TIME ZONE 'UTC' AS start
+    FROM user_days
+),
+events AS (
+    SELECT d.user_id, d.day, t.timestamp AS ts, t.record_type = 'CHECK_IN' AS is_check_in, 0 AS source
+    FROM days d
+    JOIN time_tracking t ON t.user_id = d.user_id
+        AND t.timestamp >= d.start AND t.timestamp < d.start + interval '1 day'
+    UNION ALL
+    -- El primer fichaje del dia siguiente cierra el turno que cruza la medianoche
+    SELECT d.user_id, d.day, n.timestamp, n.record_type = 'CHECK_IN', 0
+    FROM days d
+    CROSS JOIN LATERAL (
+        SELECT t.timestamp, t.record_type
+        FROM time_tracking t
+        WHERE t.user_id = d.user_id
+          AND t.timestamp >= d.start + interval '1 day' AND t.timestamp < d.start + interval '2 days'
+        ORDER BY t.timestamp
+        LIMIT 1
+    ) n
+    UNION ALL
+    SELECT d.user_id, d.day, a.adjusted_timestamp, a.adjusted_type IN ('ENTRY_CORRECTION', 'MANUAL_ENTRY'), 1
+    FROM days d
+    JOIN time_adjustments a ON a.user_id = d.user_id
+        AND a.status = 'APPROVED'
+        AND a.adjusted_type IN ('ENTRY_CORRECTION', 'MANUAL_ENTRY', 'EXIT_CORRECTION')
+        AND a.adjusted_timestamp >= d.start AND a.adjusted_timestamp < d.start + interval '1 day'
+),
+paired AS (
+    SELECT user_id, day, ts, is_check_in,
+           lag(ts) OVER w AS prev_ts,
+           lag(is_check_in) OVER w AS prev_is_check_in
+    FROM events
+    WINDOW w AS (PARTITION BY user_id, day ORDER BY ts, source)
+)
+INSERT INTO daily_hours (id, user_id, day, hours_worked, is_deleted, is_disabled)
+SELECT gen_random_uuid(), d.user_id, d.day,
+       coalesce(sum(extract(epoch FROM p.ts - p.prev_ts)) / 3600, 0), false, false
+FROM days d
+LEFT JOIN paired p ON p.user_id = d.user_id AND p.day = d.day
+    AND NOT p.is_check_in AND p.prev_is_check_in
+GROUP BY d.user_id, d.day
+ON CONFLICT (user_id, day) DO UPDATE SET hours_worked = excluded.hours_worked, update_date = now()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_hours',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('hours_worked', sa.Float(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('create_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('update_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('delete_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('is_disabled', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_daily_hours_user_day', 'daily_hours', ['user_id', 'day'], unique=True)
+    op.execute(BACKFILL_DAILY_HOURS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_daily_hours_user_day', table_name='daily_hours')
+    op.drop_table('daily_hours')
@@ -0,0 +1,51 @@
+"""add clock_states
+
+Revision ID: e8f4a2c6d913
+Revises: c3e9d5a1b7f2
+Create Date: 2026-10-18 16:12:40.531876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8f4a2c6d913'
+down_revision: Union[str, Sequence[str], None] = 'c3e9d5a1b7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('clock_states',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('record_type', postgresql.ENUM('CHECK_IN', 'CHECK_OUT', name='record_type_enum', create_type=False), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('record_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('create_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('update_date', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('delete_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('is_disabled', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_clock_states_user_id', 'clock_states', ['user_id'], unique=True)
+    # Estado inicial: el ultimo registro de cada empleado
+    op.execute("""
+        INSERT INTO clock_states (id, user_id, record_type, timestamp, record_id, is_deleted, is_disabled)
+        SELECT DISTINCT ON (user_id) gen_random_uuid(), user_id, record_type, timestamp, id, false, false
+        FROM time_tracking
+        ORDER BY user_id, timestamp DESC, id DESC
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_clock_states_user_id', table_name='clock_states')
+    op.drop_table('clock_states')
@@ -0,0 +1,34 @@
+"""Devenga el mes a toda la plantilla activa (idempotente por año/mes/tipo).
+
+    python -m app.commands.accrue_leave --year 2025 --month 10
+"""
+import argparse
+from datetime import date
+
+from app.database import SessionLocal
+from app.schemas.enum import LeaveTypeEnum
+from app.services.leave_balance import accrue_monthly_bulk
+
+
+def main():
+    today = date.today()
+    parser = argparse.ArgumentParser(description="Devengo mensual masivo de vacaciones")
+    parser.add_argument("--year", type=int, default=today.year, help="Por defecto, el año actual")
+    parser.add_argument("--month", type=int, choices=range(1, 13), default=today.month, help="Por defecto, el mes actual")
+    parser.add_argument("--leave-type", type=LeaveTypeEnum, default=LeaveTypeEnum.VACATION)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = accrue_monthly_bulk(db, args.year, args.month, args.leave_type)
+        if result["applied"]:
+            print(f"{args.year}-{args.month:02d}: devengado a {result['employees']} empleados "
+                  f"({result['created_balances']} saldos nuevos)")
+        else:
+            print(f"{args.year}-{args.month:02d} ya estaba devengado ({result['employees']} empleados)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Archiva en Parquet los meses cerrados de time_tracking y los quita de la tabla.
+
+    python -m app.commands.archive_time_tracking --keep-months 12
+    python -m app.commands.archive_time_tracking --month 2022-03
+
+Un fichero zstd por mes en ARCHIVE_DIR/time_tracking/AAAA/. Por defecto deja en
+la tabla los ultimos --keep-months meses (ademas del actual). Los listados y el
+export siguen devolviendo los fichajes archivados; las horas salen de
+daily_hours, que no se toca. Tambien recoge las particiones desadjuntadas con
+manage_partitions --detach-before.
+"""
+import argparse
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+
+from app.core.exceptions import DomainError
+from app.database import SessionLocal
+from app.models import TimeTracking
+from app.services import archive, partitions
+
+
+def _month(value: str):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def _candidate_months(db, cutoff) -> list:
+    months = {p["month"] for p in partitions.list_detached_partitions(db) if p["month"] < cutoff}
+    first = db.query(func.min(TimeTracking.timestamp)).scalar()
+    if first is not None:
+        month = partitions.month_start(first.astimezone(timezone.utc).date())
+        while month < cutoff:
+            months.add(month)
+            month = partitions.add_months(month, 1)
+    return sorted(months)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-months", type=int, default=12, help="Meses cerrados que se quedan en la tabla")
+    parser.add_argument("--month", type=_month, action="append", help="AAAA-MM concreto (repetible)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cutoff = partitions.add_months(partitions.current_month(), -args.keep_months)
+        months = args.month or _candidate_months(db, cutoff)
+        for month in months:
+            try:
+                result = archive.archive_month(db, month)
+            except DomainError as e:
+                raise SystemExit(e.message)
+            if result["rows"]:
+                print(f"{month:%Y-%m}: {result['rows']} fichajes -> {result['path']}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Genera un dataset sintetico grande para dimensionar la base de datos.
+
+    python -m app.commands.generate_dataset --employees 5000 --years 3 --workers 8
+
+Crea empleados "gen_*" con varios años de fichajes (dias laborables, pausas
+para comer, olvidos), ajustes, solicitudes de ausencia, saldos de vacaciones y
+sus filas de daily_hours y clock_states. Las filas se envian con COPY en
+paralelo: cada proceso genera un bloque de empleados y lo carga en su propia
+transaccion. El resultado solo depende de --seed (no de --workers).
+Necesita las migraciones aplicadas y los roles creados (app.seed_data).
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from types import SimpleNamespace
+
+import psycopg2
+from sqlalchemy.engine import make_url
+
+from app.core.security import pwd_context
+from app.database import SessionLocal
+from app.schemas.enum import (
+    AdjustmentStatusEnum,
+    AdjustmentTypeEnum,
+    LeaveStatusEnum,
+    LeaveTypeEnum,
+    RecordTypeEnum,
+    UserRole,
+)
+from app.services.partitions import ensure_partitions
+from app.services.time_tracking import _daily_hours_from_records
+
+PASSWORD = "123456"
+FIRST_NAMES = ["Ana", "Luis", "Marta", "Javier", "Lucia", "Carlos", "Elena", "Pablo", "Sara", "Diego",
+               "Nerea", "Hugo", "Irene", "Alvaro", "Paula", "Sergio", "Laura", "Raul", "Clara", "Mario"]
+LAST_NAMES = ["Garcia", "Lopez", "Martinez", "Sanchez", "Perez", "Gomez", "Fernandez", "Ruiz", "Diaz",
+              "Moreno", "Alonso", "Romero", "Navarro", "Torres", "Dominguez", "Vazquez", "Ramos", "Gil"]
+ENTITY_COLUMNS = ["id", "is_deleted", "is_disabled"]
+
+# Orden de carga: cada tabla solo referencia a las anteriores
+TABLE_COLUMNS = {
+    "users": ENTITY_COLUMNS + ["username", "email", "full_name", "hashed_password", "is_active", "role_id"],
+    "leave_balances": ENTITY_COLUMNS + ["user_id", "year", "leave_type", "remaining_days", "used_days",
+                                        "weekly_hours", "monthly_hours", "last_updated", "total_days"],
+    "time_tracking": ENTITY_COLUMNS + ["user_id", "record_type", "timestamp", "description"],
+    "time_adjustments": ENTITY_COLUMNS + ["time_record_id", "user_id", "adjusted_timestamp", "adjusted_type",
+                                          "reason", "status", "reviewed_by", "review_comment"],
+    "time_off_requests": ENTITY_COLUMNS + ["user_id", "start_date", "end_date", "leave_type", "days_requested",
+                                           "reason", "status", "reviewed_by", "review_comment"],
+    "daily_hours": ENTITY_COLUMNS + ["user_id", "day", "hours_worked"],
+    "clock_states": ENTITY_COLUMNS + ["user_id", "record_type", "timestamp", "record_id"],
+}
+
+
+def _dsn() -> str:
+    url = make_url(os.environ["DATABASE_URL"]).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def _copy_value(value) -> str:
+    # Formato text de COPY; los textos generados no llevan tabuladores ni barras
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return str(value)
+
+
+def _copy_rows(cursor, table: str, rows: list):
+    if not rows:
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(v) for v in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    columns = ", ".join(f'"{c}"' for c in TABLE_COLUMNS[table])
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+
+def _weekdays(start: date, end: date):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _employee_rows(rng: random.Random, index: int, params: dict, rows: dict):
+    """Todas las filas de un empleado, añadidas a `rows` (tabla -> lista de tuplas)."""
+    user_id = _uuid(rng)
+    prefix = params["prefix"]
+    rows["users"].append((
+        user_id, False, False, f"{prefix}{index:07d}", f"{prefix}{index:07d}@example.com",
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+        params["password_hash"], rng.random() > 0.03, params["employee_role_id"],
+    ))
+
+    start_day, end_day = params["start_day"], params["end_day"]
+    # Un tercio se incorpora despues del inicio del periodo
+    if rng.random() < 0.33:
+        start_day += timedelta(days=rng.randint(0, (end_day - start_day).days // 2))
+    weekly_hours = rng.choice([40.0, 40.0, 40.0, 30.0, 20.0])
+    shift = timedelta(hours=weekly_hours / 5)
+    schedule_start = timedelta(hours=rng.choice([7, 8, 8, 9, 10]), minutes=rng.choice([0, 30]))
+
+    # Ausencias: 2-4 solicitudes por año, la mayoria aprobadas
+    leave_days, used_by_year = set(), {}
+    for year in range(start_day.year, end_day.year + 1):
+        for _ in range(rng.randint(2, 4)):
+            first = date(year, rng.randint(1, 12), rng.randint(1, 28))
+            days = [d for d in _weekdays(first, first + timedelta(days=rng.randint(0, 9)))]
+            if not days or first < start_day or first > end_day:
+                continue
+            leave_type = LeaveTypeEnum.VACATION if rng.random() < 0.8 else rng.choice(
+                [LeaveTypeEnum.SICK, LeaveTypeEnum.PERSONAL])
+            status = rng.choices(
+                [LeaveStatusEnum.APPROVED, LeaveStatusEnum.REJECTED, LeaveStatusEnum.PENDING], [80, 10, 10])[0]
+            reviewed = status != LeaveStatusEnum.PENDING
+            rows["time_off_requests"].append((
+                _uuid(rng), False, False, user_id, days[0], days[-1], leave_type, len(days),
+                "Generado", status, params["hr_id"] if reviewed else None, None,
+            ))
+            if status == LeaveStatusEnum.APPROVED:
+                leave_days.update(days)
+                if leave_type == LeaveTypeEnum.VACATION:
+                    used_by_year[year] = used_by_year.get(year, 0) + len(days)
+
+    for year in range(start_day.year, end_day.year + 1):
+        months = 12 - (start_day.month - 1 if year == start_day.year else 0)
+        total = round(2.5 * months * weekly_hours / 40, 2)
+        used = used_by_year.get(year, 0)
+        rows["leave_balances"].append((
+            _uuid(rng), False, False, user_id, year, LeaveTypeEnum.VACATION, round(total - used, 2), used,
+            weekly_hours, weekly_hours * 4.33, params["now"], total,
+        ))
+
+    records, approved = [], []
+    for day in _weekdays(start_day, end_day):
+        if day in leave_days or rng.random() < 0.02:
+            continue
+        check_in = datetime.combine(day, dt_time(), tzinfo=timezone.utc) + schedule_start + timedelta(
+            minutes=rng.randint(-15, 25))
+        shifts = [(check_in, check_in + shift + timedelta(minutes=rng.randint(-20, 40)))]
+        if weekly_hours == 40 and rng.random() < 0.2:
+            # Pausa para comer: dos tramos
+            lunch = check_in + timedelta(hours=4, minutes=rng.randint(0, 30))
+            back = lunch + timedelta(minutes=rng.randint(30, 60))
+            shifts = [(check_in, lunch), (back, back + shift - (lunch - check_in))]
+        for shift_in, shift_out in shifts:
+            records.append((_uuid(rng), RecordTypeEnum.CHECK_IN, shift_in))
+            # Alguna salida olvidada
+            if rng.random() > 0.01:
+                records.append((_uuid(rng), RecordTypeEnum.CHECK_OUT, shift_out))
+
+    for record_id, record_type, timestamp in records:
+        rows["time_tracking"].append((record_id, False, False, user_id, record_type, timestamp, None))
+        if rng.random() >= 0.015:
+            continue
+        status = rng.choices(
+            [AdjustmentStatusEnum.APPROVED, AdjustmentStatusEnum.REJECTED, AdjustmentStatusEnum.PENDING], [70, 15, 15])[0]
+        adjusted_type = (AdjustmentTypeEnum.ENTRY_CORRECTION if record_type == RecordTypeEnum.CHECK_IN
+                         else AdjustmentTypeEnum.EXIT_CORRECTION)
+        # Los aprobados ya estan aplicados al registro, como hace review_adjustment
+        adjusted = timestamp if status == AdjustmentStatusEnum.APPROVED else timestamp + timedelta(
+            minutes=rng.randint(-30, 30))
+        adjustment_id = _uuid(rng)
+        reviewed = status != AdjustmentStatusEnum.PENDING
+        rows["time_adjustments"].append((
+            adjustment_id, False, False, record_id, user_id, adjusted, adjusted_type, "Olvide fichar a tiempo",
+            status, params["hr_id"] if reviewed else None, None,
+        ))
+        if status == AdjustmentStatusEnum.APPROVED:
+            approved.append(SimpleNamespace(
+                id=adjustment_id, user_id=user_id, status=status.value, adjusted_type=adjusted_type.value,
+                adjusted_timestamp=adjusted, reason=None, create_date=None, update_date=None,
+            ))
+
+    # Mismo calculo que rebuild_daily_hours, sin pasar por el ORM
+    history = [SimpleNamespace(record_type=t.value, timestamp=ts) for _, t, ts in records]
+    for day, hours in _daily_hours_from_records(history, approved).items():
+        rows["daily_hours"].append((_uuid(rng), False, False, user_id, day, hours))
+    if records:
+        last_id, last_type, last_timestamp = records[-1]
+        rows["clock_states"].append((_uuid(rng), False, False, user_id, last_type, last_timestamp, last_id))
+
+
+def _generate_chunk(task) -> dict:
+    chunk_index, first, last, params = task
+    # Semilla por bloque: el resultado no depende del numero de procesos
+    rng = random.Random(f"{params['seed']}:{chunk_index}")
+    counts = {table: 0 for table in TABLE_COLUMNS}
+
+    connection = psycopg2.connect(params["dsn"])
+    try:
+        with connection, connection.cursor() as cursor:
+            for batch_start in range(first, last, params["batch_employees"]):
+                rows = {table: [] for table in TABLE_COLUMNS}
+                for index in range(batch_start, min(batch_start + params["batch_employees"], last)):
+                    _employee_rows(rng, index, params, rows)
+                for table in TABLE_COLUMNS:
+                    _copy_rows(cursor, table, rows[table])
+                    counts[table] += len(rows[table])
+    finally:
+        connection.close()
+    return counts
+
+
+def _prepare(dsn: str, prefix: str, replace: bool, password_hash: str):
+    """Roles, usuario de RRHH que revisa las solicitudes y limpieza previa."""
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection, connection.cursor() as cursor:
+            if replace:
+                cursor.execute("DELETE FROM users WHERE username LIKE %s", (f"{prefix}%",))
+            cursor.execute("SELECT name, id FROM roles")
+            roles = dict(cursor.fetchall())
+            if UserRole.RRHH.value not in roles or UserRole.EMPLOYEE.value not in roles:
+                raise SystemExit("Faltan los roles: ejecuta antes app.seed_data")
+
+            hr_username = f"{prefix}rrhh"
+            cursor.execute("SELECT id FROM users WHERE username = %s", (hr_username,))
+            existing = cursor.fetchone()
+            if existing:
+                hr_id = existing[0]
+            else:
+                hr_id = str(uuid.uuid4())
+                cursor.execute(
+                    "INSERT INTO users (id, username, email, full_name, hashed_password, is_active, role_id,"
+                    " is_deleted, is_disabled) VALUES (%s, %s, %s, %s, %s, true, %s, false, false)",
+                    (hr_id, hr_username, f"{hr_username}@example.com", "RRHH Generado", password_hash,
+                     roles[UserRole.RRHH.value]),
+                )
+        return roles[UserRole.EMPLOYEE.value], hr_id
+    finally:
+        connection.close()
+
+
+def _analyze(dsn: str):
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            for table in TABLE_COLUMNS:
+                cursor.execute(f"ANALYZE {table}")
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=3, help="Años de historial hasta ayer")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-employees", type=int, default=250, help="Empleados por transaccion")
+    parser.add_argument("--batch-employees", type=int, default=50, help="Empleados por tanda de COPY")
+    parser.add_argument("--prefix", default="gen_")
+    parser.add_argument("--replace", action="store_true", help="Borra antes los usuarios con el prefijo")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    dsn = _dsn()
+    # Un solo hash para todos: bcrypt tarda ~250 ms
+    password_hash = pwd_context.hash(PASSWORD)
+    employee_role_id, hr_id = _prepare(dsn, args.prefix, args.replace, password_hash)
+
+    end_day = date.today() - timedelta(days=1)
+    params = {
+        "dsn": dsn,
+        "seed": args.seed,
+        "prefix": args.prefix,
+        "password_hash": password_hash,
+        "employee_role_id": employee_role_id,
+        "hr_id": hr_id,
+        "start_day": date(end_day.year - args.years, end_day.month, 1),
+        "end_day": end_day,
+        "now": datetime.utcnow(),
+        "batch_employees": args.batch_employees,
+    }
+    # Sin su particion, el historial iria entero a time_tracking_default
+    db = SessionLocal()
+    try:
+        ensure_partitions(db, params["start_day"], end_day)
+    finally:
+        db.close()
+    tasks = [
+        (chunk_index, first, min(first + args.chunk_employees, args.employees), params)
+        for chunk_index, first in enumerate(range(0, args.employees, args.chunk_employees))
+    ]
+
+    totals = {table: 0 for table in TABLE_COLUMNS}
+    with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+        for counts in pool.imap_unordered(_generate_chunk, tasks):
+            for table, count in counts.items():
+                totals[table] += count
+            print(f"bloque cargado: {counts['users']} empleados, {counts['time_tracking']} fichajes", flush=True)
+
+    _analyze(dsn)
+    print(json.dumps({"seconds": round(time.perf_counter() - started, 1), "rows": totals}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Mantenimiento de las particiones mensuales de time_tracking.
+
+    python -m app.commands.manage_partitions --months-ahead 3
+    python -m app.commands.manage_partitions --detach-before 2021-01
+    python -m app.commands.manage_partitions --check-pruning
+
+Pensado para un cron diario: crea por adelantado los meses que faltan (el mes
+actual y los `--months-ahead` siguientes) y, con --detach-before, saca de la
+tabla los meses anteriores, que quedan como tablas sueltas (la ley pide
+conservar los fichajes cuatro años: archivarlos antes de borrarlos).
+
+--check-pruning ejecuta las consultas de app.services.time_tracking dentro de
+una transaccion que se deshace, captura su SQL y muestra que particiones lee el
+plan de cada una. Las acotadas a un mes no deberian leer mas de dos ni la
+DEFAULT; si alguna lo hace, el comando sale con codigo 1.
+"""
+import argparse
+import json
+from datetime import date, datetime, timezone
+
+from sqlalchemy import event
+
+from app.database import SessionLocal
+from app.models import TimeTracking
+from app.schemas.enum import HoursEngineEnum
+from app.services import partitions
+from app.services import time_tracking
+
+
+# Un mes acotado puede tocar el siguiente (el fichaje que cierra el ultimo turno)
+MAX_PARTITIONS_PER_MONTH = 2
+
+
+def _month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def _capture(db, name: str, fn, *args, **kwargs) -> tuple:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "time_tracking" in statement and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+    report = []
+    for statement, parameters in statements:
+        scanned = partitions.scanned_partitions(db, statement, parameters)
+        report.append({"call": name, "sql": " ".join(statement.split())[:120], "partitions": scanned})
+    return report, result
+
+
+def check_pruning(db) -> list:
+    sample = db.query(TimeTracking.user_id, TimeTracking.timestamp).order_by(TimeTracking.timestamp.desc()).first()
+    if sample is None:
+        raise SystemExit("No hay fichajes con los que probar")
+    user_id, timestamp = sample
+    day = timestamp.astimezone(timezone.utc).date()
+
+    calls = [
+        (f"get_monthly_hours[{engine.value}]", time_tracking.get_monthly_hours,
+         (db, user_id, day.year, day.month, engine))
+        for engine in HoursEngineEnum
+    ] + [
+        ("get_company_monthly_hours[numpy]", time_tracking.get_company_monthly_hours,
+         (db, day.year, day.month, HoursEngineEnum.NUMPY)),
+        ("get_company_monthly_hours[sql]", time_tracking.get_company_monthly_hours,
+         (db, day.year, day.month, HoursEngineEnum.SQL)),
+        ("refresh_daily_hours", time_tracking.refresh_daily_hours, (db, user_id, day)),
+    ]
+
+    report = []
+    try:
+        for name, fn, args in calls:
+            for row in _capture(db, name, fn, *args)[0]:
+                row["pruned"] = (
+                    len(row["partitions"]) <= MAX_PARTITIONS_PER_MONTH
+                    and partitions.DEFAULT_PARTITION not in row["partitions"]
+                )
+                report.append(row)
+        # Los listados no tienen rango: recorren las particiones por orden hasta llenar la pagina
+        first_page_report, first_page = _capture(
+            db, "get_time_records_by_user_with_user_info", time_tracking.get_time_records_by_user_with_user_info,
+            db, user_id, limit=20, offset=0, cursor=None, exact_total=False,
+        )
+        report += first_page_report
+        if first_page["next_cursor"]:
+            report += _capture(
+                db, "get_time_records_by_user_with_user_info[cursor]",
+                time_tracking.get_time_records_by_user_with_user_info,
+                db, user_id, limit=20, offset=0, cursor=first_page["next_cursor"], exact_total=False,
+            )[0]
+    finally:
+        # refresh_daily_hours escribe en daily_hours
+        db.rollback()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=3, help="Meses futuros a crear ademas del actual")
+    parser.add_argument("--detach-before", type=_month, help="AAAA-MM: desadjunta los meses anteriores")
+    parser.add_argument("--check-pruning", action="store_true", help="Solo comprueba la poda de particiones")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check_pruning:
+            total = len(partitions.list_partitions(db))
+            report = check_pruning(db)
+            for row in report:
+                row["of"] = total
+                print(json.dumps(row))
+            if not all(row.get("pruned", True) for row in report):
+                raise SystemExit(1)
+            return
+
+        current = partitions.current_month()
+        last = partitions.add_months(current, args.months_ahead)
+        for name in partitions.ensure_partitions(db, current, last):
+            print(f"creada {name}")
+        if args.detach_before:
+            for name in partitions.detach_partitions_before(db, args.detach_before):
+                print(f"desadjuntada {name}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
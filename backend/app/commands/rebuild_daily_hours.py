@@ -0,0 +1,41 @@
+"""Recalcula la tabla daily_hours a partir de time_tracking.
+
+    python -m app.commands.rebuild_daily_hours --start 2025-01-01 --end 2025-12-31
+"""
+import argparse
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models import TimeTracking
+from app.services.time_tracking import rebuild_daily_hours
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula daily_hours (backfill)")
+    parser.add_argument("--start", type=date.fromisoformat, help="Primer dia (por defecto, el primer fichaje)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Ultimo dia (por defecto, hoy)")
+    parser.add_argument("--user-id", type=UUID, help="Solo este empleado")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = args.start
+        if start is None:
+            first = db.query(func.min(TimeTracking.timestamp)).scalar()
+            if first is None:
+                print("No hay fichajes")
+                return
+            start = first.date()
+        end = args.end or date.today()
+
+        rows = rebuild_daily_hours(db, start, end, args.user_id)
+        print(f"daily_hours recalculado: {rows} dias entre {start} y {end}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
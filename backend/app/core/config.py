@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
  
 
@@ -9,6 +10,41 @@ class Setting(BaseSettings):
     UVICORN_HOST: str
     UVICORN_PORT: int
     VITE_API_URL: str
+    # Usa AsyncSession + asyncpg en los endpoints calientes (login y fichaje); se lee en cada peticion
+    ASYNC_DB: bool = False
+    # Pool de conexiones (se aplica tanto al engine sync como al async)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # PgBouncer en modo transaction: sin prepared statements del lado del servidor
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+    # Cache del usuario autenticado en get_current_user (0 lo desactiva); se
+    # invalida en todos los workers por LISTEN/NOTIFY (ver principal_cache.py)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    # Pool de procesos para bcrypt (None = un proceso por CPU, 0 = en linea)
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    # Hashes en curso o en cola a partir de los cuales se responde 503
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_RETRY_AFTER: int = 2
+    # Motor de calculo de horas: rollup | python | sql | numpy
+    HOURS_ENGINE: str = "rollup"
+    HOURS_REPORT_ENGINE: str = "numpy"
+    # Listados: orjson y sin revalidar contra el response_model
+    FAST_JSON_RESPONSES: bool = False
+    # Recalcula clock_states desde time_tracking al arrancar cada worker
+    REBUILD_CLOCK_STATES_ON_STARTUP: bool = False
+    # Stream SSE /events/stream: conexion LISTEN (None = DATABASE_URL; con
+    # PgBouncer en modo transaction debe ir directa a Postgres)
+    EVENTS_DATABASE_URL: Optional[str] = None
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15
+    # Cada cuanto se emiten en un solo NOTIFY los eventos de fichaje encolados
+    EVENTS_PUBLISH_INTERVAL_SECONDS: float = 0.2
+    # Parquet mensuales con los fichajes archivados (app.commands.archive_time_tracking)
+    ARCHIVE_DIR: str = "archive"
     
     class Config:
         env_file = ".env"
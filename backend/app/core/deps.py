@@ -1,11 +1,16 @@
+from contextlib import asynccontextmanager
+
 from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
 
-from app.database import get_db
-from app.services.user import get_user_by_id
+from app.database import get_db, get_hot_db
+from app.services.user import get_principal, get_principal_async
 from app.core.config import settings
+from app.core.principal_cache import principal_cache
 from app.core.exceptions import unauthorized, forbidden
 from app.schemas.enum import UserRole
 
@@ -25,17 +30,16 @@ def decode_token(token: str):
         raise unauthorized("Could not validate credentials")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+def _user_id_from_token(token: str) -> str:
     payload = decode_token(token)
     user_id = payload.get("sub")
 
     if not user_id:
         raise unauthorized("Invalid authentication payload")
+    return user_id
 
-    user = get_user_by_id(db, user_id)
+
+def _check_user(user):
     if not user:
         raise unauthorized("User not found")
 
@@ -45,6 +49,57 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    user_id = _user_id_from_token(token)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        version = principal_cache.version()
+        principal = get_principal(db, user_id)
+        if principal:
+            principal_cache.set(principal, version)
+    return _check_user(principal)
+
+
+async def _get_principal_hot(db: AsyncSession | Session, user_id: str):
+    if isinstance(db, AsyncSession):
+        return await get_principal_async(db, user_id)
+    return await run_in_threadpool(get_principal, db, user_id)
+
+
+async def get_current_user_hot(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession | Session = Depends(get_hot_db)
+):
+    """get_current_user para los endpoints que usan get_hot_db (misma sesion)."""
+    user_id = _user_id_from_token(token)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        version = principal_cache.version()
+        principal = await _get_principal_hot(db, user_id)
+        if principal:
+            principal_cache.set(principal, version)
+    return _check_user(principal)
+
+
+async def get_current_user_for_stream(token: str = Depends(oauth2_scheme)):
+    """Como get_current_user_hot (sync o async segun ASYNC_DB), pero con una
+    sesion propia que se cierra al instante: una dependencia con yield no se
+    cierra hasta que acaba el stream y cada conexion SSE retendria una conexion
+    del pool."""
+    user_id = _user_id_from_token(token)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        version = principal_cache.version()
+        async with asynccontextmanager(get_hot_db)() as db:
+            principal = await _get_principal_hot(db, user_id)
+        if principal:
+            principal_cache.set(principal, version)
+    return _check_user(principal)
+
+
 def require_role(min_role: UserRole):
     def _require_role(current_user = Depends(get_current_user)):
         role_name = getattr(current_user.role, "name", None)
@@ -0,0 +1,36 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# El navegador guarda la respuesta pero revalida siempre con If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """ETag debil a partir de lo que identifica la version del recurso
+    (update_date de las filas, parametros de la consulta...)."""
+    raw = "|".join(str(part) for part in parts).encode()
+    return f'W/"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Comparacion debil: W/"x" y "x" son la misma version
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """304 si el cliente ya tiene esta version; si no, pone el ETag en la
+    respuesta normal y devuelve None para que el endpoint siga."""
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
@@ -0,0 +1,250 @@
+"""Eventos en tiempo real para los paneles de RRHH (fichajes, solicitudes y revisiones).
+
+Solicitudes y revisiones se publican con pg_notify dentro de su transaccion:
+Postgres solo entrega la notificacion si hay commit, y la entrega a todos los
+procesos que escuchan el canal. Los fichajes no: un NOTIFY toma un lock global
+al hacer commit y serializaria los commits del pico de las 9:00. Se encolan en
+event_publisher despues del commit y un hilo los emite en lotes (un solo
+pg_notify por lote, en su propia transaccion). Si el proceso muere antes se
+pierden, como en una reconexion del LISTEN.
+
+Cada worker de uvicorn abre una unica conexion con LISTEN (al llegar el primer
+suscriptor) y reparte los eventos entre sus conexiones SSE en memoria, con una
+cola acotada por cliente. La misma conexion escucha otros canales internos
+registrados con EventBroadcaster.listen (p. ej. la invalidacion de la cache de
+usuarios).
+"""
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import EVENT_STREAM_SUBSCRIBERS
+from app.database import engine
+from app.schemas.enum import EventTypeEnum
+
+EVENTS_CHANNEL = "rrhh_events"
+# Tras reconectar el LISTEN: se han podido perder eventos, el cliente debe recargar
+RESYNC_EVENT = "resync"
+RECONNECT_MAX_SECONDS = 30
+
+logger = logging.getLogger("rrhh_api.events")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _payload(event_type: EventTypeEnum, user_id: UUID, data: dict) -> str:
+    # NOTIFY admite hasta 8000 bytes: solo ids y campos cortos
+    return json.dumps({
+        "type": event_type.value,
+        "user_id": str(user_id),
+        "occurred_at": datetime.now(timezone.utc).isoformat(),
+        **data,
+    }, default=_json_default)
+
+
+def publish_event(db: Session, event_type: EventTypeEnum, user_id: UUID, **data):
+    """Encola el evento en la transaccion de `db`; se emite con el commit."""
+    db.execute(select(func.pg_notify(EVENTS_CHANNEL, _payload(event_type, user_id, data))))
+
+
+class EventPublisher:
+    """Cola por proceso de eventos ya confirmados. Un hilo la vacia cada
+    `interval` segundos con un solo pg_notify; si falla, se registra y el lote
+    se descarta (los clientes recargan al reconectar)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def publish(self, events: Iterable[tuple]):
+        """Encola (event_type, user_id, data); llamar despues del commit."""
+        payloads = [_payload(event_type, user_id, data) for event_type, user_id, data in events]
+        if not payloads:
+            return
+        with self._lock:
+            self._pending.extend(payloads)
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="event-publisher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            payloads, self._pending = self._pending, []
+        if not payloads:
+            return
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                    {"channel": EVENTS_CHANNEL, "payloads": payloads},
+                )
+        except Exception as e:
+            logger.warning(f"No se pudieron publicar {len(payloads)} eventos: {e}")
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopped.set()
+            thread.join()
+        self.flush()
+
+
+class Subscription:
+    __slots__ = ("queue", "types", "user_id")
+
+    def __init__(self, types: Optional[set], user_id: Optional[str], queue_size: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.types = types
+        self.user_id = user_id
+
+    def matches(self, event: dict) -> bool:
+        if event["type"] == RESYNC_EVENT:
+            return True
+        if self.types is not None and event["type"] not in self.types:
+            return False
+        return self.user_id is None or event.get("user_id") == self.user_id
+
+
+class EventBroadcaster:
+    """Un LISTEN por proceso y reparto en memoria a las suscripciones SSE.
+
+    Un cliente que no consume y llena su cola se desconecta (recibe None); el
+    navegador reconecta solo y recarga, en vez de frenar al resto.
+    """
+
+    def __init__(self, dsn: str, queue_size: int):
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._channels = {EVENTS_CHANNEL: self._on_notify}
+        self._connection_callbacks = []
+        self._task = None
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen_forever())
+
+    def listen(self, channel: str, callback: Callable[[str], None],
+               on_connection_change: Optional[Callable[[bool], None]] = None):
+        """Escucha `channel` en la misma conexion y arranca ya el LISTEN (se
+        llama en el lifespan, antes de que haya conexion).
+        on_connection_change(True/False) avisa al conectar y al perder la
+        conexion; mientras esta caida no llegan notificaciones."""
+        self._channels[channel] = lambda connection, pid, channel, payload: callback(payload)
+        if on_connection_change is not None:
+            self._connection_callbacks.append(on_connection_change)
+        self._start()
+
+    def _connection_changed(self, connected: bool):
+        for callback in self._connection_callbacks:
+            callback(connected)
+
+    def subscribe(self, types: Optional[Iterable[EventTypeEnum]] = None, user_id: Optional[UUID] = None) -> Subscription:
+        subscription = Subscription(
+            {t.value for t in types} if types else None,
+            str(user_id) if user_id is not None else None,
+            self.queue_size,
+        )
+        self._subscriptions.add(subscription)
+        EVENT_STREAM_SUBSCRIBERS.inc()
+        self._start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscriptions:
+            self._subscriptions.discard(subscription)
+            EVENT_STREAM_SUBSCRIBERS.dec()
+
+    def _dispatch(self, event: dict):
+        for subscription in list(self._subscriptions):
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.unsubscribe(subscription)
+                # Hueco para el aviso de cierre
+                subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Evento no valido en {channel}: {payload[:200]}")
+            return
+        self._dispatch(event)
+
+    async def _listen_forever(self):
+        delay = 1
+        connected_before = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                for channel, callback in self._channels.items():
+                    await connection.add_listener(channel, callback)
+                self._connection_changed(True)
+                if connected_before:
+                    self._dispatch({"type": RESYNC_EVENT})
+                connected_before = True
+                delay = 1
+                await lost.wait()
+                logger.warning("Conexion LISTEN de eventos perdida, reconectando")
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning(f"No se pudo escuchar {EVENTS_CHANNEL}: {e}")
+            finally:
+                self._connection_changed(False)
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in list(self._subscriptions):
+            self.unsubscribe(subscription)
+
+
+def _listen_dsn() -> str:
+    # LISTEN necesita una sesion fija: con PgBouncer en modo transaction hay que
+    # apuntar EVENTS_DATABASE_URL directamente a Postgres
+    url = make_url(settings.EVENTS_DATABASE_URL or settings.DATABASE_URL).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+broadcaster = EventBroadcaster(_listen_dsn(), settings.EVENTS_QUEUE_SIZE)
+event_publisher = EventPublisher(settings.EVENTS_PUBLISH_INTERVAL_SECONDS)
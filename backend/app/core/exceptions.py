@@ -1,8 +1,14 @@
 from fastapi import HTTPException, status
+from typing import Optional
 
 
-def bad_request(detail: str = "Bad request") -> HTTPException:
-    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+def _error_code_headers(code: Optional[str]):
+    # Codigo estable para clientes (kioscos) que no deben depender del texto
+    return {"X-Error-Code": code} if code else None
+
+def bad_request(detail: str = "Bad request", code: Optional[str] = None) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail,
+                         headers=_error_code_headers(code))
 
 def unauthorized(detail: str = "Not authenticated") -> HTTPException:
     return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail,
@@ -14,8 +20,13 @@ def forbidden(detail: str = "Not authorized") -> HTTPException:
 def not_found(detail: str = "Resource not found") -> HTTPException:
     return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
 
-def conflict(detail: str = "Conflict") -> HTTPException:
-    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+def conflict(detail: str = "Conflict", code: Optional[str] = None) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail,
+                         headers=_error_code_headers(code))
+
+def service_unavailable(detail: str = "Service unavailable", retry_after: int = 1) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail,
+                         headers={"Retry-After": str(retry_after)})
 
 class DomainError(Exception):
     def __init__(self, message: str):
@@ -0,0 +1,91 @@
+"""Metricas Prometheus.
+
+Con varios workers de uvicorn cada proceso tiene sus propios contadores; si
+PROMETHEUS_MULTIPROC_DIR esta definido (antes de arrancar, y vacio) cada proceso
+escribe ahi sus valores y /metrics los agrega todos.
+"""
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Peticiones HTTP en curso",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Conexiones fijas del pool (sin overflow)",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Conexiones del pool en uso",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+CLOCK_EVENTS = Counter(
+    "clock_events_total",
+    "Fichajes aceptados (rate() para fichajes por minuto)",
+    ["record_type", "source"],
+)
+LOGIN_FAILURES = Counter(
+    "login_failures_total",
+    "Intentos de login fallidos",
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Hashes bcrypt en cola o en ejecucion",
+    multiprocess_mode="livesum",
+)
+
+EVENT_STREAM_SUBSCRIBERS = Gauge(
+    "event_stream_subscribers",
+    "Conexiones SSE abiertas en /events/stream",
+    multiprocess_mode="livesum",
+)
+
+
+def route_label(request) -> str:
+    # La plantilla de la ruta (/time-tracking/user/{user_id}), no la URL: limita la cardinalidad
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def instrument_engine(name: str, engine):
+    DB_POOL_SIZE.labels(engine=name).set(engine.pool.size())
+    checked_out = DB_POOL_CHECKED_OUT.labels(engine=name)
+    event.listen(engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(engine, "checkin", lambda *args: checked_out.dec())
+
+
+def metrics_payload() -> bytes:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead():
+    # Quita las gauges "livesum" de este worker al apagarse
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
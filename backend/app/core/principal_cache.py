@@ -0,0 +1,106 @@
+from collections import OrderedDict
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# update_user / delete_user notifican aqui el id del usuario cambiado
+PRINCIPALS_CHANNEL = "rrhh_principals"
+
+
+def notify_principal_changed(db: Session, user_id):
+    """Invalida el usuario en la cache de todos los workers al hacer commit."""
+    db.execute(select(func.pg_notify(PRINCIPALS_CHANNEL, str(user_id))))
+
+
+class PrincipalCache:
+    """LRU con TTL del usuario autenticado (id, rol, is_active), por proceso.
+
+    Los cambios llegan a todos los workers por LISTEN en PRINCIPALS_CHANNEL
+    (la conexion del EventBroadcaster). La cache solo se usa mientras esa
+    conexion esta viva: al perderla o recuperarla se vacia, porque se han
+    podido perder notificaciones.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Hasta que escucha las invalidaciones
+        self._enabled = False
+        # Sube con cada invalidacion: un set() con una version anterior puede
+        # traer un usuario leido antes del cambio y se descarta
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def version(self) -> int:
+        return self._version
+
+    def get(self, user_id):
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            if not self._enabled:
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, principal, version: int):
+        if self.ttl_seconds <= 0:
+            return
+        key = str(principal.id)
+        with self._lock:
+            if not self._enabled or version != self._version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+            self._version += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+
+    def set_enabled(self, enabled: bool):
+        with self._lock:
+            self._enabled = enabled
+            self._entries.clear()
+            self._version += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self._enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
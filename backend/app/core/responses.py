@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from app.core.config import settings
+
+
+def _default(value):
+    # Numeric de Postgres (saldos de vacaciones)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson serializa UUID, datetime y enums sin pasar por jsonable_encoder.
+    OPT_UTC_Z: las fechas UTC salen con "Z", igual que las serializa pydantic."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+def fast_response(payload):
+    """Con FAST_JSON_RESPONSES devuelve el payload ya serializado con orjson y
+    FastAPI no lo vuelve a validar contra el response_model: el payload tiene
+    que salir ya con la forma del schema (proyecciones SQL). Si no, lo devuelve
+    tal cual y se valida como siempre."""
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(payload)
+    return payload
@@ -1,17 +1,129 @@
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.exceptions import service_unavailable
+from app.core.metrics import PASSWORD_HASH_PENDING
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-MAX_BCRYPT_LENGTH = 72  
+MAX_BCRYPT_LENGTH = 72
 
-def verify_password(plain_password, hashed_password):
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password[:MAX_BCRYPT_LENGTH], hashed_password)
 
+def _hash(password: str) -> str:
+    return pwd_context.hash(password[:MAX_BCRYPT_LENGTH])
+
+
+class PasswordHasher:
+    """Ejecuta bcrypt en un pool de procesos acotado.
+
+    Cada hash son ~250 ms de CPU; en el threadpool de FastAPI un pico de logins
+    deja sin hilos (y sin GIL) al resto de endpoints. Si hay demasiados hashes
+    pendientes se responde 503 con Retry-After en vez de encolar sin limite.
+    """
+
+    def __init__(self, workers, max_pending: int, retry_after: int):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self):
+        # Se crea en el primer uso, ya dentro del worker de uvicorn
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise service_unavailable("Too many concurrent logins, try again later", self.retry_after)
+            self.pending += 1
+        PASSWORD_HASH_PENDING.inc()
+
+    def _release(self, start: float):
+        elapsed = time.perf_counter() - start
+        PASSWORD_HASH_PENDING.dec()
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    def run(self, fn, *args):
+        self._acquire()
+        start = time.perf_counter()
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._release(start)
+
+    async def run_async(self, fn, *args):
+        self._acquire()
+        start = time.perf_counter()
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._release(start)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": (self.total_seconds / self.completed * 1000) if self.completed else 0.0,
+                "max_ms": self.max_seconds * 1000,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER,
+)
+
+
+def verify_password(plain_password, hashed_password):
+    return password_hasher.run(_verify, plain_password, hashed_password)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await password_hasher.run_async(_verify, plain_password, hashed_password)
+
 def get_password_hash(password: str):
-    truncated_password = password[:MAX_BCRYPT_LENGTH]
-    return pwd_context.hash(truncated_password)
+    return password_hasher.run(_hash, password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
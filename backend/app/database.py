@@ -1,17 +1,186 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
+from contextvars import ContextVar
+from typing import Optional
 import os
+import threading
+import time
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
 
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
+# Misma base de datos, pero con el driver asyncpg para el stack async
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+
+class _PoolWaitStats:
+    """Tiempo que las peticiones pasan esperando una conexion libre del pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.waits += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "checkouts": self.waits,
+                "avg_wait_ms": (self.total_wait / self.waits * 1000) if self.waits else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    # Atributo de clase: sobrevive a pool.recreate() / engine.dispose()
+    wait_stats = _PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    wait_stats = _PoolWaitStats()
 
-engine = create_engine(DATABASE_URL)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
+
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+# psycopg2 nunca usa prepared statements del lado del servidor; asyncpg si,
+# y con PgBouncer en modo transaction cada sentencia puede caer en otro backend.
+ASYNC_CONNECT_ARGS = {}
+if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+    ASYNC_CONNECT_ARGS = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    connect_args=ASYNC_CONNECT_ARGS,
+    **POOL_OPTIONS,
+)
+# expire_on_commit=False: tras el commit no se puede hacer lazy load fuera del greenlet
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+class RequestDbStats:
+    """Sentencias SQL y tiempo en base de datos de una peticion."""
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# El middleware guarda aqui un objeto por peticion. Los endpoints sync corren en
+# el threadpool con una copia del contexto: ven el mismo objeto y lo modifican.
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def start_request_db_stats() -> RequestDbStats:
+    stats = RequestDbStats()
+    request_db_stats.set(stats)
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - context._query_start
+
+
+for _sync_engine in (engine, async_engine.sync_engine):
+    event.listen(_sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    db: AsyncSession = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_hot_db():
+    """Sesion de los endpoints calientes (login y fichaje): AsyncSession si
+    ASYNC_DB esta activo en el momento de la peticion, Session sync si no. El
+    endpoint mira el tipo y ejecuta el servicio sync en el threadpool."""
+    if settings.ASYNC_DB:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        # close() devuelve la conexion al pool con un ROLLBACK: fuera del event loop
+        await run_in_threadpool(db.close)
+
+
+def _pool_stats(pool):
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # overflow() arranca en -pool_size hasta que el pool se llena
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        **pool.wait_stats.as_dict(),
+    }
+
+
+def get_pool_stats():
+    return {
+        "sync": _pool_stats(engine.pool),
+        "async": _pool_stats(async_engine.sync_engine.pool),
+        "pgbouncer_transaction_mode": settings.DB_PGBOUNCER_TRANSACTION_MODE,
+    }
@@ -1,13 +1,56 @@
 from urllib.request import Request
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, user, time_tracking, time_off_request, time_adjustment, leave_balances
+from app.routers import auth, user, time_tracking, time_off_request, time_adjustment, leave_balances, internal, events
 from app.core.exceptions import DomainError
+from app.core.security import password_hasher
+from app.database import start_request_db_stats, engine, async_engine, SessionLocal
+from app.services.time_tracking import sync_clock_states
+from app.core import metrics
+from app.core.events import broadcaster, event_publisher
+from app.core.principal_cache import PRINCIPALS_CHANNEL, principal_cache
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
 import os 
 import logging
+import time
 
-app = FastAPI(title="RRHH API")
+
+def _rebuild_clock_states():
+    # Idempotente: con varios workers cada uno lo lanza y solo el primero escribe
+    db = SessionLocal()
+    try:
+        sync_clock_states(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.REBUILD_CLOCK_STATES_ON_STARTUP:
+        await run_in_threadpool(_rebuild_clock_states)
+    if settings.PRINCIPAL_CACHE_TTL_SECONDS > 0:
+        broadcaster.listen(PRINCIPALS_CHANNEL, principal_cache.invalidate, principal_cache.set_enabled)
+    yield
+    await run_in_threadpool(event_publisher.stop)
+    await broadcaster.stop()
+    password_hasher.shutdown()
+    metrics.mark_process_dead()
+
+
+app = FastAPI(
+    title="RRHH API",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse,
+)
+
+metrics.instrument_engine("sync", engine)
+metrics.instrument_engine("async", async_engine.sync_engine)
 
 FRONTEND_URL = os.getenv("FRONTEND_URL")
 
@@ -17,12 +60,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-DB-Queries", "X-Error-Code"],
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("rrhh_api")
 
 
+@app.middleware("http")
+async def instrumentation_middleware(request: Request, call_next):
+    stats = start_request_db_stats()
+    start = time.perf_counter()
+    metrics.REQUESTS_IN_PROGRESS.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.REQUESTS_IN_PROGRESS.dec()
+    elapsed = time.perf_counter() - start
+    total_ms = elapsed * 1000
+    metrics.REQUEST_LATENCY.labels(
+        method=request.method, route=metrics.route_label(request), status=response.status_code,
+    ).observe(elapsed)
+    db_ms = stats.seconds * 1000
+
+    # En respuestas streaming las consultas posteriores a las cabeceras no cuentan
+    response.headers["Server-Timing"] = f"db;dur={db_ms:.1f}, app;dur={total_ms:.1f}"
+    response.headers["X-DB-Queries"] = str(stats.queries)
+    logger.info(
+        f"{request.method} {request.url.path} {response.status_code} "
+        f"{total_ms:.1f}ms db_queries={stats.queries} db_ms={db_ms:.1f}"
+    )
+    return response
+
+
 @app.exception_handler(DomainError)
 async def domain_error_handler(request: Request, exc: DomainError):
 
@@ -42,9 +112,16 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
+
 app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(time_tracking.router)
 app.include_router(time_off_request.router)
 app.include_router(time_adjustment.router)
-app.include_router(leave_balances.router)
\ No newline at end of file
+app.include_router(leave_balances.router)
+app.include_router(internal.router)
+app.include_router(events.router)
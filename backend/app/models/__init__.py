@@ -6,3 +6,7 @@ from .time_off_request import TimeOffRequest
 from .leave_balance import LeaveBalance
 from .entity_abstract import EntityAbstract
 from .token import Token
+from .daily_hours import DailyHours
+from .clock_state import ClockState
+from .leave_accrual import LeaveAccrual
+from .time_tracking_archive import TimeTrackingArchive
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.types import Enum as PgEnum
+
+from app.models.entity_abstract import EntityAbstract
+from app.schemas.enum import RecordTypeEnum
+
+
+class ClockState(EntityAbstract):
+    """Ultimo fichaje de cada empleado. Es la fila que bloquea el INSERT ... ON
+    CONFLICT del fichaje, asi dos fichajes simultaneos del mismo empleado se
+    serializan en la base y el segundo ve el estado que dejo el primero."""
+    __tablename__ = "clock_states"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    record_type = Column(PgEnum(RecordTypeEnum, name="record_type_enum"), nullable=False)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    record_id = Column(UUID(as_uuid=True), nullable=False)
+
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("uq_clock_states_user_id", "user_id", unique=True),
+        # Tablero de presencia: solo los que estan dentro
+        Index(
+            "ix_clock_states_checked_in",
+            "timestamp",
+            postgresql_where=text("record_type = 'CHECK_IN'"),
+        ),
+    )
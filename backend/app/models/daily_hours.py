@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from app.models.entity_abstract import EntityAbstract
+
+
+class DailyHours(EntityAbstract):
+    """Horas trabajadas por empleado y dia (UTC). Se mantiene al fichar y al
+    aprobar ajustes; un turno que cruza la medianoche cuenta en el dia de entrada."""
+    __tablename__ = "daily_hours"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    hours_worked = Column(Float, nullable=False, default=0.0)
+
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("uq_daily_hours_user_day", "user_id", "day", unique=True),
+    )
@@ -8,7 +8,7 @@ Base = declarative_base()
 class EntityAbstract(Base):
     __abstract__ = True
 
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     create_date = Column(DateTime(timezone=True), server_default=func.now())
     update_date = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     delete_date = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Index
+from sqlalchemy.types import Enum as PgEnum
+
+from app.models.entity_abstract import EntityAbstract
+from app.schemas.enum import LeaveTypeEnum
+
+
+class LeaveAccrual(EntityAbstract):
+    """Registro de devengos mensuales ya aplicados a toda la plantilla.
+    La fila se inserta en la misma transaccion que el UPDATE de los saldos,
+    asi un mes no se puede devengar dos veces."""
+    __tablename__ = "leave_accruals"
+
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    leave_type = Column(PgEnum(LeaveTypeEnum, name="leave_balance_type_enum"), nullable=False)
+    employees = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("uq_leave_accruals_year_month_type", "year", "month", "leave_type", unique=True),
+    )
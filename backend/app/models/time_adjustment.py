@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Text, CheckConstraint
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Text, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.entity_abstract import EntityAbstract
@@ -8,7 +8,8 @@ from sqlalchemy.types import Enum as PgEnum
 class TimeAdjustment(EntityAbstract):
     __tablename__ = "time_adjustments"
     
-    time_record_id = Column(UUID(as_uuid=True), ForeignKey("time_tracking.id", ondelete="SET NULL"))
+    # Sin FK: time_tracking esta particionada y su clave es (id, timestamp)
+    time_record_id = Column(UUID(as_uuid=True))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     adjusted_timestamp = Column(DateTime(timezone=True))
     adjusted_type = Column(PgEnum(AdjustmentTypeEnum, name="adjusted_type_enum"), nullable=False)
@@ -28,3 +29,7 @@ class TimeAdjustment(EntityAbstract):
         foreign_keys=[reviewed_by]
     )
 
+    __table_args__ = (
+        Index("ix_time_adjustments_user_id", "user_id"),
+        Index("ix_time_adjustments_pending", "create_date", postgresql_where=text("status = 'PENDING'")),
+    )
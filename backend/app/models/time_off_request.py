@@ -1,5 +1,5 @@
 from app.schemas.enum import LeaveStatusEnum, LeaveTypeEnum
-from sqlalchemy import Column, String, Text, Date, ForeignKey, Numeric, CheckConstraint
+from sqlalchemy import Column, String, Text, Date, ForeignKey, Numeric, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.entity_abstract import EntityAbstract
@@ -30,3 +30,7 @@ class TimeOffRequest(EntityAbstract):
         foreign_keys=[reviewed_by]
     )
 
+    __table_args__ = (
+        Index("ix_time_off_requests_user_id", "user_id"),
+        Index("ix_time_off_requests_pending", "create_date", postgresql_where=text("status = 'PENDING'")),
+    )
@@ -1,19 +1,29 @@
-from sqlalchemy import Column,  Text, DateTime, ForeignKey
+from sqlalchemy import Column,  Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.entity_abstract import EntityAbstract
 from app.schemas.enum import RecordTypeEnum
 from sqlalchemy.types import Enum as PgEnum
+import uuid
 
 class TimeTracking(EntityAbstract):
     __tablename__ = "time_tracking"
 
+    # Particionada por mes de timestamp: la clave primaria tiene que incluirlo.
+    # Los INSERT de varias filas casan el RETURNING por id: el timestamp puede
+    # volver con otra zona horaria que la enviada
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, insert_sentinel=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     record_type = Column(PgEnum(RecordTypeEnum, name="record_type_enum"), nullable=False)
-    timestamp = Column(DateTime(timezone=True), nullable=False)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
     description = Column(Text, nullable=True)
     
     user = relationship("User", back_populates="time_records")
-    
-    
-    
\ No newline at end of file
+
+    __table_args__ = (
+        Index("ix_time_tracking_user_id_timestamp_id", user_id, timestamp.desc(), text("id DESC")),
+        Index("ix_time_tracking_timestamp_id", timestamp.desc(), text("id DESC")),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+    # La identidad en el ORM sigue siendo solo el id
+    __mapper_args__ = {"primary_key": ["id"]}
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Date, Index, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.entity_abstract import EntityAbstract
+
+
+class TimeTrackingArchive(EntityAbstract):
+    """Fichajes archivados en Parquet por mes y empleado. Se escribe en la misma
+    transaccion que quita el mes de time_tracking, asi los listados saben que
+    meses y ficheros leer (y su total) sin mirar el disco. Sin FK a users: el
+    fichero conserva los fichajes aunque se borre el empleado."""
+    __tablename__ = "time_tracking_archives"
+
+    month = Column(Date, nullable=False)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    records = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("uq_time_tracking_archives_month_user_id", "month", "user_id", unique=True),
+        Index("ix_time_tracking_archives_user_id", "user_id"),
+    )
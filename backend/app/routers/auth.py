@@ -1,25 +1,36 @@
 from fastapi import APIRouter, Depends
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_hot_db
 from app.core.security import create_access_token
 from app.schemas.auth import Token
 from app.services import user as crud_user
 from datetime import timedelta
 from app.core.config import settings
 from app.core.exceptions import  unauthorized
+from app.core.metrics import LOGIN_FAILURES
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud_user.authenticate_user(db, form_data.username, form_data.password)
-    if not user:
-        raise unauthorized("Incorrect username or password")
+def _issue_token(user):
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id), "role": user.role.name},
         expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.post("/login", response_model=Token)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession | Session = Depends(get_hot_db)):
+    if isinstance(db, AsyncSession):
+        user = await crud_user.authenticate_user_async(db, form_data.username, form_data.password)
+    else:
+        user = await run_in_threadpool(crud_user.authenticate_user, db, form_data.username, form_data.password)
+    if not user:
+        LOGIN_FAILURES.inc()
+        raise unauthorized("Incorrect username or password")
+    return _issue_token(user)
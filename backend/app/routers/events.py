@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from uuid import UUID
+import asyncio
+import json
+
+from app.core.config import settings
+from app.core.deps import get_current_user_for_stream
+from app.core.events import broadcaster
+from app.models.user import User
+from app.schemas.enum import UserRole, EventTypeEnum
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+async def _event_stream(request: Request, types: Optional[List[EventTypeEnum]], user_id: Optional[UUID]):
+    # Suscripcion al arrancar el stream: si el cliente se va antes, no queda una cola sin consumir
+    subscription = broadcaster.subscribe(types, user_id)
+    try:
+        # El navegador reintenta a los 3 s si se corta
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                # Comentario SSE: mantiene viva la conexion a traves de proxies
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                break
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    types: Optional[List[EventTypeEnum]] = Query(None, alias="type", description="Repetible; por defecto todos"),
+    user_id: Optional[UUID] = Query(None),
+    current_user: User = Depends(get_current_user_for_stream),
+):
+    """Server-Sent Events con los fichajes, solicitudes y revisiones que se van
+    confirmando. Un evento `resync` indica que se han podido perder eventos y
+    hay que recargar los listados."""
+    # Un empleado solo puede seguir sus propios eventos
+    if current_user.role.name != UserRole.RRHH:
+        user_id = current_user.id
+
+    return StreamingResponse(
+        _event_stream(request, types, user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
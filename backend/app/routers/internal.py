@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+from app.core.deps import require_rrhh
+from app.database import get_pool_stats
+from app.core.principal_cache import principal_cache
+from app.core.security import password_hasher
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/db-pool")
+def db_pool_stats(current_user = Depends(require_rrhh)):
+    return get_pool_stats()
+
+
+@router.get("/principal-cache")
+def principal_cache_stats(current_user = Depends(require_rrhh)):
+    return principal_cache.stats()
+
+
+@router.get("/password-hashing")
+def password_hashing_stats(current_user = Depends(require_rrhh)):
+    return password_hasher.stats()
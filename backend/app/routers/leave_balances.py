@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime
@@ -6,18 +6,26 @@ from datetime import datetime
 from app.database import get_db
 from app.models.user import User
 from app.services import leave_balance as crud
-from app.schemas.leave_balance import LeaveBalanceRead, LeaveBalanceCreate, LeaveBalanceUpdate
+from app.schemas.leave_balance import LeaveBalanceRead, LeaveBalanceCreate, LeaveBalanceUpdate, LeaveAccrualOut
 from app.core.deps import get_current_user
-from app.schemas.enum import UserRole
+from app.schemas.enum import UserRole, LeaveTypeEnum
+from app.core.etag import conditional_response, make_etag
 
 router = APIRouter(prefix="/leave_balances", tags=["Leave Balances"])
 
 @router.get("/me", response_model=LeaveBalanceRead)
 def get_my_balance(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     now = datetime.utcnow()
+    version = crud.get_user_balance_version(db, current_user.id, "VACATION", now.year)
+    if version is not None:
+        not_modified = conditional_response(request, response, make_etag("leave_balances/me", *version))
+        if not_modified:
+            return not_modified
     balance = crud.get_or_create_user_year_balance(
         db, current_user.id, leave_type="VACATION", year=now.year
     )
@@ -47,6 +55,19 @@ def create_leave_balance(
     return crud.create_balance(db, balance)
 
 
+@router.post("/accrue", response_model=LeaveAccrualOut)
+def accrue_monthly_bulk(
+    year: int = Query(..., description="Año, ej: 2025"),
+    month: int = Query(..., ge=1, le=12, description="Mes numérico, ej: 10"),
+    leave_type: LeaveTypeEnum = Query(LeaveTypeEnum.VACATION),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role.name != UserRole.RRHH.value:
+        raise HTTPException(status_code=403, detail="Only HR can accrue leave")
+    return crud.accrue_monthly_bulk(db, year, month, leave_type)
+
+
 @router.get("/{balance_id}", response_model=LeaveBalanceRead)
 def get_leave_balance(balance_id: UUID, db: Session = Depends(get_db)):
     balance_obj = crud.get_balance(db, balance_id)
@@ -11,11 +11,15 @@ from app.services.time_adjustment import (
     create_time_adjustment,
     get_adjustments_by_user,
     get_adjustment_by_id,
+    list_adjustments,
+    list_adjustment_rows,
     review_adjustment,
     TimeAdjustment
 )
 from app.schemas.enum import UserRole, AdjustmentStatusEnum
 from app.core.exceptions import bad_request, forbidden, not_found
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/time-adjustments", tags=["Time Adjustments"])
 
@@ -39,28 +43,11 @@ def get_adjustments(
     current_user: User = Depends(get_current_user)
 ):
     
-    query = db.query(TimeAdjustment)
-
-    if getattr(current_user.role, "name", None) != UserRole.RRHH.value:
-        query = query.filter(TimeAdjustment.user_id == current_user.id)
-
-    adjustments = query.offset(skip).limit(limit).all()
-
-    return [
-        TimeAdjustmentOut(
-            id=a.id,
-            user_id=a.user_id,
-            full_name=a.user.full_name if a.user else a.user_id,  
-            time_record_id=a.time_record_id,
-            status=a.status,
-            reviewed_by=a.reviewed_by,
-            review_comment=a.review_comment,
-            adjusted_timestamp=a.adjusted_timestamp,
-            adjusted_type=a.adjusted_type,
-            reason=a.reason,
-        )
-        for a in adjustments
-    ]
+    is_rrhh = getattr(current_user.role, "name", None) == UserRole.RRHH.value
+    user_id = None if is_rrhh else current_user.id
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(list_adjustment_rows(db, user_id, skip, limit))
+    return list_adjustments(db, user_id, skip, limit)
     
 @router.get("/{adjustment_id}", response_model=TimeAdjustmentOut)
 def get_adjustment(
@@ -1,92 +1,193 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from app.database import get_db
-from app.core.deps import get_current_user
+from app.database import get_db, get_hot_db
+from app.core.config import settings
+from app.core.deps import get_current_user, get_current_user_hot
 from app.models.user import User
-from app.schemas.time_tracking import TimeTrackingCreate, TimeTrackingOut, TimeTrackingSearchOut, PaginatedTimeTrackingSearchOut
+from app.schemas.time_tracking import TimeTrackingCreate, TimeTrackingOut, TimeTrackingSearchOut, PaginatedTimeTrackingSearchOut, UserHoursReportOut, TimeTrackingBatchIn, TimeTrackingBatchOut, PresenceOut
 from app.services import time_tracking
-from app.schemas.enum import UserRole
+from app.schemas.enum import UserRole, ExportFormatEnum, HoursEngineEnum, RecordTypeEnum
 from app.core.exceptions import forbidden, bad_request, DomainError
+from app.core.responses import fast_response
+from app.core.etag import conditional_response, make_etag
 
 router = APIRouter(prefix="/time-tracking", tags=["Time Tracking"])
 
 @router.post("/", response_model=TimeTrackingOut)
-def create_time_record(
+async def create_time_record(
     record: TimeTrackingCreate,
+    db: AsyncSession | Session = Depends(get_hot_db),
+    current_user: User = Depends(get_current_user_hot),
+):
+    if isinstance(db, AsyncSession):
+        return await time_tracking.create_time_record_async(db, user_id=current_user.id, record=record)
+    return await run_in_threadpool(time_tracking.create_time_record, db, current_user.id, record)
+
+@router.post("/batch", response_model=TimeTrackingBatchOut)
+def create_time_records_batch(
+    batch: TimeTrackingBatchIn,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    new_record = time_tracking.create_time_record(db, user_id=current_user.id, record=record)
-    return new_record
+    # Solo RRHH (la cuenta del kiosco) puede fichar por otros empleados
+    other_users = any(e.user_id not in (None, current_user.id) for e in batch.events)
+    if other_users and current_user.role.name != UserRole.RRHH:
+        raise forbidden("Not authorized")
+
+    return time_tracking.create_time_records_batch(db, current_user.id, batch.events)
 
 @router.get("/", response_model=PaginatedTimeTrackingSearchOut)
 def get_time_records(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     limit: int = Query(10, ge=1, le=100),  
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor de la pagina anterior; ignora offset"),
+    exact_total: bool = Query(True, description="False devuelve el total estimado por Postgres"),
+    include_archived: bool = Query(True, description="Seguir por los meses archivados al acabar la tabla"),
 ):
-    return time_tracking.get_time_records_by_user_with_user_info(
+    return fast_response(time_tracking.get_time_records_by_user_with_user_info(
         db=db,
         user_id=current_user.id,
         limit=limit,
-        offset=offset
-    )
+        offset=offset,
+        cursor=cursor,
+        exact_total=exact_total,
+        include_archived=include_archived,
+    ))
 
 @router.get("/user/{user_id}",response_model=PaginatedTimeTrackingSearchOut)
 def get_time_records_by_user(
     user_id: UUID,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    exact_total: bool = Query(True),
+    include_archived: bool = Query(True),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     if current_user.role.name != UserRole.RRHH:
         raise forbidden("Solo RRHH puede acceder a esta informacion")
 
-    return time_tracking.get_time_records_by_user_with_user_info(db, user_id=user_id)
+    return fast_response(time_tracking.get_time_records_by_user_with_user_info(
+        db,
+        user_id=user_id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        exact_total=exact_total,
+        include_archived=include_archived,
+    ))
 
-@router.get("/search", response_model=List[TimeTrackingSearchOut])
+@router.get("/search", response_model=PaginatedTimeTrackingSearchOut)
 def search_time_records(
     user_id: Optional[UUID] = Query(None),
     user_full_name: Optional[str] = Query(None),
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    exact_total: bool = Query(True),
+    include_archived: bool = Query(True),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     if current_user.role.name != UserRole.RRHH:
         raise forbidden("Not authorized")
 
-    return time_tracking.search_time_records_with_user_info(
+    return fast_response(time_tracking.search_time_records_with_user_info(
         db=db,
         user_id=user_id,
         user_full_name=user_full_name,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        exact_total=exact_total,
+        include_archived=include_archived,
+    ))
+
+@router.get("/presence", response_model=PresenceOut)
+def presence(
+    state: RecordTypeEnum = Query(RecordTypeEnum.CHECK_IN, description="Empleados listados: CHECK_IN = dentro ahora"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role.name != UserRole.RRHH:
+        raise forbidden("Not authorized")
+
+    return time_tracking.get_presence(db, state)
+
+@router.get("/export")
+def export_time_records(
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.CSV, alias="format"),
+    start: Optional[date] = Query(None, description="Primer dia incluido, ej: 2025-01-01"),
+    end: Optional[date] = Query(None, description="Ultimo dia incluido, ej: 2025-12-31"),
+    user_id: Optional[UUID] = Query(None),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role.name != UserRole.RRHH:
+        raise forbidden("Not authorized")
+    if start and end and start > end:
+        raise bad_request("Start date cannot be after end date")
+
+    start_dt = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc) if start else None
+    end_dt = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc) if end else None
+
+    media_type = "text/csv" if export_format == ExportFormatEnum.CSV else "application/x-ndjson"
+    filename = f"time_records.{export_format.value}"
+    return StreamingResponse(
+        time_tracking.stream_time_records_export(export_format, start_dt, end_dt, user_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 @router.get("/weekly")
 def weekly_hours(
+    request: Request,
+    response: Response,
     week_start: date = Query(..., description="Inicio de la semana, ej: 2025-10-06"),
+    engine: Optional[HoursEngineEnum] = Query(None, description="Motor de calculo; por defecto el de la configuracion"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    engine = engine or HoursEngineEnum(settings.HOURS_ENGINE)
+    version = time_tracking.get_hours_version(db, current_user.id, week_start, week_start + timedelta(days=6))
+    etag = make_etag("time-tracking/weekly", current_user.id, week_start, engine.value, *version)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
     week_start_dt = datetime.combine(week_start, datetime.min.time(), tzinfo=timezone.utc)
-    return time_tracking.get_weekly_hours(db, current_user.id, week_start_dt)
+    return time_tracking.get_weekly_hours(db, current_user.id, week_start_dt, engine)
 
 @router.get("/monthly")
 def monthly_hours(
     year: int = Query(..., description="Año, ej: 2025"),
     month: int = Query(..., description="Mes numérico, ej: 10"),
+    engine: Optional[HoursEngineEnum] = Query(None, description="Motor de calculo; por defecto el de la configuracion"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        return time_tracking.get_monthly_hours(db, current_user.id, year, month)
+        return time_tracking.get_monthly_hours(db, current_user.id, year, month, engine)
     except DomainError as e:
         raise bad_request(e.message)
+
+@router.get("/report/monthly", response_model=List[UserHoursReportOut])
+def monthly_hours_report(
+    year: int = Query(..., description="Año, ej: 2025"),
+    month: int = Query(..., ge=1, le=12, description="Mes numérico, ej: 10"),
+    engine: Optional[HoursEngineEnum] = Query(None, description="Motor de calculo; por defecto el de la configuracion"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role.name != UserRole.RRHH:
+        raise forbidden("Not authorized")
+
+    return time_tracking.get_company_monthly_hours(db, year, month, engine)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Request, Response
 from sqlalchemy.orm import Session
 
 from app.database import get_db
@@ -8,6 +8,9 @@ from app.schemas.user import UserOut, UserUpdate, UserCreate
 from app.services import user as crud_user
 from app.core.exceptions import not_found, bad_request
 from app.schemas.enum import UserRole
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.core.etag import conditional_response, make_etag
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -26,11 +29,23 @@ def create_user_endpoint(
 
 @router.get("/", response_model=list[UserOut])
 def get_all_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(crud_user.get_all_users_rows(db))
     return crud_user.get_all_users_out(db)
 
 @router.get("/me", response_model=UserOut)
-def get_current_user_endpoint(current_user: User = Depends(get_current_user)):
-    return crud_user.to_user_out(current_user)
+def get_current_user_endpoint(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    version = crud_user.get_user_out_version(db, current_user.id)
+    if version is not None:
+        not_modified = conditional_response(request, response, make_etag("users/me", current_user.id, *version))
+        if not_modified:
+            return not_modified
+    return crud_user.get_user_out_by_id(db, current_user.id)
 
 @router.get("/{user_id}", response_model=UserOut)
 def get_user(user_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
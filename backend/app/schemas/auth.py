@@ -1,4 +1,6 @@
 from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
 
 class Token(BaseModel):
     access_token: str
@@ -6,4 +8,14 @@ class Token(BaseModel):
 
 class LoginRequest(BaseModel):
     email: str
-    password: str
\ No newline at end of file
+    password: str
+
+
+class PrincipalRole(BaseModel):
+    name: str
+
+class Principal(BaseModel):
+    """Lo minimo del usuario autenticado que necesitan los endpoints."""
+    id: UUID
+    is_active: bool
+    role: Optional[PrincipalRole] = None
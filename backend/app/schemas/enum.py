@@ -28,3 +28,27 @@ class LeaveStatusEnum(str, Enum):
     PENDING = "PENDING"
     APPROVED = "APPROVED"
     REJECTED = "REJECTED"
+
+class ExportFormatEnum(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class HoursEngineEnum(str, Enum):
+    ROLLUP = "rollup"   # SUM sobre daily_hours
+    PYTHON = "python"   # calculate_hours_worked por empleado
+    SQL = "sql"         # LAG() en Postgres
+    NUMPY = "numpy"     # motor vectorizado por lotes
+
+class ClockErrorCodeEnum(str, Enum):
+    TOO_SOON = "CLOCK_TOO_SOON"          # menos de MIN_TIME_BETWEEN_RECORDS
+    SAME_TYPE = "CLOCK_SAME_TYPE"        # dos entradas o dos salidas seguidas
+    OUT_OF_ORDER = "CLOCK_OUT_OF_ORDER"  # anterior al ultimo fichaje (batch)
+    FUTURE = "CLOCK_FUTURE"              # hora del kiosco en el futuro (batch)
+    UNKNOWN_USER = "CLOCK_UNKNOWN_USER"  # empleado inexistente o inactivo (batch)
+
+class EventTypeEnum(str, Enum):
+    CLOCK = "clock"
+    TIME_OFF_REQUESTED = "time_off_requested"
+    TIME_OFF_REVIEWED = "time_off_reviewed"
+    ADJUSTMENT_REQUESTED = "adjustment_requested"
+    ADJUSTMENT_REVIEWED = "adjustment_reviewed"
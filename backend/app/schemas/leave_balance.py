@@ -20,3 +20,12 @@ class LeaveBalanceRead(LeaveBalanceBase):
 
 class LeaveBalanceUpdate(BaseModel):
     remaining_days: Optional[float]
+
+
+class LeaveAccrualOut(BaseModel):
+    year: int
+    month: int
+    leave_type: LeaveTypeEnum
+    applied: bool  # False si el mes ya estaba devengado
+    employees: int
+    created_balances: int
@@ -1,8 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from uuid import UUID
 
+from app.schemas.enum import RecordTypeEnum, ClockErrorCodeEnum
+
+# Eventos por peticion del endpoint batch de los kioscos
+BATCH_MAX_EVENTS = 1000
+
 class TimeTrackingBase(BaseModel):
     record_type: str 
     description: Optional[str] = None 
@@ -39,7 +44,58 @@ class TimeTrackingSearchOut(BaseModel):
         
 class PaginatedTimeTrackingSearchOut(BaseModel):
     total: int
+    total_is_estimate: bool = False
     count: int
     limit: int
     offset: int
-    results: List[TimeTrackingSearchOut]
\ No newline at end of file
+    next_cursor: Optional[str] = None
+    results: List[TimeTrackingSearchOut]
+
+
+class UserHoursReportOut(BaseModel):
+    user_id: UUID
+    full_name: Optional[str] = None
+    hours_worked: float
+    monthly_limit: float
+    over_limit: float
+
+
+class TimeTrackingBatchEvent(BaseModel):
+    record_type: RecordTypeEnum
+    timestamp: datetime  # hora del dispositivo cuando se ficho
+    description: Optional[str] = None
+    # Si no se indica, el fichaje es del usuario autenticado
+    user_id: Optional[UUID] = None
+
+
+class TimeTrackingBatchIn(BaseModel):
+    events: List[TimeTrackingBatchEvent] = Field(..., min_length=1, max_length=BATCH_MAX_EVENTS)
+
+
+class TimeTrackingBatchResult(BaseModel):
+    index: int
+    accepted: bool
+    id: Optional[UUID] = None
+    error_code: Optional[ClockErrorCodeEnum] = None
+    error: Optional[str] = None
+
+
+class TimeTrackingBatchOut(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[TimeTrackingBatchResult]
+
+
+class PresenceUserOut(BaseModel):
+    user_id: UUID
+    full_name: Optional[str] = None
+    state: RecordTypeEnum
+    since: datetime
+
+
+class PresenceOut(BaseModel):
+    as_of: datetime
+    on_shift: int
+    off_shift: int
+    never_clocked: int
+    users: List[PresenceUserOut]
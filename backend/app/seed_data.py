@@ -8,6 +8,7 @@ from app.models.time_tracking import TimeTracking
 from app.models.time_off_request import TimeOffRequest
 from app.models.leave_balance import LeaveBalance
 from app.models.time_adjustment import TimeAdjustment
+from app.services.time_tracking import rebuild_daily_hours, sync_clock_states
 from passlib.hash import bcrypt
 from datetime import datetime, date
 from decimal import Decimal
@@ -126,6 +127,9 @@ def seed_data():
             TimeTracking(user_id=juan.id, record_type=RecordTypeEnum.CHECK_OUT, timestamp=base_day.replace(hour=15, minute=45)),
         ])
         db.commit()
+        rebuild_daily_hours(db, base_day.date(), base_day.date())
+        sync_clock_states(db)
+        db.commit()
 
         db.add_all([
             TimeOffRequest(
@@ -0,0 +1,255 @@
+"""Archivo en frio de fichajes: un Parquet (zstd) por mes UTC en ARCHIVE_DIR.
+
+Solo se archivan meses cerrados. El fichero se escribe, se comprueba y luego se
+quita el mes de time_tracking (DETACH + DROP de su particion), todo con la
+particion bloqueada contra escrituras. Si algo falla despues de escribir, el
+fichero tiene filas que siguen en la tabla y la siguiente ejecucion las fusiona.
+
+Los ficheros van ordenados por (user_id, timestamp): las estadisticas de cada
+row group permiten a los filtros por empleado saltarse casi todo el fichero.
+daily_hours no se toca, asi que las horas (motor rollup) siguen saliendo igual.
+
+time_tracking_archives guarda cuantos fichajes tiene cada empleado en cada mes
+archivado. Los listados sacan de ahi el total y los meses que hay que abrir: un
+fichero solo se lee cuando la pagina llega a los meses archivados.
+"""
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+from uuid import UUID
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import DomainError
+from app.models import TimeTracking, TimeTrackingArchive
+from app.services import partitions
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("user_id", pa.string()),
+    ("record_type", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("description", pa.string()),
+    ("create_date", pa.timestamp("us", tz="UTC")),
+    ("update_date", pa.timestamp("us", tz="UTC")),
+])
+ROW_GROUP_SIZE = 50_000
+COMPRESSION = "zstd"
+
+
+def archive_path(month: date) -> Path:
+    return Path(settings.ARCHIVE_DIR) / "time_tracking" / f"{month:%Y}" / f"time_tracking_{month:%Y%m}.parquet"
+
+
+def archived_months(db: Session) -> list[date]:
+    """Meses archivados, del mas reciente al mas antiguo."""
+    return [month for (month,) in
+            db.query(TimeTrackingArchive.month).distinct().order_by(TimeTrackingArchive.month.desc()).all()]
+
+
+def _month_range(month: date) -> tuple[datetime, datetime]:
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    end_month = partitions.add_months(month, 1)
+    return start, datetime(end_month.year, end_month.month, 1, tzinfo=timezone.utc)
+
+
+def _hot_rows(db: Session, source: str, month: date) -> pa.Table:
+    start, end = _month_range(month)
+    rows = db.execute(
+        text(f"SELECT {', '.join(ARCHIVE_SCHEMA.names)} FROM {source} WHERE timestamp >= :start AND timestamp < :end"),
+        {"start": start, "end": end},
+    ).all()
+    columns = list(zip(*rows)) if rows else [()] * len(ARCHIVE_SCHEMA)
+    return pa.table({
+        "id": pa.array([str(v) for v in columns[0]], pa.string()),
+        "user_id": pa.array([str(v) for v in columns[1]], pa.string()),
+        "record_type": pa.array([getattr(v, "value", v) for v in columns[2]], pa.string()),
+        "timestamp": pa.array(columns[3], ARCHIVE_SCHEMA.field("timestamp").type),
+        "description": pa.array(columns[4], pa.string()),
+        "create_date": pa.array(columns[5], ARCHIVE_SCHEMA.field("create_date").type),
+        "update_date": pa.array(columns[6], ARCHIVE_SCHEMA.field("update_date").type),
+    }, schema=ARCHIVE_SCHEMA)
+
+
+def _write(path: Path, table: pa.Table):
+    # Escritura atomica: nunca queda a medias un fichero con el nombre final
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".parquet.tmp")
+    table = table.sort_by([("user_id", "ascending"), ("timestamp", "ascending"), ("id", "ascending")])
+    pq.write_table(table, tmp, compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+    if pq.read_metadata(tmp).num_rows != table.num_rows:
+        tmp.unlink()
+        raise DomainError(f"El fichero de {path.name} no tiene todas las filas")
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _record_counts(db: Session, month: date, table: pa.Table):
+    counts = pc.value_counts(table["user_id"])
+    db.query(TimeTrackingArchive).filter(TimeTrackingArchive.month == month).delete(synchronize_session=False)
+    db.execute(pg_insert(TimeTrackingArchive), [
+        {"month": month, "user_id": UUID(item["values"].as_py()), "records": item["counts"].as_py()}
+        for item in counts
+    ])
+
+
+def archive_month(db: Session, month: date) -> dict:
+    """Pasa un mes cerrado de time_tracking a su Parquet. Idempotente."""
+    month = partitions.month_start(month)
+    if month >= partitions.current_month():
+        raise DomainError(f"{month:%Y-%m} no esta cerrado")
+
+    partition = partitions.partition_name(month)
+    attached = any(p["name"] == partition for p in partitions.list_partitions(db))
+    # Tambien puede ser una particion ya desadjuntada con manage_partitions
+    has_table = db.execute(text("SELECT to_regclass(:name)"), {"name": partition}).scalar() is not None
+    if has_table:
+        # Nadie escribe en el mes mientras se copia; las lecturas siguen
+        db.execute(text(f"LOCK TABLE {partition} IN SHARE MODE"))
+
+    table = _hot_rows(db, partition if has_table else partitions.PARTITIONED_TABLE, month)
+    path = archive_path(month)
+    if path.exists():
+        # Filas que llegaron al mes despues de archivarlo (o un intento a medias)
+        existing = pq.read_table(path, schema=ARCHIVE_SCHEMA)
+        keep = pc.invert(pc.is_in(existing["id"], value_set=table["id"]))
+        table = pa.concat_tables([existing.filter(keep), table])
+    if table.num_rows == 0:
+        db.rollback()
+        return {"month": month, "rows": 0, "path": None}
+
+    _write(path, table)
+    _record_counts(db, month, table)
+
+    if has_table:
+        if attached:
+            db.execute(text(f"ALTER TABLE {partitions.PARTITIONED_TABLE} DETACH PARTITION {partition}"))
+        db.execute(text(f"DROP TABLE {partition}"))
+    else:
+        start, end = _month_range(month)
+        db.query(TimeTracking).filter(
+            TimeTracking.timestamp >= start, TimeTracking.timestamp < end,
+        ).delete(synchronize_session=False)
+    db.commit()
+    return {"month": month, "rows": table.num_rows, "path": str(path)}
+
+
+def _filters(start: Optional[datetime], end: Optional[datetime], user_ids: Optional[list[UUID]]):
+    filters = []
+    if start is not None:
+        filters.append(("timestamp", ">=", pa.scalar(start, ARCHIVE_SCHEMA.field("timestamp").type)))
+    if end is not None:
+        filters.append(("timestamp", "<", pa.scalar(end, ARCHIVE_SCHEMA.field("timestamp").type)))
+    if user_ids is not None:
+        # Un "in" vacio no es valido en pyarrow: quien llama corta antes
+        filters.append(("user_id", "in", [str(u) for u in user_ids]))
+    return filters or None
+
+
+def _month_counts(db: Session, user_ids: Optional[list[UUID]]) -> list[tuple[date, int]]:
+    """(mes, fichajes) de los meses archivados con fichajes de esos empleados
+    (None = todos), del mas reciente al mas antiguo."""
+    query = db.query(TimeTrackingArchive.month, func.sum(TimeTrackingArchive.records))
+    if user_ids is not None:
+        query = query.filter(TimeTrackingArchive.user_id.in_(user_ids))
+    rows = query.group_by(TimeTrackingArchive.month).order_by(TimeTrackingArchive.month.desc()).all()
+    return [(month, int(records)) for month, records in rows]
+
+
+def _months_in_range(db: Session, start: Optional[datetime], end: Optional[datetime], user_ids=None) -> list[date]:
+    """Solo los ficheros que pueden tener filas en [start, end)."""
+    first = partitions.month_start(start.astimezone(timezone.utc).date()) if start else None
+    months = []
+    for month, _ in _month_counts(db, user_ids):
+        if (first is None or month >= first) and (end is None or _month_range(month)[0] < end):
+            months.append(month)
+    return months
+
+
+def _read_month(month: date, start=None, end=None, user_ids=None) -> pa.Table:
+    table = pq.read_table(archive_path(month), schema=ARCHIVE_SCHEMA, filters=_filters(start, end, user_ids))
+    return table.sort_by([("timestamp", "descending"), ("id", "descending")])
+
+
+def _to_records(table: pa.Table) -> list[dict]:
+    records = table.to_pylist()
+    for record in records:
+        record["id"] = UUID(record["id"])
+        record["user_id"] = UUID(record["user_id"])
+    return records
+
+
+def count_records(db: Session, user_ids: Optional[list[UUID]] = None) -> int:
+    if user_ids == []:
+        return 0
+    return sum(records for _, records in _month_counts(db, user_ids))
+
+
+def read_page(
+    db: Session,
+    user_ids: Optional[list[UUID]],
+    before: Optional[tuple[datetime, UUID]],
+    skip: int,
+    limit: int,
+) -> list[dict]:
+    """Fichajes archivados en orden (timestamp, id) descendente, despues del
+    cursor `before`; abre solo los meses con fichajes de esos empleados, del mas
+    reciente atras."""
+    if user_ids == []:
+        return []
+    end = None
+    if before is not None:
+        ts, record_id = before
+        ts = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+        # Incluye el propio timestamp; el desempate por id se hace abajo
+        end = ts + timedelta(microseconds=1)
+    records = []
+    for month, month_records in _month_counts(db, user_ids):
+        if end is not None and _month_range(month)[0] >= end:
+            continue
+        if before is None and skip >= month_records:
+            # Con offset se salta el mes entero sin abrir el fichero
+            skip -= month_records
+            continue
+        table = _read_month(month, end=end, user_ids=user_ids)
+        if before is not None:
+            # Texto canonico de UUID: ordena igual que el uuid de Postgres
+            older = pc.or_(
+                pc.less(table["timestamp"], pa.scalar(ts, table.schema.field("timestamp").type)),
+                pc.and_(
+                    pc.equal(table["timestamp"], pa.scalar(ts, table.schema.field("timestamp").type)),
+                    pc.less(table["id"], str(record_id)),
+                ),
+            )
+            table = table.filter(older)
+        if skip >= table.num_rows:
+            skip -= table.num_rows
+            continue
+        records += _to_records(table.slice(skip, limit - len(records)))
+        skip = 0
+        if len(records) >= limit:
+            break
+    return records
+
+
+def iter_records(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[UUID] = None,
+    batch_size: int = 1000,
+) -> Iterator[list[dict]]:
+    """Para el export: lotes en orden descendente, un fichero cada vez en memoria."""
+    user_ids = [user_id] if user_id is not None else None
+    for month in _months_in_range(db, start, end, user_ids):
+        table = _read_month(month, start, end, user_ids)
+        for offset in range(0, table.num_rows, batch_size):
+            yield _to_records(table.slice(offset, batch_size))
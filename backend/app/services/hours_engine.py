@@ -0,0 +1,132 @@
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.orm import Session
+from uuid import UUID
+from datetime import datetime
+from typing import Optional, Iterable
+
+import numpy as np
+
+from app.models import TimeTracking, TimeAdjustment
+from app.schemas.enum import AdjustmentStatusEnum, AdjustmentTypeEnum, RecordTypeEnum
+
+
+CHECK_IN_ADJUSTMENTS = [AdjustmentTypeEnum.ENTRY_CORRECTION, AdjustmentTypeEnum.MANUAL_ENTRY]
+CHECK_OUT_ADJUSTMENTS = [AdjustmentTypeEnum.EXIT_CORRECTION]
+
+
+def hours_by_user(user_codes: np.ndarray, epoch_seconds: np.ndarray, is_check_in: np.ndarray, n_users: int) -> np.ndarray:
+    """Version vectorizada de calculate_hours_worked para muchos empleados a la vez.
+
+    En calculate_hours_worked una salida solo suma si el registro anterior del
+    mismo empleado es una entrada (una entrada repetida pisa a la anterior y una
+    salida deja el estado vacio). Asi que basta con ordenar por (empleado,
+    timestamp) y emparejar cada salida con el registro inmediatamente anterior.
+    El orden original desempata timestamps iguales, como hace sorted().
+    """
+    if len(user_codes) == 0:
+        return np.zeros(n_users)
+
+    order = np.lexsort((np.arange(len(user_codes)), epoch_seconds, user_codes))
+    users = user_codes[order]
+    seconds = epoch_seconds[order]
+    check_in = is_check_in[order]
+
+    closes_shift = (~check_in[1:]) & check_in[:-1] & (users[1:] == users[:-1])
+    worked = (seconds[1:] - seconds[:-1])[closes_shift]
+    return np.bincount(users[1:][closes_shift], weights=worked, minlength=n_users) / 3600
+
+
+def batch_hours_worked(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    user_ids: Optional[Iterable[UUID]] = None,
+) -> dict:
+    """Horas por empleado en [start, end), con los ajustes aprobados del periodo,
+    igual que calculate_hours_worked pero en una sola pasada para todos."""
+    user_ids = list(user_ids) if user_ids is not None else None
+
+    records = db.query(
+        TimeTracking.user_id,
+        func.extract("epoch", TimeTracking.timestamp),
+        TimeTracking.record_type == RecordTypeEnum.CHECK_IN,
+    ).filter(TimeTracking.timestamp >= start, TimeTracking.timestamp < end)
+
+    adjustments = db.query(
+        TimeAdjustment.user_id,
+        func.extract("epoch", TimeAdjustment.adjusted_timestamp),
+        case((TimeAdjustment.adjusted_type.in_(CHECK_IN_ADJUSTMENTS), True), else_=False),
+    ).filter(
+        TimeAdjustment.status == AdjustmentStatusEnum.APPROVED,
+        TimeAdjustment.adjusted_type.in_(CHECK_IN_ADJUSTMENTS + CHECK_OUT_ADJUSTMENTS),
+        TimeAdjustment.adjusted_timestamp >= start,
+        TimeAdjustment.adjusted_timestamp < end,
+    )
+
+    if user_ids is not None:
+        records = records.filter(TimeTracking.user_id.in_(user_ids))
+        adjustments = adjustments.filter(TimeAdjustment.user_id.in_(user_ids))
+
+    # Los ajustes van despues de los registros, como en calculate_hours_worked
+    rows = records.all() + adjustments.all()
+
+    codes = {uid: i for i, uid in enumerate(user_ids)} if user_ids is not None else {}
+    user_codes = np.fromiter((codes.setdefault(uid, len(codes)) for uid, _, _ in rows), dtype=np.int64, count=len(rows))
+    epoch_seconds = np.fromiter((float(ts) for _, ts, _ in rows), dtype=np.float64, count=len(rows))
+    is_check_in = np.fromiter((bool(flag) for _, _, flag in rows), dtype=bool, count=len(rows))
+
+    hours = hours_by_user(user_codes, epoch_seconds, is_check_in, len(codes))
+    return {uid: float(hours[i]) for uid, i in codes.items()}
+
+
+def sql_hours_worked(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    user_ids: Optional[Iterable[UUID]] = None,
+) -> dict:
+    """Mismo calculo que batch_hours_worked, pero dentro de Postgres: LAG() sobre
+    (user_id ORDER BY timestamp) empareja cada salida con el registro anterior y
+    solo viajan los totales por empleado."""
+    user_ids = list(user_ids) if user_ids is not None else None
+
+    records = select(
+        TimeTracking.user_id.label("user_id"),
+        TimeTracking.timestamp.label("ts"),
+        (TimeTracking.record_type == RecordTypeEnum.CHECK_IN).label("is_check_in"),
+        literal(0).label("source"),
+    ).where(TimeTracking.timestamp >= start, TimeTracking.timestamp < end)
+
+    adjustments = select(
+        TimeAdjustment.user_id.label("user_id"),
+        TimeAdjustment.adjusted_timestamp.label("ts"),
+        case((TimeAdjustment.adjusted_type.in_(CHECK_IN_ADJUSTMENTS), True), else_=False).label("is_check_in"),
+        literal(1).label("source"),
+    ).where(
+        TimeAdjustment.status == AdjustmentStatusEnum.APPROVED,
+        TimeAdjustment.adjusted_type.in_(CHECK_IN_ADJUSTMENTS + CHECK_OUT_ADJUSTMENTS),
+        TimeAdjustment.adjusted_timestamp >= start,
+        TimeAdjustment.adjusted_timestamp < end,
+    )
+
+    if user_ids is not None:
+        records = records.where(TimeTracking.user_id.in_(user_ids))
+        adjustments = adjustments.where(TimeAdjustment.user_id.in_(user_ids))
+
+    events = union_all(records, adjustments).subquery("events")
+    # source desempata como calculate_hours_worked: ajustes despues de registros
+    window = {"partition_by": events.c.user_id, "order_by": (events.c.ts, events.c.source)}
+    paired = select(
+        events.c.user_id,
+        events.c.ts,
+        events.c.is_check_in,
+        func.lag(events.c.ts).over(**window).label("prev_ts"),
+        func.lag(events.c.is_check_in).over(**window).label("prev_is_check_in"),
+    ).subquery("paired")
+
+    totals = (
+        select(paired.c.user_id, func.sum(func.extract("epoch", paired.c.ts - paired.c.prev_ts)) / 3600)
+        .where(paired.c.is_check_in.is_(False), paired.c.prev_is_check_in.is_(True))
+        .group_by(paired.c.user_id)
+    )
+    return {user_id: float(hours) for user_id, hours in db.execute(totals).all()}
@@ -1,10 +1,14 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
 from typing import Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 from decimal import Decimal
 
 from app.models.leave_balance import LeaveBalance
+from app.models.leave_accrual import LeaveAccrual
+from app.models.user import User
 from app.core.exceptions import bad_request
 
 FULL_TIME_WEEKLY_HOURS = 40.0
@@ -24,6 +28,12 @@ def _accrual_days_for_month(weekly_hours: Optional[float]) -> float:
     return VACATION_DAYS_PER_FULLTIME_MONTH * ratio
 
 
+def _accrual_days_expr(weekly_hours):
+    # _accrual_days_for_month en SQL, para el devengo masivo
+    hours = case((weekly_hours > 0, weekly_hours), else_=FULL_TIME_WEEKLY_HOURS)
+    return (literal(VACATION_DAYS_PER_FULLTIME_MONTH) * hours / FULL_TIME_WEEKLY_HOURS).cast(LeaveBalance.remaining_days.type)
+
+
 def get_balance(db: Session, balance_id: UUID) -> Optional[LeaveBalance]:
     return db.query(LeaveBalance).filter(LeaveBalance.id == balance_id).first()
 
@@ -40,8 +50,20 @@ def get_user_balance(db: Session, user_id: UUID, leave_type: str, year: int) ->
     )
 
 
+def get_user_balance_version(db: Session, user_id: UUID, leave_type: str, year: int):
+    return (
+        db.query(LeaveBalance.id, LeaveBalance.update_date)
+        .filter(
+            LeaveBalance.user_id == user_id,
+            LeaveBalance.leave_type == leave_type,
+            LeaveBalance.year == year,
+        )
+        .first()
+    )
+
+
 def list_balances(db: Session):
-    balances = db.query(LeaveBalance).all()
+    balances = db.query(LeaveBalance).options(joinedload(LeaveBalance.user).load_only(User.full_name)).all()
     for b in balances:
         b.user_name = b.user.full_name
     return balances
@@ -148,3 +170,72 @@ def deduct_days(db: Session, user_id: UUID, leave_type: str, days_taken: float):
     db.commit()
     db.refresh(balance)
     return balance
+
+
+def accrue_monthly_bulk(db: Session, year: int, month: int, leave_type: str = "VACATION") -> dict:
+    """Devenga el mes a todos los empleados activos en una sola transaccion.
+
+    El registro en leave_accruals lo hace idempotente: si (year, month,
+    leave_type) ya se aplico no se toca nada. Los saldos que faltan se crean a
+    cero y luego un UPDATE ... FROM users suma los dias segun weekly_hours.
+    No se coordina con el devengo individual (/{user_id}/accrue).
+    """
+    ledger = (
+        pg_insert(LeaveAccrual)
+        .values(id=uuid4(), year=year, month=month, leave_type=leave_type, employees=0,
+                is_deleted=False, is_disabled=False)
+        .on_conflict_do_nothing(index_elements=[LeaveAccrual.year, LeaveAccrual.month, LeaveAccrual.leave_type])
+        .returning(LeaveAccrual.id)
+    )
+    accrual_id = db.execute(ledger).scalar()
+    if accrual_id is None:
+        db.rollback()
+        applied = db.query(LeaveAccrual).filter(
+            LeaveAccrual.year == year, LeaveAccrual.month == month, LeaveAccrual.leave_type == leave_type,
+        ).first()
+        return {"year": year, "month": month, "leave_type": leave_type, "applied": False,
+                "employees": applied.employees, "created_balances": 0}
+
+    now = datetime.utcnow()
+    missing = (
+        select(
+            func.gen_random_uuid(), User.id, literal(year), literal(leave_type, LeaveBalance.leave_type.type),
+            literal(0), literal(0), literal(0), literal(FULL_TIME_WEEKLY_HOURS),
+            literal(FULL_TIME_WEEKLY_HOURS * 4.33), literal(now), literal(False), literal(False),
+        )
+        .where(User.is_active.is_(True))
+    )
+    created = db.execute(
+        pg_insert(LeaveBalance)
+        .from_select(
+            ["id", "user_id", "year", "leave_type", "remaining_days", "used_days", "total_days",
+             "weekly_hours", "monthly_hours", "last_updated", "is_deleted", "is_disabled"],
+            missing,
+        )
+        .on_conflict_do_nothing(index_elements=[LeaveBalance.user_id, LeaveBalance.leave_type, LeaveBalance.year])
+    ).rowcount
+
+    days = _accrual_days_expr(LeaveBalance.weekly_hours)
+    employees = db.execute(
+        update(LeaveBalance)
+        .where(
+            LeaveBalance.user_id == User.id,
+            User.is_active.is_(True),
+            LeaveBalance.year == year,
+            LeaveBalance.leave_type == leave_type,
+        )
+        .values(
+            remaining_days=LeaveBalance.remaining_days + days,
+            total_days=func.coalesce(LeaveBalance.total_days, 0) + days,
+            last_updated=now,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    db.query(LeaveAccrual).filter(LeaveAccrual.id == accrual_id).update(
+        {LeaveAccrual.employees: employees}, synchronize_session=False
+    )
+    db.commit()
+    return {"year": year, "month": month, "leave_type": leave_type, "applied": True,
+            "employees": employees, "created_balances": created}
+
@@ -0,0 +1,154 @@
+"""Particiones mensuales de time_tracking (PARTITION BY RANGE (timestamp)).
+
+Cada mes UTC es una tabla time_tracking_pAAAAMM. La particion DEFAULT recoge lo
+que cae fuera (si el mantenimiento no se ha ejecutado a tiempo) para que un
+fichaje nunca falle; al crear el mes que falta se mueven ahi sus filas.
+"""
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PARTITIONED_TABLE = "time_tracking"
+DEFAULT_PARTITION = "time_tracking_default"
+# DETACH bloquea la tabla padre: mejor fallar que dejar fichajes en cola
+DETACH_LOCK_TIMEOUT = "5s"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_p{month:%Y%m}"
+
+
+def _month_bound(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def _monthly(names) -> list[dict]:
+    prefix = f"{PARTITIONED_TABLE}_p"
+    partitions = []
+    for name in names:
+        suffix = name[len(prefix):]
+        if not name.startswith(prefix) or len(suffix) != 6 or not suffix.isdigit():
+            continue
+        partitions.append({"name": name, "month": date(int(suffix[:4]), int(suffix[4:]), 1)})
+    return sorted(partitions, key=lambda p: p["month"])
+
+
+def list_partitions(db: Session) -> list[dict]:
+    """Particiones mensuales adjuntas, por orden: {"name", "month"}."""
+    return _monthly(db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": PARTITIONED_TABLE}).scalars().all())
+
+
+def list_detached_partitions(db: Session) -> list[dict]:
+    """Tablas time_tracking_pAAAAMM que ya no cuelgan de time_tracking."""
+    return _monthly(db.execute(text("""
+        SELECT relname FROM pg_class
+        WHERE relkind = 'r' AND NOT relispartition AND relname LIKE :pattern
+    """), {"pattern": f"{PARTITIONED_TABLE}_p%"}).scalars().all())
+
+
+def create_partition(db: Session, month: date) -> bool:
+    """Crea la particion del mes si no existe. Si la DEFAULT ya tiene filas de
+    ese mes, Postgres no deja crearla: se saca la DEFAULT, se crea el mes, se
+    mueven las filas y se vuelve a adjuntar, todo en la misma transaccion.
+    Devuelve False si ya existia. No hace commit."""
+    month = month_start(month)
+    name = partition_name(month)
+    if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+
+    bounds = {"start": _month_bound(month), "end": _month_bound(add_months(month, 1))}
+    # Los limites van como literales: DDL no admite parametros
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+    )
+    has_default = db.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is not None
+    stray_rows = has_default and db.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end)"),
+        bounds,
+    ).scalar()
+
+    if not stray_rows:
+        db.execute(create)
+        return True
+
+    db.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.execute(create)
+    db.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"),
+        bounds,
+    )
+    db.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"),
+        bounds,
+    )
+    db.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return True
+
+
+def ensure_partitions(db: Session, first_month: date, last_month: date) -> list[str]:
+    """Crea las particiones que falten entre los dos meses (incluidos). Hace
+    commit por particion."""
+    month, last_month = month_start(first_month), month_start(last_month)
+    created = []
+    while month <= last_month:
+        if create_partition(db, month):
+            created.append(partition_name(month))
+        db.commit()
+        month = add_months(month, 1)
+    return created
+
+
+def current_month() -> date:
+    return month_start(datetime.now(timezone.utc).date())
+
+
+def detach_partitions_before(db: Session, before_month: date) -> list[str]:
+    """Saca de time_tracking las particiones de meses anteriores a
+    `before_month`. Quedan como tablas normales (para archivarlas o borrarlas);
+    sus fichajes dejan de verse en la aplicacion. Hace commit por particion."""
+    before_month = month_start(before_month)
+    detached = []
+    for partition in list_partitions(db):
+        if partition["month"] >= before_month:
+            break
+        db.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+        db.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {partition['name']}"))
+        db.commit()
+        detached.append(partition["name"])
+    return detached
+
+
+def _scanned_relations(plan: dict) -> set:
+    relations = set()
+    if "Relation Name" in plan:
+        relations.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations |= _scanned_relations(child)
+    return relations
+
+
+def scanned_partitions(db: Session, statement: str, parameters=None) -> list[str]:
+    """Particiones de time_tracking que lee el plan de una sentencia SQL ya
+    compilada (con sus parametros de driver). Con la poda funcionando, una
+    consulta acotada a un mes lee una o dos."""
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters or {}).scalar()
+    return sorted(
+        name for name in _scanned_relations(plan[0]["Plan"])
+        if name.startswith(f"{PARTITIONED_TABLE}_")
+    )
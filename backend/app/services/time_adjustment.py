@@ -1,11 +1,14 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from uuid import UUID
 from typing import Optional
 
 from app.models.time_adjustment import TimeAdjustment
 from app.models.time_tracking import TimeTracking
+from app.models.user import User
 from app.schemas.time_adjustment import TimeAjustmentCreate, TimeAdjustmentOut
-from app.schemas.enum import AdjustmentStatusEnum
+from app.schemas.enum import AdjustmentStatusEnum, EventTypeEnum
+from app.core.events import publish_event
+from app.services.time_tracking import refresh_daily_hours_around, sync_clock_states
 
 
 def create_time_adjustment(db: Session, user_id: UUID, adjustment: TimeAjustmentCreate) -> TimeAdjustment:
@@ -18,11 +21,64 @@ def create_time_adjustment(db: Session, user_id: UUID, adjustment: TimeAjustment
         status=AdjustmentStatusEnum.PENDING
     )
     db.add(new_adjustment)
+    db.flush()
+    publish_event(db, EventTypeEnum.ADJUSTMENT_REQUESTED, user_id,
+                  id=new_adjustment.id, adjusted_type=new_adjustment.adjusted_type)
     db.commit()
     db.refresh(new_adjustment)
     return new_adjustment
 
 
+# Mismo orden en list_adjustments y list_adjustment_rows: las paginas no cambian con el modo
+ADJUSTMENT_LIST_ORDER = (TimeAdjustment.create_date.desc(), TimeAdjustment.id.desc())
+
+
+def list_adjustments(db: Session, user_id: Optional[UUID], skip: int, limit: int) -> list[TimeAdjustmentOut]:
+    # joinedload: full_name sin una consulta por ajuste
+    query = db.query(TimeAdjustment).options(joinedload(TimeAdjustment.user))
+    if user_id is not None:
+        query = query.filter(TimeAdjustment.user_id == user_id)
+    adjustments = query.order_by(*ADJUSTMENT_LIST_ORDER).offset(skip).limit(limit).all()
+
+    return [
+        TimeAdjustmentOut(
+            id=a.id,
+            user_id=a.user_id,
+            full_name=a.user.full_name if a.user else a.user_id,
+            time_record_id=a.time_record_id,
+            status=a.status,
+            reviewed_by=a.reviewed_by,
+            review_comment=a.review_comment,
+            adjusted_timestamp=a.adjusted_timestamp,
+            adjusted_type=a.adjusted_type,
+            reason=a.reason,
+        )
+        for a in adjustments
+    ]
+
+
+def list_adjustment_rows(db: Session, user_id: Optional[UUID], skip: int, limit: int) -> list[dict]:
+    """Lo mismo que list_adjustments, ya con la forma de TimeAdjustmentOut y en una consulta."""
+    query = (
+        db.query(
+            TimeAdjustment.id,
+            TimeAdjustment.user_id,
+            User.full_name,
+            TimeAdjustment.time_record_id,
+            TimeAdjustment.status,
+            TimeAdjustment.reviewed_by,
+            TimeAdjustment.review_comment,
+            TimeAdjustment.adjusted_timestamp,
+            TimeAdjustment.adjusted_type,
+            TimeAdjustment.reason,
+        )
+        .join(User, TimeAdjustment.user_id == User.id)
+    )
+    if user_id is not None:
+        query = query.filter(TimeAdjustment.user_id == user_id)
+    return [row._asdict() for row in query.order_by(*ADJUSTMENT_LIST_ORDER).offset(skip).limit(limit).all()]
+
+
 def get_adjustments_by_user(db: Session, user_id: UUID) -> list[TimeAdjustment]:
     return db.query(TimeAdjustment).filter(TimeAdjustment.user_id == user_id).all()
 
@@ -59,9 +115,17 @@ def review_adjustment(
     adjustment.reviewed_by = reviewer_id
     adjustment.review_comment = review_comment
 
-    if status == AdjustmentStatusEnum.APPROVED and adjustment.time_record_id:
-        _apply_time_record_adjustment(db, adjustment)
+    if status == AdjustmentStatusEnum.APPROVED:
+        previous_timestamp = None
+        if adjustment.time_record_id:
+            previous_timestamp = _apply_time_record_adjustment(db, adjustment)
+        db.flush()
+        refresh_daily_hours_around(db, adjustment.user_id, previous_timestamp, adjustment.adjusted_timestamp)
+        # El ajuste puede cambiar cual es el ultimo fichaje del empleado
+        sync_clock_states(db, adjustment.user_id)
 
+    publish_event(db, EventTypeEnum.ADJUSTMENT_REVIEWED, adjustment.user_id,
+                  id=adjustment.id, status=status)
     db.commit()
     db.refresh(adjustment)
 
@@ -69,15 +133,18 @@ def review_adjustment(
 
 
 def _apply_time_record_adjustment(db: Session, adjustment: TimeAdjustment):
-    """Aplica los cambios del ajuste aprobado al registro de tiempo."""
+    """Aplica los cambios del ajuste aprobado al registro de tiempo.
+    Devuelve el timestamp que tenia el registro antes del ajuste."""
     time_record = db.query(TimeTracking).filter(TimeTracking.id == adjustment.time_record_id).first()
     if not time_record:
-        return
+        return None
 
+    previous_timestamp = time_record.timestamp
     time_record.timestamp = adjustment.adjusted_timestamp
 
     if adjustment.adjusted_type in ["ENTRY_CORRECTION", "MANUAL_ENTRY"]:
         time_record.record_type = "CHECK_IN"
     elif adjustment.adjusted_type == "EXIT_CORRECTION":
         time_record.record_type = "CHECK_OUT"
-    
+
+    return previous_timestamp
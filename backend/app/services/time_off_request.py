@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from uuid import UUID
 from typing import Optional
 
@@ -7,6 +7,8 @@ from app.models.time_off_request import TimeOffRequest
 from app.models.user import User
 from app.schemas.time_off_request import TimeOffRequestUpdate
 from app.core.exceptions import bad_request
+from app.core.events import publish_event
+from app.schemas.enum import EventTypeEnum
 from app.services.leave_balance import deduct_days
 
 
@@ -36,6 +38,9 @@ def create_request(db: Session, data: dict) -> TimeOffRequest:
 
     new_request = TimeOffRequest(**data)
     db.add(new_request)
+    db.flush()
+    publish_event(db, EventTypeEnum.TIME_OFF_REQUESTED, new_request.user_id,
+                  id=new_request.id, start_date=new_request.start_date, end_date=new_request.end_date)
     db.commit()
     db.refresh(new_request)
 
@@ -63,7 +68,9 @@ def update_request(
         request_obj.status = "REJECTED"
         request_obj.review_comment = "No puedes irte de vacaciones, no tienes días disponibles"
 
-
+    if request_obj.status != previous_status:
+        publish_event(db, EventTypeEnum.TIME_OFF_REVIEWED, request_obj.user_id,
+                      id=request_obj.id, status=request_obj.status)
     db.commit()
     db.refresh(request_obj)
 
@@ -76,14 +83,19 @@ def update_request(
     return request_obj
 
 def list_requests(db: Session):
-    requests = db.query(TimeOffRequest).all()
+    requests = db.query(TimeOffRequest).options(joinedload(TimeOffRequest.user)).all()
     for r in requests:
         _attach_user_full_name(r, db)
     return requests
 
 
 def list_requests_by_user(db: Session, user_id: UUID):
-    requests = db.query(TimeOffRequest).filter(TimeOffRequest.user_id == user_id).all()
+    requests = (
+        db.query(TimeOffRequest)
+        .options(joinedload(TimeOffRequest.user))
+        .filter(TimeOffRequest.user_id == user_id)
+        .all()
+    )
     for r in requests:
         _attach_user_full_name(r, db)
     return requests
@@ -1,44 +1,316 @@
+from sqlalchemy import Date, DateTime, and_, case, cast, column, func, insert, literal, or_, select, true, tuple_, union, union_all, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from uuid import UUID
-from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID, uuid4
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum
+from typing import Optional
+from bisect import bisect_left
+import base64
 import calendar
+import csv
+import io
+import json
 
 
-from app.models import TimeTracking, User, TimeAdjustment
-from app.schemas.time_tracking import TimeTrackingCreate
+from app.database import SessionLocal
+from app.models import TimeTracking, User, TimeAdjustment, DailyHours, ClockState
+from app.schemas.time_tracking import TimeTrackingCreate, TimeTrackingBatchEvent
+from app.schemas.enum import ExportFormatEnum, RecordTypeEnum, AdjustmentStatusEnum, HoursEngineEnum, ClockErrorCodeEnum, EventTypeEnum
 from app.core.exceptions import bad_request, conflict
+from app.core.config import settings
+from app.core.metrics import CLOCK_EVENTS
+from app.core.events import event_publisher
+from app.services.hours_engine import CHECK_IN_ADJUSTMENTS, CHECK_OUT_ADJUSTMENTS, batch_hours_worked, sql_hours_worked
+from app.services import archive
+from app.services.partitions import add_months
 
 
 MIN_TIME_BETWEEN_RECORDS = 600  
+# Margen para relojes de kiosco adelantados respecto al servidor
+BATCH_MAX_CLOCK_SKEW = 60
+
+
+def _clock_in_statement(user_id: UUID, record_type: RecordTypeEnum, description: Optional[str], now: datetime):
+    """INSERT atomico del fichaje.
+
+    El upsert sobre clock_states solo actualiza si el tipo alterna y han pasado
+    MIN_TIME_BETWEEN_RECORDS; si no, no devuelve filas y el INSERT en
+    time_tracking no inserta nada. ON CONFLICT bloquea la fila del empleado, asi
+    que un segundo fichaje concurrente espera y se evalua contra el primero.
+    """
+    record_id = uuid4()
+    state = pg_insert(ClockState).values(
+        id=uuid4(), user_id=user_id, record_type=record_type, timestamp=now,
+        record_id=record_id, is_deleted=False, is_disabled=False,
+    )
+    state = state.on_conflict_do_update(
+        index_elements=[ClockState.user_id],
+        set_={
+            "record_type": state.excluded.record_type,
+            "timestamp": state.excluded.timestamp,
+            "record_id": state.excluded.record_id,
+            "update_date": func.now(),
+        },
+        where=and_(
+            ClockState.record_type != state.excluded.record_type,
+            state.excluded.timestamp - ClockState.timestamp >= timedelta(seconds=MIN_TIME_BETWEEN_RECORDS),
+        ),
+    ).returning(ClockState.record_id, ClockState.user_id, ClockState.record_type, ClockState.timestamp).cte("clock_state")
+
+    columns = ["id", "user_id", "record_type", "timestamp", "description", "is_deleted", "is_disabled"]
+    return (
+        insert(TimeTracking)
+        .from_select(columns, select(
+            state.c.record_id, state.c.user_id, state.c.record_type, state.c.timestamp,
+            literal(description, TimeTracking.description.type), literal(False), literal(False),
+        ))
+        .returning(*TimeTracking.__table__.c)
+    )
+
+
+def _clock_in_rejection(db: Session, user_id: UUID, record_type: RecordTypeEnum, now: datetime):
+    # Solo para elegir el mensaje: la decision ya la tomo la base de datos
+    state = db.query(ClockState.record_type, ClockState.timestamp).filter(ClockState.user_id == user_id).first()
+    if state and (now - state.timestamp).total_seconds() < MIN_TIME_BETWEEN_RECORDS:
+        return conflict(f"Debes esperar {MIN_TIME_BETWEEN_RECORDS} segundos antes de fichar de nuevo.",
+                        code=ClockErrorCodeEnum.TOO_SOON.value)
+    return bad_request(f"No puedes hacer {record_type.value} dos veces seguidas.",
+                       code=ClockErrorCodeEnum.SAME_TYPE.value)
 
 
 def create_time_record(db: Session, user_id: UUID, record: TimeTrackingCreate):
     now = datetime.now(timezone.utc)
+    try:
+        record_type = RecordTypeEnum(record.record_type.upper())
+    except ValueError:
+        raise bad_request(f"Tipo de fichaje no valido: {record.record_type}")
+
+    new_record = db.execute(_clock_in_statement(user_id, record_type, record.description, now)).first()
+    if new_record is None:
+        db.rollback()
+        raise _clock_in_rejection(db, user_id, record_type, now)
+
+    # Solo una salida puede cerrar un turno y cambiar las horas del dia
+    if record_type == RecordTypeEnum.CHECK_OUT:
+        refresh_daily_hours_around(db, user_id, now)
+    db.commit()
+    # Fuera de la transaccion y en lote: ver app.core.events
+    event_publisher.publish([(EventTypeEnum.CLOCK, user_id,
+                              {"id": new_record.id, "record_type": record_type.value,
+                               "timestamp": new_record.timestamp})])
+    CLOCK_EVENTS.labels(record_type=record_type.value, source="api").inc()
+    return new_record
 
-    last_record = (
-        db.query(TimeTracking)
-        .filter(TimeTracking.user_id == user_id)
-        .order_by(TimeTracking.timestamp.desc())
-        .first()
+
+async def create_time_record_async(db: AsyncSession, user_id: UUID, record: TimeTrackingCreate):
+    return await db.run_sync(create_time_record, user_id, record)
+
+
+def _lock_clock_states(db: Session, user_ids: list[UUID], now: datetime) -> dict:
+    """Bloquea la fila de clock_states de cada empleado y devuelve su ultimo
+    fichaje. A quien no tiene fila se le inserta una (ON CONFLICT DO NOTHING,
+    como en _clock_in_statement) para que tambien quede bloqueado: si no, un
+    fichaje individual simultaneo no esperaria al lote. Esas filas no cuentan
+    como fichaje previo y el lote las sobrescribe antes del commit."""
+    created = set()
+    if user_ids:
+        placeholders = pg_insert(ClockState).values([
+            {"id": uuid4(), "user_id": user_id, "record_type": RecordTypeEnum.CHECK_OUT, "timestamp": now,
+             "record_id": uuid4(), "is_deleted": False, "is_disabled": False}
+            # Orden fijo: dos lotes concurrentes bloquean en el mismo orden
+            for user_id in sorted(user_ids, key=str)
+        ]).on_conflict_do_nothing(index_elements=[ClockState.user_id]).returning(ClockState.user_id)
+        created = set(db.scalars(placeholders))
+
+    # FOR UPDATE: un fichaje individual del mismo empleado espera a que acabe el lote
+    rows = (
+        db.query(ClockState.user_id, ClockState.record_type, ClockState.timestamp)
+        .filter(ClockState.user_id.in_(user_ids))
+        .with_for_update()
+        .all()
     )
+    return {
+        user_id: (record_type, timestamp)
+        for user_id, record_type, timestamp in rows if user_id not in created
+    }
 
-    if last_record:
-        delta = (now - last_record.timestamp).total_seconds()
-        if delta < MIN_TIME_BETWEEN_RECORDS:
-            raise conflict(f"Debes esperar {MIN_TIME_BETWEEN_RECORDS} segundos antes de fichar de nuevo.")
-        if last_record.record_type.lower() == record.record_type.lower():
-            raise bad_request(f"No puedes hacer {record.record_type} dos veces seguidas.")
 
-    new_record = TimeTracking(
-        user_id=user_id,
-        record_type=record.record_type,
-        description=record.description,
-        timestamp=now,
+def _upsert_clock_state(db: Session, user_id: UUID, record_type: RecordTypeEnum, timestamp: datetime, record_id: UUID):
+    stmt = pg_insert(ClockState).values(
+        id=uuid4(), user_id=user_id, record_type=record_type, timestamp=timestamp,
+        record_id=record_id, is_deleted=False, is_disabled=False,
     )
-    db.add(new_record)
-    db.commit()
-    db.refresh(new_record)
-    return new_record
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ClockState.user_id],
+        set_={
+            "record_type": stmt.excluded.record_type,
+            "timestamp": stmt.excluded.timestamp,
+            "record_id": stmt.excluded.record_id,
+            "update_date": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+def sync_clock_states(db: Session, user_id: Optional[UUID] = None):
+    """Recalcula clock_states desde time_tracking (tras ajustes, cargas directas o
+    al arrancar). Un solo INSERT ... SELECT; las filas que no cambian no se tocan
+    y conservan su update_date. No hace commit."""
+    latest = (
+        select(
+            func.gen_random_uuid(), TimeTracking.user_id, TimeTracking.record_type,
+            TimeTracking.timestamp, TimeTracking.id, literal(False), literal(False),
+        )
+        .distinct(TimeTracking.user_id)
+        .order_by(TimeTracking.user_id, TimeTracking.timestamp.desc(), TimeTracking.id.desc())
+    )
+    if user_id is not None:
+        latest = latest.where(TimeTracking.user_id == user_id)
+    stmt = pg_insert(ClockState).from_select(
+        ["id", "user_id", "record_type", "timestamp", "record_id", "is_deleted", "is_disabled"], latest,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ClockState.user_id],
+        set_={
+            "record_type": stmt.excluded.record_type,
+            "timestamp": stmt.excluded.timestamp,
+            "record_id": stmt.excluded.record_id,
+            "update_date": func.now(),
+        },
+        where=or_(
+            ClockState.record_id != stmt.excluded.record_id,
+            ClockState.record_type != stmt.excluded.record_type,
+            ClockState.timestamp != stmt.excluded.timestamp,
+        ),
+    )
+    db.execute(stmt)
+
+
+def get_presence(db: Session, state: RecordTypeEnum = RecordTypeEnum.CHECK_IN) -> dict:
+    """Quien esta fichado ahora mismo. Sale de clock_states (una fila por
+    empleado), nunca del historial: el recuento es un GROUP BY sobre los
+    empleados activos y la lista de CHECK_IN usa el indice parcial."""
+    counts = dict(
+        db.query(ClockState.record_type, func.count())
+        .select_from(User)
+        .outerjoin(ClockState, ClockState.user_id == User.id)
+        .filter(User.is_active.is_(True))
+        .group_by(ClockState.record_type)
+        .all()
+    )
+    users = (
+        db.query(
+            ClockState.user_id,
+            User.full_name,
+            ClockState.record_type.label("state"),
+            ClockState.timestamp.label("since"),
+        )
+        .join(User, User.id == ClockState.user_id)
+        .filter(ClockState.record_type == state, User.is_active.is_(True))
+        .order_by(ClockState.timestamp)
+        .all()
+    )
+    return {
+        "as_of": datetime.now(timezone.utc),
+        "on_shift": counts.get(RecordTypeEnum.CHECK_IN, 0),
+        "off_shift": counts.get(RecordTypeEnum.CHECK_OUT, 0),
+        "never_clocked": counts.get(None, 0),
+        "users": [row._asdict() for row in users],
+    }
+
+
+def _batch_event_error(previous, record_type: RecordTypeEnum, timestamp: datetime):
+    """(codigo, mensaje) si el evento no se puede aceptar tras `previous`."""
+    if previous is None:
+        return None
+    previous_type, previous_timestamp = previous
+    if timestamp <= previous_timestamp:
+        return ClockErrorCodeEnum.OUT_OF_ORDER, "El fichaje es anterior al ultimo registrado."
+    if (timestamp - previous_timestamp).total_seconds() < MIN_TIME_BETWEEN_RECORDS:
+        return ClockErrorCodeEnum.TOO_SOON, f"Debes esperar {MIN_TIME_BETWEEN_RECORDS} segundos antes de fichar de nuevo."
+    if previous_type == record_type:
+        return ClockErrorCodeEnum.SAME_TYPE, f"No puedes hacer {record_type.value} dos veces seguidas."
+    return None
+
+
+def create_time_records_batch(db: Session, default_user_id: UUID, events: list[TimeTrackingBatchEvent]):
+    """Ingesta de los fichajes que un kiosco acumulo sin conexion.
+
+    Las reglas de create_time_record (alternancia y MIN_TIME_BETWEEN_RECORDS) se
+    validan en memoria sobre el lote ordenado por hora del dispositivo, partiendo
+    del ultimo registro de cada empleado. Los aceptados se insertan en una sola
+    sentencia multi-fila y una sola transaccion; los rechazados no cortan el lote.
+    """
+    now = datetime.now(timezone.utc)
+    results = [None] * len(events)
+
+    def reject(index: int, code: ClockErrorCodeEnum, error: str):
+        results[index] = {"index": index, "accepted": False, "error_code": code, "error": error}
+
+    events_by_user = {}
+    for index, event in enumerate(events):
+        timestamp = event.timestamp if event.timestamp.tzinfo else event.timestamp.replace(tzinfo=timezone.utc)
+        if timestamp > now + timedelta(seconds=BATCH_MAX_CLOCK_SKEW):
+            reject(index, ClockErrorCodeEnum.FUTURE, "El fichaje tiene fecha futura.")
+            continue
+        events_by_user.setdefault(event.user_id or default_user_id, []).append((timestamp, index, event))
+
+    user_ids = list(events_by_user)
+    active_users = {uid for (uid,) in db.query(User.id).filter(User.id.in_(user_ids), User.is_active.is_(True)).all()}
+    # Solo los activos: el resto se rechaza entero y no tiene fila que bloquear.
+    # Todo activo sin fila acepta al menos su primer evento, asi que ninguna
+    # fila insertada por _lock_clock_states llega al commit sin sobrescribir
+    last_records = _lock_clock_states(db, list(active_users), now)
+
+    rows = []
+    check_outs = {}
+    last_accepted = {}
+    for user_id, user_events in events_by_user.items():
+        previous = last_records.get(user_id)
+        # El indice desempata fichajes con la misma hora: se respeta el orden del lote
+        for timestamp, index, event in sorted(user_events, key=lambda e: (e[0], e[1])):
+            if user_id not in active_users:
+                reject(index, ClockErrorCodeEnum.UNKNOWN_USER, "Usuario no encontrado o inactivo.")
+                continue
+            error = _batch_event_error(previous, event.record_type, timestamp)
+            if error:
+                reject(index, *error)
+                continue
+
+            record_id = uuid4()
+            rows.append({
+                "id": record_id,
+                "user_id": user_id,
+                "record_type": event.record_type,
+                "description": event.description,
+                "timestamp": timestamp,
+            })
+            results[index] = {"index": index, "accepted": True, "id": record_id}
+            previous = (event.record_type, timestamp)
+            last_accepted[user_id] = (event.record_type, timestamp, record_id)
+            if event.record_type == RecordTypeEnum.CHECK_OUT:
+                check_outs.setdefault(user_id, []).append(timestamp)
+
+    if rows:
+        db.execute(insert(TimeTracking), rows)
+        for user_id, (record_type, timestamp, record_id) in last_accepted.items():
+            _upsert_clock_state(db, user_id, record_type, timestamp, record_id)
+        refresh_daily_hours_for(db, check_outs)
+        db.commit()
+        event_publisher.publish(
+            (EventTypeEnum.CLOCK, row["user_id"],
+             {"id": row["id"], "record_type": row["record_type"].value, "timestamp": row["timestamp"]})
+            for row in rows
+        )
+        for record_type in RecordTypeEnum:
+            accepted = sum(1 for row in rows if row["record_type"] == record_type)
+            if accepted:
+                CLOCK_EVENTS.labels(record_type=record_type.value, source="batch").inc(accepted)
+
+    return {"accepted": len(rows), "rejected": len(events) - len(rows), "results": results}
 
 
 def get_time_records_by_user(db: Session, user_id: UUID):
@@ -50,41 +322,127 @@ def get_time_records_by_user(db: Session, user_id: UUID):
     )
 
 def _query_time_records_with_user_info(db: Session):
+    # Solo las columnas de TimeTrackingSearchOut, con sus nombres: sin entidades ORM
     return (
-        db.query(TimeTracking, User.username, User.full_name, User.email)
+        db.query(
+            TimeTracking.id,
+            TimeTracking.user_id,
+            TimeTracking.record_type,
+            TimeTracking.timestamp,
+            TimeTracking.description,
+            TimeTracking.create_date,
+            TimeTracking.update_date,
+            User.full_name.label("user_full_name"),
+            User.username.label("user_username"),
+            User.email.label("user_email"),
+        )
         .join(User, TimeTracking.user_id == User.id)
     )
 
 
 def _serialize_records(records):
-    return [
-        {
-            "id": r.id,
-            "user_id": r.user_id,
-            "record_type": r.record_type,
-            "timestamp": r.timestamp,
-            "description": r.description,
-            "create_date": r.create_date,
-            "update_date": r.update_date,
-            "user_full_name": full_name,
-            "user_username": username,
-            "user_email": email,
-        }
-        for r, username, full_name, email in records
-    ]
+    return [record._asdict() for record in records]
+
+
+def _encode_cursor(record: dict) -> str:
+    raw = json.dumps([record["timestamp"].isoformat(), str(record["id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
 
-def _paginate(query, limit, offset):
-    total = query.count()
-    records = query.order_by(TimeTracking.timestamp.desc()).offset(offset).limit(limit).all()
-    return total, records
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, record_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), UUID(record_id)
+    except (ValueError, TypeError):
+        raise bad_request("Invalid cursor")
 
 
-def get_time_records_by_user_with_user_info(db: Session, user_id: UUID, limit: int = 10, offset: int = 0):
+def _estimate_count(db: Session, query) -> int:
+    """Filas estimadas por el planner, sin recorrer la tabla como hace count()."""
+    sql = query.statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _with_user_info(db: Session, records: list[dict]) -> list[dict]:
+    user_ids = {record["user_id"] for record in records}
+    users = {
+        user_id: (full_name, username, email)
+        for user_id, full_name, username, email in
+        db.query(User.id, User.full_name, User.username, User.email).filter(User.id.in_(user_ids)).all()
+    } if user_ids else {}
+    for record in records:
+        record["user_full_name"], record["user_username"], record["user_email"] = users.get(
+            record["user_id"], (None, None, None))
+    return records
+
+
+def _paginate(
+    db: Session,
+    query,
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+    exact_total: bool = True,
+    include_archived: bool = False,
+    archive_user_ids: Optional[list[UUID]] = None,
+):
+    """Pagina (timestamp, id) descendente. Con include_archived, cuando se acaban
+    los fichajes de la tabla sigue por los Parquet archivados (siempre mas
+    antiguos), filtrados por archive_user_ids (None = todos). El total de los
+    archivados sale de time_tracking_archives; los ficheros solo se abren si la
+    pagina llega hasta ellos."""
+    # Ningun empleado encaja (p. ej. el buscador): no hay nada que leer del archivo
+    include_archived = include_archived and archive_user_ids != []
+    hot_total = query.count() if exact_total else _estimate_count(db, query)
+    total = hot_total + (archive.count_records(db, archive_user_ids) if include_archived else 0)
+    base_query = query
+
+    # (timestamp, id) desempata registros con el mismo timestamp
+    query = query.order_by(TimeTracking.timestamp.desc(), TimeTracking.id.desc())
+    before = None
+    if cursor:
+        before = _decode_cursor(cursor)
+        timestamp, record_id = before
+        # La comparacion de tuplas no poda particiones; el filtro simple si
+        query = query.filter(TimeTracking.timestamp <= timestamp,
+                             tuple_(TimeTracking.timestamp, TimeTracking.id) < tuple_(timestamp, record_id))
+    else:
+        query = query.offset(offset)
+
+    records = _serialize_records(query.limit(limit + 1).all())
+    if include_archived and len(records) <= limit:
+        skip = 0
+        if not cursor and not records and offset:
+            # El offset ya ha pasado todos los de la tabla: lo que sobra va al archivo
+            skip = max(offset - (hot_total if exact_total else base_query.count()), 0)
+        records += _with_user_info(db, archive.read_page(db, archive_user_ids, before, skip, limit + 1 - len(records)))
+
+    next_cursor = _encode_cursor(records[limit - 1]) if len(records) > limit else None
+    result = records[:limit]
+    return {
+        "total": total,
+        "total_is_estimate": not exact_total,
+        "count": len(result),
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+        "results": result,
+    }
+
+
+def get_time_records_by_user_with_user_info(
+    db: Session,
+    user_id: UUID,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    exact_total: bool = True,
+    include_archived: bool = True,
+):
     query = _query_time_records_with_user_info(db).filter(TimeTracking.user_id == user_id)
-    total, records = _paginate(query, limit, offset)
-    result = _serialize_records(records)
-    return {"total": total, "count": len(result), "limit": limit, "offset": offset, "results": result}
+    return _paginate(db, query, limit, offset, cursor, exact_total, include_archived, [user_id])
 
 
 def search_time_records_with_user_info(
@@ -93,22 +451,126 @@ def search_time_records_with_user_info(
     user_full_name: str = None,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    exact_total: bool = True,
+    include_archived: bool = True,
 ):
     query = _query_time_records_with_user_info(db)
+    archive_user_ids = None
 
     if user_id:
         query = query.filter(TimeTracking.user_id == user_id)
+        archive_user_ids = [user_id]
     if user_full_name:
-        query = query.filter(User.full_name.ilike(f"%{user_full_name}%"))
+        matched = _search_users(user_full_name)
+        if user_id:
+            matched = matched.where(User.id == user_id)
+        query = query.filter(TimeTracking.user_id.in_(matched))
+        if include_archived:
+            # Los Parquet se filtran con la lista de ids, completa
+            archive_user_ids = list(db.scalars(matched))
+
+    return _paginate(db, query, limit, offset, cursor, exact_total, include_archived, archive_user_ids)
+
+
+def _search_users(term: str):
+    """Ids de los empleados que encajan con el texto (indices trigram de users),
+    como subconsulta: los fichajes se filtran con todos, sin limite.
+
+    Sin orden por similarity(): la pagina va por (timestamp, id) para que el
+    cursor y el total sean estables, y con todos los empleados dentro la
+    similitud ya no decide nada."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    return select(User.id).where(or_(
+        User.full_name.ilike(pattern, escape="\\"),
+        User.username.ilike(pattern, escape="\\"),
+        User.email.ilike(pattern, escape="\\"),
+    ))
+
+
+EXPORT_COLUMNS = [
+    "id", "user_id", "record_type", "timestamp", "description", "create_date", "update_date",
+    "user_full_name", "user_username", "user_email",
+]
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _query_time_records_export(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[UUID] = None,
+):
+    query = (
+        db.query(
+            TimeTracking.id, TimeTracking.user_id, TimeTracking.record_type, TimeTracking.timestamp,
+            TimeTracking.description, TimeTracking.create_date, TimeTracking.update_date,
+            User.full_name, User.username, User.email,
+        )
+        .join(User, TimeTracking.user_id == User.id)
+    )
+    if start:
+        query = query.filter(TimeTracking.timestamp >= start)
+    if end:
+        query = query.filter(TimeTracking.timestamp < end)
+    if user_id:
+        query = query.filter(TimeTracking.user_id == user_id)
+    # yield_per activa un cursor del lado del servidor: nunca hay mas de un lote en memoria
+    return query.order_by(TimeTracking.timestamp.desc(), TimeTracking.id.desc()).yield_per(EXPORT_BATCH_SIZE)
 
-    total, records = _paginate(query, limit, offset)
-    result = _serialize_records(records)
-    return {"total": total, "count": len(result), "limit": limit, "offset": offset, "results": result}
 
+def stream_time_records_export(
+    export_format: ExportFormatEnum,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[UUID] = None,
+):
+    """Genera el export por trozos. Abre su propia sesion: el StreamingResponse
+    se consume cuando las dependencias de la peticion ya se han cerrado."""
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == ExportFormatEnum.CSV:
+            writer.writerow(EXPORT_COLUMNS)
+
+        def write(values):
+            if export_format == ExportFormatEnum.CSV:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False))
+                buffer.write("\n")
+
+        rows = _query_time_records_export(db, start, end, user_id)
+        for i, row in enumerate(rows, start=1):
+            write([_export_value(v) for v in row])
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
 
-def get_all_time_records_with_user_info(db: Session):
-    records = _query_time_records_with_user_info(db).order_by(TimeTracking.timestamp.desc()).all()
-    return _serialize_records(records)
+        # Despues los meses archivados (mas antiguos), solo los del rango
+        for batch in archive.iter_records(db, start, end, user_id, EXPORT_BATCH_SIZE):
+            for record in _with_user_info(db, batch):
+                write([_export_value(record[column]) for column in EXPORT_COLUMNS])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        yield buffer.getvalue()
+    finally:
+        db.close()
 
 
 
@@ -147,36 +609,319 @@ def calculate_hours_worked(records: list[TimeTracking], adjustments: list[TimeAd
 
 
 
-def get_weekly_hours(db: Session, user_id: UUID, week_start: datetime):
-    if week_start.tzinfo is None:
-        week_start = week_start.replace(tzinfo=timezone.utc)
-    week_end = week_start + timedelta(days=7)
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
 
-    records = (
-        db.query(TimeTracking)
-        .filter(TimeTracking.user_id == user_id,
-                TimeTracking.timestamp >= week_start,
-                TimeTracking.timestamp < week_end)
+
+def _utc_day(timestamp: datetime) -> date:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc).date()
+
+
+def _approved_adjustments(db: Session, user_id: UUID, start: datetime, end: datetime):
+    return (
+        db.query(TimeAdjustment)
+        .filter(TimeAdjustment.user_id == user_id,
+                TimeAdjustment.status == AdjustmentStatusEnum.APPROVED,
+                TimeAdjustment.adjusted_timestamp >= start,
+                TimeAdjustment.adjusted_timestamp < end)
         .all()
     )
 
-    hours = calculate_hours_worked(records)
-    return {"hours_worked": hours, "weekly_limit": 40, "over_limit": max(0, hours - 40)}
 
+def _daily_hours_from_records(records: list[TimeTracking], adjustments: list[TimeAdjustment]) -> dict:
+    """Horas por dia UTC. Cada dia se calcula con sus registros mas el primero
+    del dia siguiente, para que el turno que cruza la medianoche se cierre."""
+    records = sorted(records, key=lambda r: r.timestamp)
+    timestamps = [r.timestamp for r in records]
+    adjustments_by_day = {}
+    for adj in adjustments:
+        if adj.adjusted_timestamp:
+            adjustments_by_day.setdefault(_utc_day(adj.adjusted_timestamp), []).append(adj)
+
+    hours = {}
+    for day in {_utc_day(ts) for ts in timestamps} | set(adjustments_by_day):
+        first = bisect_left(timestamps, _day_start(day))
+        # +1: el primer registro del dia siguiente
+        last = bisect_left(timestamps, _day_start(day + timedelta(days=1))) + 1
+        hours[day] = calculate_hours_worked(records[first:last], adjustments_by_day.get(day, []))
+    return hours
+
+
+def _listed_days(user_days: list[tuple[UUID, date]]):
+    """CTE days (user_id, day, start) con los dias indicados."""
+    return select(
+        values(
+            column("user_id", PG_UUID(as_uuid=True)), column("day", Date), column("start", DateTime(timezone=True)),
+            name="days_values",
+        ).data([(user_id, day, _day_start(day)) for user_id, day in user_days])
+    ).cte("days")
+
+
+def _days_in_range(start: datetime, end: datetime, user_id: Optional[UUID] = None):
+    """CTE days con cada (empleado, dia) del rango que tiene fichajes o ajustes
+    aprobados que cuentan para las horas."""
+    def utc_day(timestamp):
+        return func.date_trunc("day", func.timezone("UTC", timestamp))
+
+    record_days = select(TimeTracking.user_id, utc_day(TimeTracking.timestamp).label("day")).where(
+        TimeTracking.timestamp >= start, TimeTracking.timestamp < end)
+    adjustment_days = select(TimeAdjustment.user_id, utc_day(TimeAdjustment.adjusted_timestamp)).where(
+        TimeAdjustment.status == AdjustmentStatusEnum.APPROVED,
+        TimeAdjustment.adjusted_type.in_(CHECK_IN_ADJUSTMENTS + CHECK_OUT_ADJUSTMENTS),
+        TimeAdjustment.adjusted_timestamp >= start, TimeAdjustment.adjusted_timestamp < end)
+    if user_id is not None:
+        record_days = record_days.where(TimeTracking.user_id == user_id)
+        adjustment_days = adjustment_days.where(TimeAdjustment.user_id == user_id)
+
+    # UNION: cada dia una vez aunque tenga fichajes y ajustes
+    days = union(record_days, adjustment_days).subquery("user_days")
+    return select(
+        days.c.user_id,
+        cast(days.c.day, Date).label("day"),
+        func.timezone("UTC", days.c.day).label("start"),
+    ).cte("days")
+
+
+def _refresh_daily_hours_statement(days):
+    """Recalcula daily_hours de cada (empleado, dia) de la CTE days en un solo
+    INSERT ... SELECT.
+
+    Mismo calculo que calculate_hours_worked por dia: los fichajes del dia, el
+    primero del dia siguiente (un dia de margen para cerrar el turno que cruza
+    la medianoche) y los ajustes aprobados del dia. LAG() empareja cada salida
+    con el registro anterior, como en sql_hours_worked; los dias sin turnos
+    cerrados quedan a 0.
+    """
+    one_day = timedelta(days=1)
+
+    day_records = (
+        select(
+            days.c.user_id, days.c.day,
+            TimeTracking.timestamp.label("ts"),
+            (TimeTracking.record_type == RecordTypeEnum.CHECK_IN).label("is_check_in"),
+            literal(0).label("source"),
+        )
+        .select_from(days)
+        .join(TimeTracking, and_(TimeTracking.user_id == days.c.user_id,
+                                 TimeTracking.timestamp >= days.c.start,
+                                 TimeTracking.timestamp < days.c.start + one_day))
+    )
+    next_record = (
+        select(TimeTracking.timestamp, TimeTracking.record_type)
+        .where(TimeTracking.user_id == days.c.user_id,
+               TimeTracking.timestamp >= days.c.start + one_day,
+               TimeTracking.timestamp < days.c.start + 2 * one_day)
+        .order_by(TimeTracking.timestamp.asc())
+        .limit(1)
+        .lateral("next_record")
+    )
+    next_records = (
+        select(
+            days.c.user_id, days.c.day,
+            next_record.c.timestamp,
+            next_record.c.record_type == RecordTypeEnum.CHECK_IN,
+            literal(0),
+        )
+        .select_from(days)
+        .join(next_record, true())
+    )
+    adjustments = (
+        select(
+            days.c.user_id, days.c.day,
+            TimeAdjustment.adjusted_timestamp,
+            case((TimeAdjustment.adjusted_type.in_(CHECK_IN_ADJUSTMENTS), True), else_=False),
+            literal(1),
+        )
+        .select_from(days)
+        .join(TimeAdjustment, and_(TimeAdjustment.user_id == days.c.user_id,
+                                   TimeAdjustment.status == AdjustmentStatusEnum.APPROVED,
+                                   TimeAdjustment.adjusted_type.in_(CHECK_IN_ADJUSTMENTS + CHECK_OUT_ADJUSTMENTS),
+                                   TimeAdjustment.adjusted_timestamp >= days.c.start,
+                                   TimeAdjustment.adjusted_timestamp < days.c.start + one_day))
+    )
 
-def get_monthly_hours(db: Session, user_id: UUID, year: int, month: int):
-    start_date = datetime(year, month, 1)
-    last_day = calendar.monthrange(year, month)[1]
-    end_date = datetime(year, month, last_day, 23, 59, 59)
+    events = union_all(day_records, next_records, adjustments).subquery("events")
+    # source desempata como calculate_hours_worked: ajustes despues de registros
+    window = {"partition_by": (events.c.user_id, events.c.day), "order_by": (events.c.ts, events.c.source)}
+    paired = select(
+        events.c.user_id,
+        events.c.day,
+        events.c.ts,
+        events.c.is_check_in,
+        func.lag(events.c.ts).over(**window).label("prev_ts"),
+        func.lag(events.c.is_check_in).over(**window).label("prev_is_check_in"),
+    ).subquery("paired")
+
+    hours = func.coalesce(func.sum(func.extract("epoch", paired.c.ts - paired.c.prev_ts)) / 3600, 0)
+    totals = (
+        select(func.gen_random_uuid(), days.c.user_id, days.c.day, hours, literal(False), literal(False))
+        .select_from(days)
+        .outerjoin(paired, and_(paired.c.user_id == days.c.user_id,
+                                paired.c.day == days.c.day,
+                                paired.c.is_check_in.is_(False),
+                                paired.c.prev_is_check_in.is_(True)))
+        .group_by(days.c.user_id, days.c.day)
+    )
 
-    records = (
-        db.query(TimeTracking)
-        .filter(TimeTracking.user_id == user_id,
-                TimeTracking.timestamp >= start_date,
-                TimeTracking.timestamp <= end_date)
-        .all()
+    stmt = pg_insert(DailyHours).from_select(
+        ["id", "user_id", "day", "hours_worked", "is_deleted", "is_disabled"], totals,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyHours.user_id, DailyHours.day],
+        set_={"hours_worked": stmt.excluded.hours_worked, "update_date": func.now()},
     )
 
-    hours = calculate_hours_worked(records)
+
+def refresh_daily_hours(db: Session, user_id: UUID, day: date):
+    db.execute(_refresh_daily_hours_statement(_listed_days([(user_id, day)])))
+
+
+def refresh_daily_hours_for(db: Session, timestamps_by_user: dict):
+    """Recalcula, en una sola sentencia, los dias afectados por los registros de
+    cada empleado ({user_id: [timestamp, ...]}): su dia y el anterior, por si
+    cierran un turno que empezo antes de medianoche.
+    Los cambios pendientes tienen que estar ya en la base (flush)."""
+    user_days = set()
+    for user_id, timestamps in timestamps_by_user.items():
+        for timestamp in timestamps:
+            if timestamp is None:
+                continue
+            day = _utc_day(timestamp)
+            user_days.update(((user_id, day - timedelta(days=1)), (user_id, day)))
+    if user_days:
+        # Orden fijo: dos lotes concurrentes bloquean las filas de daily_hours en el mismo orden
+        user_days = sorted(user_days, key=lambda d: (str(d[0]), d[1]))
+        db.execute(_refresh_daily_hours_statement(_listed_days(user_days)))
+
+
+def refresh_daily_hours_around(db: Session, user_id: UUID, *timestamps: datetime):
+    refresh_daily_hours_for(db, {user_id: timestamps})
+
+
+def rebuild_daily_hours(db: Session, start_day: date, end_day: date, user_id: Optional[UUID] = None) -> int:
+    """Recalcula daily_hours entre start_day y end_day (incluidos) en un DELETE
+    y un INSERT ... SELECT: entran los dias con fichajes y tambien los que solo
+    tienen ajustes aprobados. Hace commit y devuelve los dias escritos."""
+    archived = archive.archived_months(db)
+    if archived:
+        # Esos fichajes ya no estan en la tabla: su daily_hours es el que vale
+        start_day = max(start_day, add_months(archived[0], 1))
+        if start_day > end_day:
+            return 0
+    start, end = _day_start(start_day), _day_start(end_day + timedelta(days=1))
+
+    # Los dias que ya no tienen fichajes ni ajustes desaparecen
+    stale = db.query(DailyHours).filter(DailyHours.day >= start_day, DailyHours.day <= end_day)
+    if user_id:
+        stale = stale.filter(DailyHours.user_id == user_id)
+    stale.delete(synchronize_session=False)
+    rows = db.execute(_refresh_daily_hours_statement(_days_in_range(start, end, user_id))).rowcount
+    db.commit()
+    return rows
+
+
+def _rollup_hours_worked(db: Session, start_day: date, end_day: date, user_ids=None) -> dict:
+    query = (
+        db.query(DailyHours.user_id, func.sum(DailyHours.hours_worked))
+        .filter(DailyHours.day >= start_day, DailyHours.day <= end_day)
+        .group_by(DailyHours.user_id)
+    )
+    if user_ids is not None:
+        query = query.filter(DailyHours.user_id.in_(user_ids))
+    return {user_id: float(hours) for user_id, hours in query.all()}
+
+
+def _python_hours_worked(db: Session, start: datetime, end: datetime, user_ids=None) -> dict:
+    records = db.query(TimeTracking).filter(TimeTracking.timestamp >= start, TimeTracking.timestamp < end)
+    adjustments = db.query(TimeAdjustment).filter(
+        TimeAdjustment.status == AdjustmentStatusEnum.APPROVED,
+        TimeAdjustment.adjusted_timestamp >= start,
+        TimeAdjustment.adjusted_timestamp < end,
+    )
+    if user_ids is not None:
+        records = records.filter(TimeTracking.user_id.in_(user_ids))
+        adjustments = adjustments.filter(TimeAdjustment.user_id.in_(user_ids))
+
+    records_by_user, adjustments_by_user = {}, {}
+    for record in records.all():
+        records_by_user.setdefault(record.user_id, []).append(record)
+    for adj in adjustments.all():
+        adjustments_by_user.setdefault(adj.user_id, []).append(adj)
+
+    return {
+        user_id: calculate_hours_worked(records_by_user.get(user_id, []), adjustments_by_user.get(user_id, []))
+        for user_id in records_by_user.keys() | adjustments_by_user.keys()
+    }
+
+
+def hours_worked_by_user(
+    db: Session,
+    start_day: date,
+    end_day: date,
+    engine: HoursEngineEnum,
+    user_ids=None,
+) -> dict:
+    """Horas por empleado entre start_day y end_day (incluidos) con el motor pedido.
+    Python, SQL y NumPy calculan sobre el rango exacto; el rollup suma los dias
+    ya calculados (un turno que cruza medianoche cuenta en el dia de entrada)."""
+    if engine == HoursEngineEnum.ROLLUP:
+        return _rollup_hours_worked(db, start_day, end_day, user_ids)
+
+    start, end = _day_start(start_day), _day_start(end_day + timedelta(days=1))
+    if engine == HoursEngineEnum.SQL:
+        return sql_hours_worked(db, start, end, user_ids)
+    if engine == HoursEngineEnum.NUMPY:
+        return batch_hours_worked(db, start, end, user_ids)
+    return _python_hours_worked(db, start, end, user_ids)
+
+
+def _user_hours(db: Session, user_id: UUID, start_day: date, end_day: date, engine: Optional[HoursEngineEnum]) -> float:
+    engine = engine or HoursEngineEnum(settings.HOURS_ENGINE)
+    return hours_worked_by_user(db, start_day, end_day, engine, [user_id]).get(user_id, 0.0)
+
+
+def get_hours_version(db: Session, user_id: UUID, start_day: date, end_day: date):
+    """Version de las horas de un empleado en un rango: clock_states cambia con
+    cada fichaje y con cada ajuste aprobado; daily_hours con los recalculos."""
+    rollup = (
+        db.query(func.max(DailyHours.update_date), func.count(DailyHours.id))
+        .filter(DailyHours.user_id == user_id, DailyHours.day >= start_day, DailyHours.day <= end_day)
+        .first()
+    )
+    clock_state = db.query(ClockState.update_date).filter(ClockState.user_id == user_id).scalar()
+    return (clock_state, *rollup)
+
+
+def get_weekly_hours(db: Session, user_id: UUID, week_start: datetime, engine: Optional[HoursEngineEnum] = None):
+    start_day = _utc_day(week_start)
+    hours = _user_hours(db, user_id, start_day, start_day + timedelta(days=6), engine)
+    return {"hours_worked": hours, "weekly_limit": 40, "over_limit": max(0, hours - 40)}
+
+
+def get_monthly_hours(db: Session, user_id: UUID, year: int, month: int, engine: Optional[HoursEngineEnum] = None):
+    last_day = calendar.monthrange(year, month)[1]
+    hours = _user_hours(db, user_id, date(year, month, 1), date(year, month, last_day), engine)
     monthly_limit = 40 * 4
     return {"hours_worked": hours, "monthly_limit": monthly_limit, "over_limit": max(0, hours - monthly_limit)}
+
+
+def get_company_monthly_hours(db: Session, year: int, month: int, engine: Optional[HoursEngineEnum] = None):
+    """Informe de horas del mes de toda la plantilla activa."""
+    engine = engine or HoursEngineEnum(settings.HOURS_REPORT_ENGINE)
+    last_day = calendar.monthrange(year, month)[1]
+    hours = hours_worked_by_user(db, date(year, month, 1), date(year, month, last_day), engine)
+    monthly_limit = 40 * 4
+
+    users = db.query(User.id, User.full_name).filter(User.is_active.is_(True)).order_by(User.full_name).all()
+    return [
+        {
+            "user_id": user_id,
+            "full_name": full_name,
+            "hours_worked": hours.get(user_id, 0.0),
+            "monthly_limit": monthly_limit,
+            "over_limit": max(0, hours.get(user_id, 0.0) - monthly_limit),
+        }
+        for user_id, full_name in users
+    ]
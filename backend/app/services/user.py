@@ -1,10 +1,12 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Float, and_, func, literal
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from app.models.user import User
 from app.models.role import Role
 from app.schemas.user import UserCreate, UserOut, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_password, verify_password_async
 from app.core.exceptions import not_found, forbidden
 from app.schemas.enum import UserRole
 from app.schemas.user import UserCreate
@@ -12,6 +14,8 @@ from app.models.role import Role
 from app.models.leave_balance import LeaveBalance
 from app.core.security import get_password_hash
 from app.schemas.enum import LeaveTypeEnum
+from app.schemas.auth import Principal, PrincipalRole
+from app.core.principal_cache import principal_cache, notify_principal_changed
 
 def get_role_by_name(db: Session, name: str):
     return db.query(Role).filter(Role.name == name).first()
@@ -26,6 +30,26 @@ def get_user_by_id(db: Session, user_id: str) -> User:
         .filter(User.id == user_id)
         .first()
     )
+
+def get_principal(db: Session, user_id: str):
+    row = (
+        db.query(User.id, User.is_active, Role.name)
+        .outerjoin(Role, User.role_id == Role.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if not row:
+        return None
+    user_id, is_active, role_name = row
+    return Principal(
+        id=user_id,
+        is_active=bool(is_active),
+        role=PrincipalRole(name=role_name) if role_name else None,
+    )
+
+async def get_principal_async(db: AsyncSession, user_id: str):
+    return await db.run_sync(get_principal, user_id)
+
 def create_user(db: Session, user: UserCreate):
     hashed_password = get_password_hash(user.password)
     role_name = user.role.value if user.role else UserRole.EMPLOYEE.value
@@ -65,11 +89,16 @@ def create_user(db: Session, user: UserCreate):
 
 
 
+def _profile_balance(balances, year: int):
+    """Saldo del que salen los initial_* del usuario: el de vacaciones del año.
+    get_all_users_rows y update_user usan el mismo."""
+    return next((b for b in balances if b.year == year and b.leave_type == LeaveTypeEnum.VACATION), None)
+
+
 def to_user_out(user: User) -> UserOut:
-    current_year = datetime.now().year
     balance = None
     if hasattr(user, "leave_balances") and user.leave_balances:
-        balance = next((b for b in user.leave_balances if b.year == current_year), None)
+        balance = _profile_balance(user.leave_balances, datetime.now().year)
 
     return UserOut(
         id=user.id,
@@ -94,11 +123,60 @@ def get_user_out_by_id(db: Session, user_id: str) -> UserOut:
         raise not_found("User not found")
     return to_user_out(user)
 
+def get_user_out_version(db: Session, user_id):
+    """Lo que cambia cuando cambia get_user_out_by_id: el usuario, su rol y su
+    saldo de vacaciones del año. Una sola fila, sin cargar entidades."""
+    year = datetime.now().year
+    balances_updated = (
+        db.query(func.max(LeaveBalance.update_date))
+        .filter(LeaveBalance.user_id == User.id, LeaveBalance.year == year,
+                LeaveBalance.leave_type == LeaveTypeEnum.VACATION)
+        .scalar_subquery()
+    )
+    row = (
+        db.query(User.update_date, Role.update_date, balances_updated)
+        .outerjoin(Role, User.role_id == Role.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+    return None if row is None else (year, *row)
+
+
 def get_all_users_out(db: Session):
-    users = db.query(User).all()
+    # to_user_out lee role y leave_balances de cada usuario
+    users = db.query(User).options(joinedload(User.role), selectinload(User.leave_balances)).all()
     return [to_user_out(u) for u in users]
 
 
+def get_all_users_rows(db: Session) -> list[dict]:
+    """Lo mismo que get_all_users_out, ya con la forma de UserOut y en una sola
+    consulta (saldo de vacaciones del año en curso)."""
+    rows = (
+        db.query(
+            User.id,
+            User.username,
+            User.email,
+            User.full_name,
+            User.is_active,
+            User.role_id,
+            func.coalesce(Role.name, literal("Unknown")).label("role"),
+            User.create_date,
+            User.update_date,
+            func.coalesce(LeaveBalance.remaining_days.cast(Float), 0).label("initial_vacation_days"),
+            func.coalesce(LeaveBalance.weekly_hours, 40).label("initial_weekly_hours"),
+            func.coalesce(LeaveBalance.monthly_hours, 0).label("initial_monthly_hours"),
+        )
+        .outerjoin(Role, User.role_id == Role.id)
+        .outerjoin(LeaveBalance, and_(
+            LeaveBalance.user_id == User.id,
+            LeaveBalance.year == datetime.now().year,
+            LeaveBalance.leave_type == LeaveTypeEnum.VACATION,
+        ))
+        .all()
+    )
+    return [row._asdict() for row in rows]
+
+
 def update_user(db: Session, user: User, new_data: UserUpdate, current_user: User):
     if current_user.role.name != UserRole.RRHH.value:
         allowed_fields = ["username", "email", "full_name"]
@@ -120,7 +198,8 @@ def update_user(db: Session, user: User, new_data: UserUpdate, current_user: Use
 
     balance = (
         db.query(LeaveBalance)
-        .filter(LeaveBalance.user_id == user.id, LeaveBalance.year == datetime.now().year)
+        .filter(LeaveBalance.user_id == user.id, LeaveBalance.year == datetime.now().year,
+                LeaveBalance.leave_type == LeaveTypeEnum.VACATION)
         .first()
     )
     if balance:
@@ -132,8 +211,10 @@ def update_user(db: Session, user: User, new_data: UserUpdate, current_user: Use
             balance.remaining_days = new_data.initial_vacation_days
         balance.last_updated = datetime.utcnow()
 
+    notify_principal_changed(db, user.id)
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
     return user
 
 def delete_user(db: Session, user_id: str, current_user: User):
@@ -144,17 +225,31 @@ def delete_user(db: Session, user_id: str, current_user: User):
         raise forbidden("Not authorized")
 
     user.is_active = False
+    notify_principal_changed(db, user.id)
     db.commit()
+    principal_cache.invalidate(user.id)
     return {"message": "User deactivated"}
 
 
-def authenticate_user(db: Session, login: str, password: str):
-    user = (
+def _get_user_by_login(db: Session, login: str):
+    return (
         db.query(User)
         .options(joinedload(User.role))
         .filter((User.email == login) | (User.username == login))
         .first()
     )
+
+
+def authenticate_user(db: Session, login: str, password: str):
+    user = _get_user_by_login(db, login)
     if not user or not verify_password(password, user.hashed_password):
         return None
     return user
+
+
+async def authenticate_user_async(db: AsyncSession, login: str, password: str):
+    user = await db.run_sync(_get_user_by_login, login)
+    if not user or not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
@@ -0,0 +1,83 @@
+"""Compara calculate_hours_worked (un empleado cada vez) con el motor vectorizado.
+
+    python -m benchmarks.hours_engine --employees 10000 --days 22
+
+No necesita base de datos: genera fichajes sinteticos en memoria.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.hours_engine import hours_by_user
+from app.services.time_tracking import calculate_hours_worked
+
+
+def generate(employees: int, days: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2025, 10, 1, tzinfo=timezone.utc)
+    records = []
+    for user in range(employees):
+        for day in range(days):
+            check_in = start + timedelta(days=day, hours=8, minutes=rng.randint(-30, 60))
+            check_out = check_in + timedelta(hours=8, minutes=rng.randint(-60, 90))
+            records.append((user, "CHECK_IN", check_in))
+            records.append((user, "CHECK_OUT", check_out))
+            # Algun olvido: entrada repetida o salida sin entrada
+            if rng.random() < 0.02:
+                records.append((user, rng.choice(["CHECK_IN", "CHECK_OUT"]), check_out + timedelta(minutes=30)))
+    rng.shuffle(records)
+    return records
+
+
+def run_python(records, employees):
+    by_user = [[] for _ in range(employees)]
+    for user, record_type, timestamp in records:
+        by_user[user].append(SimpleNamespace(record_type=record_type, timestamp=timestamp))
+    return np.array([calculate_hours_worked(user_records) for user_records in by_user])
+
+
+def to_columns(records):
+    # En batch_hours_worked estas columnas salen ya de SQL (EXTRACT(EPOCH ...))
+    user_codes = np.fromiter((r[0] for r in records), dtype=np.int64, count=len(records))
+    epoch_seconds = np.fromiter((r[2].timestamp() for r in records), dtype=np.float64, count=len(records))
+    is_check_in = np.fromiter((r[1] == "CHECK_IN" for r in records), dtype=bool, count=len(records))
+    return user_codes, epoch_seconds, is_check_in
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=22)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    records = generate(args.employees, args.days, args.seed)
+    python_hours, python_seconds = timed(run_python, records, args.employees)
+    columns, columns_seconds = timed(to_columns, records)
+    numpy_hours, numpy_seconds = timed(hours_by_user, *columns, args.employees)
+
+    print(json.dumps({
+        "employees": args.employees,
+        "records": len(records),
+        "python_seconds": round(python_seconds, 4),
+        "numpy_seconds": round(numpy_seconds, 4),
+        "numpy_columns_seconds": round(columns_seconds, 4),
+        "speedup": round(python_seconds / numpy_seconds, 1),
+        "speedup_with_columns": round(python_seconds / (numpy_seconds + columns_seconds), 1),
+        "same_results": bool(np.allclose(python_hours, numpy_hours)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Prueba de carga de los endpoints calientes contra un Postgres local.
+
+    python -m benchmarks.loadtest --employees 2000 --concurrency 50 --workers 4
+
+Siembra empleados "bench_*" (borra los de la ejecucion anterior), arranca uvicorn
+con `app.main:app` y lanza los escenarios con un cliente HTTP async:
+
+    clock_in_burst   POST /time-tracking/ de cada empleado (entrada de la mañana)
+    hr_search        GET /time-tracking/search por nombre
+    login_storm      POST /auth/login
+    monthly_report   GET /time-tracking/report/monthly y /time-tracking/monthly
+
+Imprime un JSON con p50/p95/p99 y peticiones por segundo de cada escenario, para
+comparar entre commits. Usa DATABASE_URL y el resto de variables del backend.
+Con --base-url se usa un servidor ya arrancado (hay que sembrar con el mismo
+DATABASE_URL).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+import numpy as np
+from sqlalchemy import delete, insert
+
+from app.core.security import create_access_token, pwd_context
+from app.database import SessionLocal
+from app.models import LeaveBalance, Role, TimeTracking, User
+from app.schemas.enum import LeaveTypeEnum, RecordTypeEnum, UserRole
+from app.services.partitions import ensure_partitions
+from app.services.time_tracking import rebuild_daily_hours, sync_clock_states
+
+BENCH_PREFIX = "bench_"
+BENCH_PASSWORD = "bench-password"
+INSERT_CHUNK = 10000
+FIRST_NAMES = ["Ana", "Luis", "Marta", "Javier", "Lucia", "Carlos", "Elena", "Pablo", "Sara", "Diego", "Nerea", "Hugo"]
+LAST_NAMES = ["Garcia", "Lopez", "Martinez", "Sanchez", "Perez", "Gomez", "Fernandez", "Ruiz", "Diaz", "Moreno"]
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _chunks(rows, size=INSERT_CHUNK):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def seed(employees: int, days: int, rng: random.Random) -> dict:
+    """Crea los empleados bench_* con `days` dias de historial (entrada y salida)
+    terminando ayer, y un usuario de RRHH. Devuelve ids y tokens."""
+    db = SessionLocal()
+    try:
+        db.execute(delete(User).where(User.username.like(f"{BENCH_PREFIX}%")))
+        db.commit()
+        ensure_partitions(db, date.today() - timedelta(days=days), date.today())
+
+        roles = {role.name: role.id for role in db.query(Role).all()}
+        if not roles:
+            raise SystemExit("No hay roles: ejecuta antes las migraciones y app.seed_data")
+
+        # Un solo hash: bcrypt es caro y todos comparten contraseña
+        hashed_password = pwd_context.hash(BENCH_PASSWORD)
+        users = []
+        for i in range(employees + 1):
+            is_hr = i == employees
+            users.append({
+                "id": uuid4(),
+                "username": f"{BENCH_PREFIX}{'rrhh' if is_hr else i}",
+                "email": f"{BENCH_PREFIX}{'rrhh' if is_hr else i}@bench.example.com",
+                "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+                "hashed_password": hashed_password,
+                "is_active": True,
+                "role_id": roles[UserRole.RRHH.value if is_hr else UserRole.EMPLOYEE.value],
+            })
+        db.execute(insert(User), users)
+
+        today = date.today()
+        first_day = today - timedelta(days=days)
+        records, balances = [], []
+        for user in users[:employees]:
+            for offset in range(days):
+                day = datetime.combine(first_day + timedelta(days=offset), dt_time(8), tzinfo=timezone.utc)
+                check_in = day + timedelta(minutes=rng.randint(-30, 60))
+                check_out = check_in + timedelta(hours=8, minutes=rng.randint(-60, 90))
+                records.append({"id": uuid4(), "user_id": user["id"], "record_type": RecordTypeEnum.CHECK_IN, "timestamp": check_in})
+                records.append({"id": uuid4(), "user_id": user["id"], "record_type": RecordTypeEnum.CHECK_OUT, "timestamp": check_out})
+            balances.append({
+                "id": uuid4(), "user_id": user["id"], "year": today.year, "leave_type": LeaveTypeEnum.VACATION,
+                "used_days": 0, "remaining_days": 22, "total_days": 22, "weekly_hours": 40.0,
+                "monthly_hours": 40 * 4.33, "last_updated": datetime.utcnow(),
+            })
+        for chunk in _chunks(records):
+            db.execute(insert(TimeTracking), chunk)
+        for chunk in _chunks(balances):
+            db.execute(insert(LeaveBalance), chunk)
+        sync_clock_states(db)
+        db.commit()
+
+        if days:
+            rebuild_daily_hours(db, first_day, today)
+
+        hr = users[-1]
+        return {
+            "employees": [
+                {"id": u["id"], "username": u["username"], "full_name": u["full_name"],
+                 "token": create_access_token({"sub": str(u["id"]), "role": UserRole.EMPLOYEE.value})}
+                for u in users[:employees]
+            ],
+            "hr_token": create_access_token({"sub": str(hr["id"]), "role": UserRole.RRHH.value}),
+            "records": len(records),
+        }
+    finally:
+        db.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/docs").status_code == 200:
+                return process, base_url
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            raise SystemExit("uvicorn termino antes de arrancar")
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("uvicorn no respondio en 30 s")
+
+
+async def run_scenario(client: httpx.AsyncClient, requests: list, concurrency: int) -> dict:
+    """Ejecuta `requests` (kwargs de client.request) con `concurrency` en vuelo."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async def one(kwargs):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status = (await client.request(**kwargs)).status_code
+            except httpx.TransportError:
+                status = "transport_error"
+            latencies.append(time.perf_counter() - start)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(kwargs) for kwargs in requests))
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(requests),
+        "errors": errors,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+        "p95_ms": round(float(np.percentile(ms, 95)), 2) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+    }
+
+
+def build_scenarios(data: dict, args, rng: random.Random) -> dict:
+    employees = data["employees"]
+    hr_headers = {"Authorization": f"Bearer {data['hr_token']}"}
+    today = date.today()
+
+    clock_in = [
+        {"method": "POST", "url": "/time-tracking/", "json": {"record_type": "CHECK_IN"},
+         "headers": {"Authorization": f"Bearer {e['token']}"}}
+        for e in employees
+    ]
+    search = [
+        {"method": "GET", "url": "/time-tracking/search", "headers": hr_headers,
+         "params": {"user_full_name": rng.choice(FIRST_NAMES + LAST_NAMES), "limit": 50}}
+        for _ in range(args.searches)
+    ]
+    logins = [
+        {"method": "POST", "url": "/auth/login",
+         "data": {"username": rng.choice(employees)["username"], "password": BENCH_PASSWORD}}
+        for _ in range(args.logins)
+    ]
+    reports = [
+        {"method": "GET", "url": "/time-tracking/report/monthly", "headers": hr_headers,
+         "params": {"year": today.year, "month": today.month}}
+        for _ in range(args.reports)
+    ] + [
+        {"method": "GET", "url": "/time-tracking/monthly",
+         "headers": {"Authorization": f"Bearer {e['token']}"},
+         "params": {"year": today.year, "month": today.month}}
+        for e in rng.sample(employees, min(len(employees), args.reports * 10))
+    ]
+    return {"clock_in_burst": clock_in, "hr_search": search, "login_storm": logins, "monthly_report": reports}
+
+
+async def run_all(base_url: str, scenarios: dict, selected: list, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        return {name: await run_scenario(client, scenarios[name], concurrency) for name in selected}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    scenario_names = ["clock_in_burst", "hr_search", "login_storm", "monthly_report"]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=22, help="Dias de historial por empleado")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn")
+    parser.add_argument("--searches", type=int, default=500)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--reports", type=int, default=5)
+    parser.add_argument("--scenario", action="append", choices=scenario_names,
+                        help="Repetible; por defecto todos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="Servidor ya arrancado (no se lanza uvicorn)")
+    parser.add_argument("--output", type=Path, help="Ademas de imprimirlo, guarda el JSON aqui")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    data = seed(args.employees, args.days, rng)
+    seed_seconds = time.perf_counter() - start
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process, base_url = start_server(args.workers)
+    try:
+        scenarios = build_scenarios(data, args, rng)
+        results = asyncio.run(run_all(base_url, scenarios, args.scenario or scenario_names, args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "commit": _git_commit(),
+        "params": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "seeded_records": data["records"],
+        "seed_seconds": round(seed_seconds, 2),
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Meses archivados en Parquet: los listados sacan el total de
+time_tracking_archives y solo abren los ficheros cuando la pagina llega a ellos."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import TimeTracking, TimeTrackingArchive
+from app.schemas.enum import RecordTypeEnum
+from app.services import archive
+from app.services import time_tracking as time_tracking_service
+from conftest import auth_headers
+
+# Anterior al dataset generado: sin particion propia, cae en la DEFAULT
+MONTH = date(2019, 3, 1)
+
+
+@pytest.fixture
+def archived_month(new_employee):
+    user = new_employee("Empleado Archivado")
+    start = datetime(MONTH.year, MONTH.month, 4, 9, tzinfo=timezone.utc)
+    with Session(engine) as db:
+        db.add_all([
+            TimeTracking(user_id=user.id, record_type=record_type, timestamp=start + timedelta(days=day, hours=hours))
+            for day in range(5)
+            for record_type, hours in ((RecordTypeEnum.CHECK_IN, 0), (RecordTypeEnum.CHECK_OUT, 8))
+        ])
+        db.commit()
+        result = archive.archive_month(db, MONTH)
+    assert result["rows"] == 10
+    yield user
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM time_tracking_archives WHERE month = :month"), {"month": MONTH})
+    archive.archive_path(MONTH).unlink(missing_ok=True)
+
+
+def test_archive_records_counts(archived_month):
+    with Session(engine) as db:
+        assert archive.archived_months(db) == [MONTH]
+        rows = db.query(TimeTrackingArchive.user_id, TimeTrackingArchive.records).all()
+        assert rows == [(archived_month.id, 10)]
+        # El mes ya no esta en la tabla
+        assert db.query(TimeTracking).filter(TimeTracking.user_id == archived_month.id).count() == 0
+
+
+def test_empty_user_list_reads_nothing(archived_month):
+    with Session(engine) as db:
+        assert archive.count_records(db, []) == 0
+        assert archive.read_page(db, [], None, 0, 10) == []
+        assert archive.count_records(db, [archived_month.id]) == 10
+
+
+def test_search_without_match(client, hr_headers, archived_month):
+    response = client.get(
+        "/time-tracking/search",
+        params={"user_full_name": "nadie se llama asi", "include_archived": True},
+        headers=hr_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["total"] == 0
+    assert response.json()["results"] == []
+
+
+def test_user_history_continues_into_archive(client, archived_month):
+    response = client.get("/time-tracking/", params={"limit": 20}, headers=auth_headers(archived_month.id))
+    assert response.status_code == 200, response.text
+    page = response.json()
+    assert page["total"] == 10
+    assert len(page["results"]) == 10
+    assert all(r["timestamp"].startswith(f"{MONTH:%Y-%m}") for r in page["results"])
+
+
+def test_files_opened_only_when_page_reaches_archive(archived_month, database, monkeypatch):
+    opened = []
+    read_month = archive._read_month
+    monkeypatch.setattr(archive, "_read_month", lambda month, *args, **kwargs: opened.append(month) or
+                        read_month(month, *args, **kwargs))
+    with Session(engine) as db:
+        # Un empleado del dataset llena la pagina con la tabla
+        page = time_tracking_service.search_time_records_with_user_info(db, limit=20, include_archived=True)
+        assert page["total"] >= 10
+        assert opened == []
+
+        # Sin fichajes en la tabla: la pagina sigue por su mes archivado
+        page = time_tracking_service.get_time_records_by_user_with_user_info(db, archived_month.id, limit=20)
+        assert len(page["results"]) == 10
+        assert opened == [MONTH]
@@ -0,0 +1,60 @@
+"""Ingesta por lotes: bloquea clock_states tambien de los empleados que aun no
+tienen fila, para que un fichaje individual simultaneo espere al lote."""
+from datetime import datetime, timedelta, timezone
+
+import psycopg2
+import pytest
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import ClockState, User
+from app.schemas.enum import RecordTypeEnum
+from app.schemas.time_tracking import TimeTrackingBatchEvent
+from app.services import time_tracking as time_tracking_service
+from conftest import TEST_DATABASE_URL
+
+IN, OUT = RecordTypeEnum.CHECK_IN, RecordTypeEnum.CHECK_OUT
+
+
+def test_batch_for_user_without_clock_state(db, database):
+    user = User(username="lote_nuevo", email="lote_nuevo@example.com", full_name="Lote Nuevo",
+                hashed_password="x", is_active=True, role_id=database.employee_role_id)
+    db.add(user)
+    db.flush()
+    start = datetime.now(timezone.utc) - timedelta(hours=2)
+    events = [
+        TimeTrackingBatchEvent(record_type=IN, timestamp=start),
+        TimeTrackingBatchEvent(record_type=OUT, timestamp=start + timedelta(hours=1)),
+    ]
+
+    result = time_tracking_service.create_time_records_batch(db, user.id, events)
+
+    assert result["accepted"] == 2
+    state = db.query(ClockState).filter(ClockState.user_id == user.id).one()
+    assert (state.record_type, state.timestamp) == (OUT, start + timedelta(hours=1))
+    assert state.record_id == result["results"][1]["id"]
+
+
+def test_batch_locks_user_without_clock_state(new_employee):
+    user = new_employee()
+    with Session(engine) as batch:
+        locked = time_tracking_service._lock_clock_states(batch, [user.id], datetime.now(timezone.utc))
+        # Sin fila previa: no hay fichaje anterior
+        assert locked == {}
+
+        # Un fichaje individual (INSERT ... ON CONFLICT) tiene que esperar al lote
+        other = psycopg2.connect(TEST_DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://"))
+        try:
+            with other.cursor() as cursor:
+                cursor.execute("SET lock_timeout = '200ms'")
+                with pytest.raises(psycopg2.errors.LockNotAvailable):
+                    cursor.execute(
+                        "INSERT INTO clock_states (id, user_id, record_type, timestamp, record_id) "
+                        "VALUES (gen_random_uuid(), %s, 'CHECK_IN', now(), gen_random_uuid()) "
+                        "ON CONFLICT (user_id) DO NOTHING",
+                        (str(user.id),),
+                    )
+            other.rollback()
+        finally:
+            other.close()
+        batch.rollback()
@@ -0,0 +1,196 @@
+"""daily_hours se recalcula con una sola sentencia y da lo mismo que el calculo
+en Python (_daily_hours_from_records, el que usa generate_dataset)."""
+import importlib.util
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import event, text
+
+from app.models import DailyHours, TimeAdjustment, TimeTracking, User
+from app.schemas.enum import AdjustmentStatusEnum, AdjustmentTypeEnum, RecordTypeEnum
+from app.services.time_tracking import (
+    _approved_adjustments, _daily_hours_from_records, _day_start, rebuild_daily_hours, refresh_daily_hours_around,
+    refresh_daily_hours_for,
+)
+
+IN, OUT = RecordTypeEnum.CHECK_IN, RecordTypeEnum.CHECK_OUT
+FIRST_DAY = (datetime.now(timezone.utc) - timedelta(days=40)).date()
+
+
+def at(day: int, hour: float) -> datetime:
+    return _day_start(FIRST_DAY) + timedelta(days=day, hours=hour)
+
+
+def _stored_hours(db, user_id) -> dict:
+    return {day: hours for day, hours in
+            db.query(DailyHours.day, DailyHours.hours_worked).filter(DailyHours.user_id == user_id).all()}
+
+
+def _expected_hours(db, user_id, first: date, last: date) -> dict:
+    expected = {}
+    day = first
+    while day <= last:
+        start, end = _day_start(day), _day_start(day + timedelta(days=1))
+        # Un dia de margen para el registro que cierra el turno, como refresh_daily_hours
+        records = (
+            db.query(TimeTracking)
+            .filter(TimeTracking.user_id == user_id, TimeTracking.timestamp >= start,
+                    TimeTracking.timestamp < end + timedelta(days=1))
+            .all()
+        )
+        hours = _daily_hours_from_records(records, _approved_adjustments(db, user_id, start, end))
+        expected[day] = hours.get(day, 0.0)
+        day += timedelta(days=1)
+    return expected
+
+
+def _assert_same_hours(stored: dict, expected: dict):
+    # Los dias sin turnos cerrados tambien se guardan, a 0
+    for day, hours in stored.items():
+        assert abs(hours - expected.get(day, 0.0)) < 1e-6, day
+    for day, hours in expected.items():
+        assert abs(stored.get(day, 0.0) - hours) < 1e-6, day
+
+
+def _new_user(db, database, username: str) -> User:
+    user = User(username=username, email=f"{username}@example.com", full_name=username,
+                hashed_password="x", is_active=True, role_id=database.employee_role_id)
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _add_history(db, user_id):
+    records = [
+        (IN, at(0, 9)), (OUT, at(0, 17)),
+        # Entrada repetida y salida sin entrada
+        (IN, at(1, 8)), (IN, at(1, 9)), (OUT, at(1, 15)), (OUT, at(1, 16)),
+        # Turno de noche: cuenta en el dia de entrada
+        (IN, at(2, 22)), (OUT, at(3, 6)),
+        (IN, at(3, 21)), (OUT, at(4, 5)),
+        # Entrada que queda abierta
+        (IN, at(5, 9)),
+    ]
+    db.add_all([TimeTracking(user_id=user_id, record_type=t, timestamp=ts) for t, ts in records])
+    db.add_all([
+        TimeAdjustment(user_id=user_id, adjusted_type=AdjustmentTypeEnum.EXIT_CORRECTION,
+                       status=AdjustmentStatusEnum.APPROVED, adjusted_timestamp=at(5, 14), reason="olvido"),
+        TimeAdjustment(user_id=user_id, adjusted_type=AdjustmentTypeEnum.MANUAL_ENTRY,
+                       status=AdjustmentStatusEnum.APPROVED, adjusted_timestamp=at(6, 10), reason="a mano"),
+        TimeAdjustment(user_id=user_id, adjusted_type=AdjustmentTypeEnum.EXIT_CORRECTION,
+                       status=AdjustmentStatusEnum.APPROVED, adjusted_timestamp=at(6, 13), reason="a mano"),
+        TimeAdjustment(user_id=user_id, adjusted_type=AdjustmentTypeEnum.EXIT_CORRECTION,
+                       status=AdjustmentStatusEnum.PENDING, adjusted_timestamp=at(0, 12), reason="pendiente"),
+    ])
+    db.flush()
+
+
+def _add_adjustments_only(db, user_id):
+    # Turno entero a mano, sin ningun fichaje
+    db.add_all([
+        TimeAdjustment(user_id=user_id, adjusted_type=AdjustmentTypeEnum.MANUAL_ENTRY,
+                       status=AdjustmentStatusEnum.APPROVED, adjusted_timestamp=at(2, 9), reason="a mano"),
+        TimeAdjustment(user_id=user_id, adjusted_type=AdjustmentTypeEnum.EXIT_CORRECTION,
+                       status=AdjustmentStatusEnum.APPROVED, adjusted_timestamp=at(2, 15), reason="a mano"),
+    ])
+    db.flush()
+
+
+def test_refresh_matches_python(db, database):
+    user = _new_user(db, database, "horas_diarias")
+    _add_history(db, user.id)
+
+    refresh_daily_hours_for(db, {user.id: [at(day, 12) for day in range(8)]})
+
+    stored = _stored_hours(db, user.id)
+    assert set(stored) == {FIRST_DAY + timedelta(days=day) for day in range(-1, 8)}
+    _assert_same_hours(stored, _expected_hours(db, user.id, FIRST_DAY, FIRST_DAY + timedelta(days=7)))
+    assert abs(stored[FIRST_DAY + timedelta(days=2)] - 8) < 1e-6
+
+
+def test_refresh_matches_generated_dataset(db, database):
+    # generate_dataset rellena daily_hours con _daily_hours_from_records
+    user_id = database.employee_ids[0]
+    first, last = FIRST_DAY, FIRST_DAY + timedelta(days=27)
+    expected = _expected_hours(db, user_id, first, last)
+
+    refresh_daily_hours_for(db, {user_id: [_day_start(first + timedelta(days=day)) for day in range(28)]})
+
+    stored = {day: hours for day, hours in _stored_hours(db, user_id).items() if first <= day <= last}
+    _assert_same_hours(stored, expected)
+
+
+def test_refresh_is_one_statement(db, database):
+    statements = []
+    connection = db.connection()
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(connection, "before_cursor_execute", count)
+    try:
+        refresh_daily_hours_around(db, database.employee_ids[0], datetime.now(timezone.utc))
+    finally:
+        event.remove(connection, "before_cursor_execute", count)
+    assert len(statements) == 1
+
+
+def test_rebuild_matches_python(db, database):
+    user = _new_user(db, database, "horas_rebuild")
+    _add_history(db, user.id)
+    adjusted = _new_user(db, database, "horas_solo_ajustes")
+    _add_adjustments_only(db, adjusted.id)
+    last = FIRST_DAY + timedelta(days=7)
+    # Dia sin fichajes ni ajustes: el rebuild lo borra
+    db.add(DailyHours(user_id=user.id, day=FIRST_DAY - timedelta(days=3), hours_worked=5))
+    db.flush()
+
+    rows = rebuild_daily_hours(db, FIRST_DAY - timedelta(days=3), last)
+
+    stored = _stored_hours(db, user.id)
+    assert set(stored) == {FIRST_DAY + timedelta(days=day) for day in range(7)}
+    _assert_same_hours(stored, _expected_hours(db, user.id, FIRST_DAY, last))
+    assert _stored_hours(db, adjusted.id) == {FIRST_DAY + timedelta(days=2): 6}
+    # Todo el rango, no solo los dos empleados nuevos
+    assert rows > len(stored) + 1
+
+
+def test_rebuild_is_set_based(db, database):
+    statements = []
+    connection = db.connection()
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(connection, "before_cursor_execute", count)
+    try:
+        rebuild_daily_hours(db, FIRST_DAY, FIRST_DAY + timedelta(days=6))
+    finally:
+        event.remove(connection, "before_cursor_execute", count)
+    # DELETE e INSERT ... SELECT, mas el control de transaccion del fixture
+    assert len([s for s in statements if s.lstrip().upper().startswith(("DELETE", "INSERT", "WITH"))]) == 2
+    # La unica lectura es la de los meses archivados
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 1 and "time_tracking_archives" in selects[0]
+
+
+def test_migration_backfill_matches_rebuild(db, database):
+    user = _new_user(db, database, "horas_migracion")
+    _add_history(db, user.id)
+    adjusted = _new_user(db, database, "horas_migracion_ajustes")
+    _add_adjustments_only(db, adjusted.id)
+    rebuild_daily_hours(db, FIRST_DAY - timedelta(days=1), FIRST_DAY + timedelta(days=8), user.id)
+    rebuild_daily_hours(db, FIRST_DAY - timedelta(days=1), FIRST_DAY + timedelta(days=8), adjusted.id)
+    expected = {user_id: _stored_hours(db, user_id) for user_id in (user.id, adjusted.id)}
+
+    path = next(Path(__file__).parents[1].glob("alembic/versions/c3e9d5a1b7f2_*.py"))
+    spec = importlib.util.spec_from_file_location("daily_hours_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    db.query(DailyHours).filter(DailyHours.user_id.in_(expected)).delete(synchronize_session=False)
+    db.execute(text(migration.BACKFILL_DAILY_HOURS))
+
+    for user_id, hours in expected.items():
+        stored = _stored_hours(db, user_id)
+        assert set(stored) == set(hours)
+        _assert_same_hours(stored, hours)
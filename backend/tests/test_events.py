@@ -0,0 +1,124 @@
+"""Eventos en tiempo real: los fichajes se publican despues del commit y en
+lote; el stream SSE solo se suscribe cuando empieza a enviar."""
+import asyncio
+import json
+import select
+import time
+
+import psycopg2
+import pytest
+from sqlalchemy import event
+
+from app.models import User
+from app.core.events import EVENTS_CHANNEL, broadcaster, event_publisher
+from app.database import engine
+from app.routers.events import _event_stream
+from app.schemas.enum import EventTypeEnum
+from app.schemas.time_tracking import TimeTrackingCreate
+from app.services import time_tracking as time_tracking_service
+from conftest import TEST_DATABASE_URL, auth_headers
+
+
+@pytest.fixture
+def listener(database):
+    """Conexion con LISTEN en el canal de eventos; devuelve una funcion que
+    espera hasta recibir los eventos que cumplan la condicion."""
+    connection = psycopg2.connect(TEST_DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://"))
+    connection.autocommit = True
+    connection.cursor().execute(f"LISTEN {EVENTS_CHANNEL}")
+
+    def wait_for(condition, count: int = 1, timeout: float = 5) -> list[dict]:
+        received = []
+        deadline = time.monotonic() + timeout
+        while len(received) < count:
+            remaining = deadline - time.monotonic()
+            assert remaining > 0, f"solo {len(received)} de {count} eventos"
+            select.select([connection], [], [], remaining)
+            connection.poll()
+            while connection.notifies:
+                payload = json.loads(connection.notifies.pop(0).payload)
+                if condition(payload):
+                    received.append(payload)
+        return received
+
+    yield wait_for
+    connection.close()
+
+
+def test_clock_in_does_not_notify_in_transaction(db, database, monkeypatch):
+    user = User(username="evento_fichaje", email="evento_fichaje@example.com", full_name="Evento Fichaje",
+                hashed_password="x", is_active=True, role_id=database.employee_role_id)
+    db.add(user)
+    db.flush()
+    published = []
+    monkeypatch.setattr(event_publisher, "publish", lambda events: published.extend(events))
+    statements = []
+    connection = db.connection()
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        time_tracking_service.create_time_record(db, user.id, TimeTrackingCreate(record_type="CHECK_IN"))
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+    assert not [s for s in statements if "pg_notify" in s]
+    (event_type, user_id, data), = published
+    assert (event_type, user_id) == (EventTypeEnum.CLOCK, user.id)
+
+
+def test_clock_in_event_is_delivered(client, listener, new_employee):
+    user = new_employee()
+    response = client.post("/time-tracking/", json={"record_type": "CHECK_IN"}, headers=auth_headers(user.id))
+    assert response.status_code == 200, response.text
+
+    event_, = listener(lambda e: e["user_id"] == str(user.id))
+    assert event_["type"] == EventTypeEnum.CLOCK.value
+    assert event_["id"] == response.json()["id"]
+
+
+def test_publisher_sends_batch_in_one_statement(listener, new_employee, monkeypatch):
+    user = new_employee()
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        # Sin hilo: se vacia a mano
+        monkeypatch.setattr(event_publisher, "interval", 3600)
+        event_publisher.publish((EventTypeEnum.CLOCK, user.id, {"n": n}) for n in range(50))
+        event_publisher.flush()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert len([s for s in statements if "pg_notify" in s]) == 1
+    assert sorted(e["n"] for e in listener(lambda e: e["user_id"] == str(user.id), count=50)) == list(range(50))
+
+
+class _Request:
+    async def is_disconnected(self):
+        return False
+
+
+def test_stream_subscribes_when_it_starts(monkeypatch):
+    # Sin conexion LISTEN real: solo cuenta suscripciones
+    monkeypatch.setattr(broadcaster, "_start", lambda: None)
+    before = len(broadcaster._subscriptions)
+
+    async def scenario():
+        # Respuesta creada pero nunca enviada (cliente desconectado antes de empezar)
+        abandoned = _event_stream(_Request(), None, None)
+        assert len(broadcaster._subscriptions) == before
+        await abandoned.aclose()
+
+        stream = _event_stream(_Request(), [EventTypeEnum.CLOCK], None)
+        assert (await stream.__anext__()).startswith("retry:")
+        assert len(broadcaster._subscriptions) == before + 1
+        await stream.aclose()
+        assert len(broadcaster._subscriptions) == before
+
+    asyncio.run(scenario())
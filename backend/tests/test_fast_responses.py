@@ -0,0 +1,72 @@
+"""Con FAST_JSON_RESPONSES los listados salen de proyecciones SQL serializadas
+con orjson; el JSON tiene que ser el mismo que el de la ruta con pydantic."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import engine
+from app.models import LeaveBalance
+from app.schemas.enum import LeaveTypeEnum
+
+
+@pytest.fixture
+def get_both(client, hr_headers, monkeypatch):
+    """JSON de la misma peticion por la ruta pydantic y por la rapida."""
+    def get(path: str):
+        bodies = []
+        for fast_json in (False, True):
+            monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast_json)
+            response = client.get(path, headers=hr_headers)
+            assert response.status_code == 200, response.text
+            bodies.append(response.json())
+        return bodies
+    return get
+
+
+@pytest.fixture
+def user_with_several_balances(new_employee):
+    """Empleado cuyo primer saldo del año no es el de vacaciones."""
+    user = new_employee("Varios Saldos")
+    year = datetime.now().year
+    with Session(engine) as db:
+        for leave_type, remaining_days in ((LeaveTypeEnum.SICK, 3), (LeaveTypeEnum.VACATION, 21)):
+            db.add(LeaveBalance(user_id=user.id, year=year, leave_type=leave_type, used_days=0,
+                                remaining_days=remaining_days, weekly_hours=35, monthly_hours=140,
+                                last_updated=datetime.utcnow()))
+            db.flush()
+        db.commit()
+    return user
+
+
+def test_users(get_both, user_with_several_balances):
+    pydantic_body, fast_body = get_both("/users/")
+    assert sorted(pydantic_body, key=lambda u: u["id"]) == sorted(fast_body, key=lambda u: u["id"])
+
+    user, = [u for u in fast_body if u["id"] == str(user_with_several_balances.id)]
+    assert user["initial_vacation_days"] == 21
+
+
+@pytest.mark.parametrize("query", ["limit=100", "skip=30&limit=25"])
+def test_time_adjustments(get_both, query):
+    pydantic_body, fast_body = get_both(f"/time-adjustments/?{query}")
+    assert pydantic_body
+    assert pydantic_body == fast_body
+
+
+def test_time_records_by_user(get_both, database):
+    user_id = database.employee_ids[3]
+    pydantic_body, fast_body = get_both(f"/time-tracking/user/{user_id}?limit=50")
+    assert pydantic_body["count"] == 50
+    assert pydantic_body == fast_body
+
+    cursor = fast_body["next_cursor"]
+    pydantic_body, fast_body = get_both(f"/time-tracking/user/{user_id}?limit=50&cursor={cursor}")
+    assert pydantic_body == fast_body
+
+
+def test_time_records_search(get_both):
+    pydantic_body, fast_body = get_both("/time-tracking/search?user_full_name=0000&limit=30&offset=10")
+    assert pydantic_body["count"] == 30
+    assert pydantic_body == fast_body
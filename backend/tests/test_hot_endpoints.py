@@ -0,0 +1,50 @@
+"""Login, fichaje y la autenticacion del stream eligen sesion sync o async en
+cada peticion segun ASYNC_DB."""
+from uuid import uuid4
+
+import pytest
+
+from app.core import deps
+from app.core.config import settings
+from app.core.principal_cache import principal_cache
+from conftest import auth_headers
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def async_db(request, monkeypatch):
+    monkeypatch.setattr(settings, "ASYNC_DB", request.param)
+    principal_cache.clear()
+    return request.param
+
+
+def test_login(client, async_db):
+    response = client.post("/auth/login", data={"username": "nerea_rrhh", "password": "123456"})
+    assert response.status_code == 200, response.text
+    assert response.json()["token_type"] == "bearer"
+
+
+def test_login_wrong_password(client, async_db):
+    response = client.post("/auth/login", data={"username": "nerea_rrhh", "password": "incorrecta"})
+    assert response.status_code == 401
+
+
+def test_clock_in_and_out(client, async_db, new_employee):
+    headers = auth_headers(new_employee().id)
+
+    response = client.post("/time-tracking/", json={"record_type": "CHECK_IN"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["record_type"] == "CHECK_IN"
+
+    # Dos entradas seguidas las rechaza la base de datos, con el mismo error en los dos modos
+    response = client.post("/time-tracking/", json={"record_type": "CHECK_IN"}, headers=headers)
+    assert response.status_code in (400, 409), response.text
+
+
+def test_stream_auth_uses_the_same_session_kind(client, async_db, monkeypatch):
+    sync_lookups = []
+    monkeypatch.setattr(deps, "get_principal", lambda db, user_id: sync_lookups.append(user_id))
+
+    # Usuario inexistente: 401 antes de abrir el stream
+    response = client.get("/events/stream", headers=auth_headers(uuid4()))
+    assert response.status_code == 401
+    assert len(sync_lookups) == (0 if async_db else 1)
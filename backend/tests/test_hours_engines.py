@@ -0,0 +1,138 @@
+"""Los motores de horas (SQL y NumPy) tienen que dar lo mismo que
+calculate_hours_worked, que es la definicion de referencia."""
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.models import TimeAdjustment, TimeTracking, User
+from app.schemas.enum import AdjustmentStatusEnum, AdjustmentTypeEnum, RecordTypeEnum
+from app.services.hours_engine import batch_hours_worked, hours_by_user, sql_hours_worked
+from app.services.time_tracking import _python_hours_worked, calculate_hours_worked
+
+IN, OUT = RecordTypeEnum.CHECK_IN, RecordTypeEnum.CHECK_OUT
+APPROVED, PENDING, REJECTED = AdjustmentStatusEnum.APPROVED, AdjustmentStatusEnum.PENDING, AdjustmentStatusEnum.REJECTED
+
+# Un lunes de hace unas semanas: dentro de las particiones del dataset
+MONDAY = (datetime.now(timezone.utc) - timedelta(days=28)).replace(hour=0, minute=0, second=0, microsecond=0)
+MONDAY -= timedelta(days=MONDAY.weekday())
+START, END = MONDAY, MONDAY + timedelta(days=7)
+
+
+def at(day: int, hour: float) -> datetime:
+    return MONDAY + timedelta(days=day, hours=hour)
+
+
+# Cada escenario: fichajes (tipo, momento) y ajustes (tipo, estado, momento)
+SCENARIOS = {
+    "normal_shifts": (
+        [(IN, at(0, 9)), (OUT, at(0, 17)), (IN, at(1, 9)), (OUT, at(1, 13.5))],
+        [],
+    ),
+    "unmatched_check_in": (
+        # La segunda entrada pisa a la primera; la ultima queda abierta
+        [(IN, at(0, 8)), (IN, at(0, 9)), (OUT, at(0, 17)), (IN, at(2, 9))],
+        [],
+    ),
+    "trailing_check_out": (
+        # Salida sin entrada al principio y salida repetida al final
+        [(OUT, at(0, 7)), (IN, at(0, 9)), (OUT, at(0, 14)), (OUT, at(0, 18))],
+        [],
+    ),
+    "shift_crossing_midnight": (
+        [(IN, at(2, 22)), (OUT, at(3, 6)), (IN, at(3, 22.5)), (OUT, at(4, 7.25))],
+        [],
+    ),
+    "approved_adjustments": (
+        [(IN, at(0, 9)), (IN, at(1, 9)), (OUT, at(1, 17))],
+        [
+            # Cierra el turno del lunes
+            (AdjustmentTypeEnum.EXIT_CORRECTION, APPROVED, at(0, 16)),
+            # Turno entero a mano el miercoles
+            (AdjustmentTypeEnum.MANUAL_ENTRY, APPROVED, at(2, 10)),
+            (AdjustmentTypeEnum.EXIT_CORRECTION, APPROVED, at(2, 12)),
+            # Entrada corregida el martes, despues del fichaje real
+            (AdjustmentTypeEnum.ENTRY_CORRECTION, APPROVED, at(1, 10)),
+        ],
+    ),
+    "ignored_adjustments": (
+        [(IN, at(0, 9)), (OUT, at(0, 17))],
+        [
+            (AdjustmentTypeEnum.EXIT_CORRECTION, PENDING, at(0, 12)),
+            (AdjustmentTypeEnum.ENTRY_CORRECTION, REJECTED, at(0, 13)),
+            (AdjustmentTypeEnum.OTHER, APPROVED, at(0, 14)),
+        ],
+    ),
+    "adjustment_same_timestamp": (
+        # Empate de timestamp: el ajuste va despues del fichaje
+        [(IN, at(0, 9))],
+        [(AdjustmentTypeEnum.EXIT_CORRECTION, APPROVED, at(0, 9)),
+         (AdjustmentTypeEnum.ENTRY_CORRECTION, APPROVED, at(0, 12)),
+         (AdjustmentTypeEnum.EXIT_CORRECTION, APPROVED, at(0, 15))],
+    ),
+}
+
+
+@pytest.fixture
+def scenario_users(db, database):
+    users = {}
+    for name, (records, adjustments) in SCENARIOS.items():
+        user = User(username=f"horas_{name}", email=f"horas_{name}@example.com", full_name=name,
+                    hashed_password="x", is_active=True, role_id=database.employee_role_id)
+        db.add(user)
+        db.flush()
+        db.add_all([TimeTracking(user_id=user.id, record_type=t, timestamp=ts) for t, ts in records])
+        db.add_all([
+            TimeAdjustment(user_id=user.id, adjusted_type=t, status=status, adjusted_timestamp=ts, reason=name)
+            for t, status, ts in adjustments
+        ])
+        users[name] = user.id
+    db.flush()
+    return users
+
+
+@pytest.mark.parametrize("engine", [sql_hours_worked, batch_hours_worked], ids=["sql", "numpy"])
+@pytest.mark.parametrize("name", list(SCENARIOS))
+def test_engine_matches_python(db, scenario_users, engine, name):
+    user_id = scenario_users[name]
+    expected = _python_hours_worked(db, START, END, [user_id]).get(user_id, 0.0)
+    assert engine(db, START, END, [user_id]).get(user_id, 0.0) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("engine", [sql_hours_worked, batch_hours_worked], ids=["sql", "numpy"])
+def test_engine_matches_python_for_all_users(db, scenario_users, engine):
+    expected = _python_hours_worked(db, START, END, list(scenario_users.values()))
+    result = engine(db, START, END, list(scenario_users.values()))
+    for user_id in scenario_users.values():
+        assert result.get(user_id, 0.0) == pytest.approx(expected.get(user_id, 0.0))
+
+
+def test_expected_values(db, scenario_users):
+    # Ancla la referencia en los casos que describen las reglas
+    hours = _python_hours_worked(db, START, END, list(scenario_users.values()))
+    assert hours[scenario_users["unmatched_check_in"]] == pytest.approx(8)
+    assert hours[scenario_users["trailing_check_out"]] == pytest.approx(5)
+    assert hours[scenario_users["shift_crossing_midnight"]] == pytest.approx(16.75)
+    assert hours[scenario_users["approved_adjustments"]] == pytest.approx(7 + 7 + 2)
+    assert hours[scenario_users["ignored_adjustments"]] == pytest.approx(8)
+
+
+def test_hours_by_user_matches_python_randomized():
+    rng = random.Random(1234)
+    n_users = 20
+    codes, seconds, check_in, records_by_user = [], [], [], {}
+    for _ in range(2000):
+        user = rng.randrange(n_users)
+        # Minutos enteros en pocas horas: fuerza empates de timestamp
+        timestamp = START + timedelta(minutes=rng.randrange(600))
+        record_type = rng.choice(["CHECK_IN", "CHECK_OUT"])
+        codes.append(user)
+        seconds.append(timestamp.timestamp())
+        check_in.append(record_type == "CHECK_IN")
+        records_by_user.setdefault(user, []).append(SimpleNamespace(record_type=record_type, timestamp=timestamp))
+
+    hours = hours_by_user(np.array(codes), np.array(seconds), np.array(check_in), n_users)
+    for user in range(n_users):
+        assert hours[user] == pytest.approx(calculate_hours_worked(records_by_user.get(user, [])))
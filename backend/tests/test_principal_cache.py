@@ -0,0 +1,67 @@
+"""Cache del usuario autenticado e invalidacion entre workers por LISTEN/NOTIFY."""
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app.core.principal_cache import PrincipalCache, notify_principal_changed, principal_cache
+from app.database import engine
+from app.models import User
+from conftest import auth_headers
+
+
+def _principal():
+    return SimpleNamespace(id=uuid4(), is_active=True, role=SimpleNamespace(name="EMPLOYEE"))
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout"
+        time.sleep(0.05)
+
+
+def test_disabled_until_listening():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+    principal = _principal()
+    cache.set(principal, cache.version())
+    assert cache.get(principal.id) is None
+
+    cache.set_enabled(True)
+    cache.set(principal, cache.version())
+    assert cache.get(principal.id) is principal
+
+    # Al perder la conexion se vacia y deja de usarse
+    cache.set_enabled(False)
+    assert cache.get(principal.id) is None
+
+
+def test_set_after_invalidation_is_dropped():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+    cache.set_enabled(True)
+    principal = _principal()
+
+    # Lectura de la base de datos que empieza antes de una invalidacion
+    version = cache.version()
+    cache.invalidate(principal.id)
+    cache.set(principal, version)
+    assert cache.get(principal.id) is None
+
+
+def test_invalidation_from_another_worker(client, new_employee):
+    user = new_employee()
+    headers = auth_headers(user.id)
+    _wait_for(lambda: principal_cache.stats()["enabled"])
+
+    assert client.get("/time-tracking/", headers=headers).status_code == 200
+    assert principal_cache.get(user.id) is not None
+
+    # Otro worker desactiva al usuario: solo nos llega el NOTIFY
+    with Session(engine) as db:
+        db.query(User).filter(User.id == user.id).update({"is_active": False})
+        notify_principal_changed(db, user.id)
+        db.commit()
+
+    _wait_for(lambda: principal_cache.get(user.id) is None)
+    assert client.get("/time-tracking/", headers=headers).status_code == 401
@@ -0,0 +1,184 @@
+"""Regresion de planes: las consultas calientes de los servicios no pueden
+acabar en un Seq Scan sobre las tablas grandes, y las acotadas a un mes solo
+leen la particion de ese mes.
+
+Se ejecuta la llamada al servicio, se capturan sus sentencias y se repiten con
+EXPLAIN (FORMAT JSON) contra el dataset generado en conftest.py.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.models import ClockState
+from app.schemas.enum import HoursEngineEnum, RecordTypeEnum
+from app.schemas.time_tracking import TimeTrackingCreate
+from app.services import time_adjustment as time_adjustment_service
+from app.services import time_off_request as time_off_request_service
+from app.services import partitions
+from app.services import time_tracking as time_tracking_service
+
+# Tablas que crecen con la plantilla y el historial; time_tracking incluye sus particiones
+LARGE_TABLES = ("time_tracking", "time_adjustments", "time_off_requests", "daily_hours", "clock_states")
+# Por debajo de esto el Seq Scan es el plan correcto (particiones futuras vacias,
+# clock_states con pocos empleados...)
+MIN_PAGES = 10
+# Fuera quedan SAVEPOINT, ROLLBACK TO y demas control de transaccion
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+@contextmanager
+def captured_statements(db):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+            statements.append((statement, parameters))
+
+    connection = db.connection()
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _large_relations(cursor) -> set:
+    cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'r' AND relpages >= %s", (MIN_PAGES,))
+    return {
+        relation for (relation,) in cursor.fetchall()
+        if any(relation == table or relation.startswith(f"{table}_") for table in LARGE_TABLES)
+    }
+
+
+def assert_no_seq_scans(db, statements):
+    assert statements, "el servicio no ha lanzado ninguna consulta"
+    cursor = db.connection().connection.cursor()
+    large_relations = _large_relations(cursor)
+    for statement, parameters in statements:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = cursor.fetchone()[0][0]["Plan"]
+        seq_scans = [
+            node["Relation Name"] for node in _plan_nodes(plan)
+            if node["Node Type"] == "Seq Scan" and node["Relation Name"] in large_relations
+        ]
+        assert not seq_scans, f"Seq Scan sobre {seq_scans} en:\n{statement}"
+
+
+def assert_reads_only(db, statements, partition: str):
+    time_tracking_statements = [(s, p) for s, p in statements if "time_tracking" in s]
+    assert time_tracking_statements, "el servicio no ha leido time_tracking"
+    for statement, parameters in time_tracking_statements:
+        # Ni la DEFAULT ni el resto de meses: la poda tiene que quedarse en uno
+        assert partitions.scanned_partitions(db, statement, parameters) == [partition], statement
+
+
+@pytest.fixture
+def employee_id(database):
+    # Uno de mitad de la lista: ni el primero ni el ultimo que genera el dataset
+    return database.employee_ids[len(database.employee_ids) // 2]
+
+
+def test_clock_in(db, employee_id):
+    # Dentro desde hace una hora: la salida tiene que aceptarse y recalcular daily_hours
+    db.query(ClockState).filter(ClockState.user_id == employee_id).update(
+        {"record_type": RecordTypeEnum.CHECK_IN, "timestamp": datetime.now(timezone.utc) - timedelta(hours=1)})
+    with captured_statements(db) as statements:
+        record = time_tracking_service.create_time_record(
+            db, employee_id, TimeTrackingCreate(record_type="CHECK_OUT"))
+    assert record.user_id == employee_id
+    assert record.record_type == RecordTypeEnum.CHECK_OUT
+    assert_no_seq_scans(db, statements)
+
+
+@pytest.mark.parametrize("exact_total", [True, False])
+def test_paginate_by_user_offset(db, employee_id, exact_total):
+    with captured_statements(db) as statements:
+        time_tracking_service.get_time_records_by_user_with_user_info(
+            db, employee_id, limit=20, offset=40, exact_total=exact_total, include_archived=False)
+    assert_no_seq_scans(db, statements)
+
+
+def test_paginate_by_user_cursor(db, employee_id):
+    first = time_tracking_service.get_time_records_by_user_with_user_info(
+        db, employee_id, limit=20, include_archived=False)
+    assert first["next_cursor"]
+    with captured_statements(db) as statements:
+        time_tracking_service.get_time_records_by_user_with_user_info(
+            db, employee_id, limit=20, cursor=first["next_cursor"], include_archived=False)
+    assert_no_seq_scans(db, statements)
+
+
+def test_paginate_all_users_cursor(db):
+    first = time_tracking_service.search_time_records_with_user_info(
+        db, limit=20, exact_total=False, include_archived=False)
+    with captured_statements(db) as statements:
+        time_tracking_service.search_time_records_with_user_info(
+            db, limit=20, cursor=first["next_cursor"], exact_total=False, include_archived=False)
+    assert_no_seq_scans(db, statements)
+
+
+def test_search_by_name(db):
+    with captured_statements(db) as statements:
+        time_tracking_service.search_time_records_with_user_info(
+            db, user_full_name="0000123", limit=20, include_archived=False)
+    assert_no_seq_scans(db, statements)
+
+
+@pytest.mark.parametrize("engine", list(HoursEngineEnum))
+def test_weekly_hours(db, employee_id, engine):
+    week_start = datetime.now(timezone.utc) - timedelta(days=30)
+    with captured_statements(db) as statements:
+        time_tracking_service.get_weekly_hours(db, employee_id, week_start, engine)
+    assert_no_seq_scans(db, statements)
+
+
+@pytest.mark.parametrize("engine", list(HoursEngineEnum))
+def test_monthly_hours(db, employee_id, engine):
+    month = date.today().replace(day=1) - timedelta(days=1)
+    with captured_statements(db) as statements:
+        time_tracking_service.get_monthly_hours(db, employee_id, month.year, month.month, engine)
+    assert_no_seq_scans(db, statements)
+
+
+def test_refresh_daily_hours(db, employee_id):
+    with captured_statements(db) as statements:
+        time_tracking_service.refresh_daily_hours_around(
+            db, employee_id, datetime.now(timezone.utc) - timedelta(days=10))
+    assert_no_seq_scans(db, statements)
+
+
+def test_time_off_requests_by_user(db, employee_id):
+    with captured_statements(db) as statements:
+        time_off_request_service.list_requests_by_user(db, employee_id)
+    assert_no_seq_scans(db, statements)
+
+
+def test_adjustments_by_user(db, employee_id):
+    with captured_statements(db) as statements:
+        time_adjustment_service.get_adjustments_by_user(db, employee_id)
+        time_adjustment_service.list_adjustment_rows(db, employee_id, 0, 50)
+    assert_no_seq_scans(db, statements)
+
+
+@pytest.mark.parametrize("engine", [HoursEngineEnum.SQL, HoursEngineEnum.NUMPY])
+def test_month_range_prunes_partitions(db, engine):
+    month = date.today().replace(day=1) - timedelta(days=1)
+    with captured_statements(db) as statements:
+        time_tracking_service.get_company_monthly_hours(db, month.year, month.month, engine)
+    assert_reads_only(db, statements, partitions.partition_name(month))
+
+
+def test_user_timestamp_lookup_prunes_partitions(db, employee_id):
+    # El motor python busca por (user_id, timestamp) en el rango del mes
+    month = date.today().replace(day=1) - timedelta(days=1)
+    with captured_statements(db) as statements:
+        time_tracking_service.get_monthly_hours(db, employee_id, month.year, month.month, HoursEngineEnum.PYTHON)
+    assert_reads_only(db, statements, partitions.partition_name(month))
@@ -0,0 +1,60 @@
+"""Buscador de fichajes por nombre de empleado."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import TimeTracking, User
+from app.schemas.enum import RecordTypeEnum
+from app.services import time_tracking as time_tracking_service
+
+
+@pytest.fixture
+def namesakes(db, database):
+    """70 empleados con el mismo apellido y un fichaje cada uno."""
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    users = [
+        User(username=f"tocayo_{i}", email=f"tocayo_{i}@example.com", full_name=f"Ana Zubizarreta {i}",
+             hashed_password="x", is_active=True, role_id=database.employee_role_id)
+        for i in range(70)
+    ]
+    db.add_all(users)
+    db.flush()
+    db.add_all([
+        TimeTracking(user_id=user.id, record_type=RecordTypeEnum.CHECK_IN, timestamp=now - timedelta(minutes=i))
+        for i, user in enumerate(users)
+    ])
+    db.flush()
+    return users
+
+
+@pytest.mark.parametrize("include_archived", [False, True])
+def test_search_returns_every_match(db, namesakes, include_archived):
+    page = time_tracking_service.search_time_records_with_user_info(
+        db, user_full_name="zubizarreta", limit=100, include_archived=include_archived)
+    assert page["total"] == len(namesakes)
+    assert {r["user_id"] for r in page["results"]} == {u.id for u in namesakes}
+
+
+def test_search_paginates_past_first_users(db, namesakes):
+    seen = set()
+    cursor = None
+    while True:
+        page = time_tracking_service.search_time_records_with_user_info(
+            db, user_full_name="Zubizarreta", limit=30, cursor=cursor, include_archived=False)
+        seen.update(r["user_id"] for r in page["results"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == {u.id for u in namesakes}
+
+
+def test_search_combined_with_user_id(db, namesakes):
+    target = namesakes[10]
+    page = time_tracking_service.search_time_records_with_user_info(
+        db, user_id=target.id, user_full_name="zubizarreta", include_archived=True)
+    assert page["total"] == 1
+    assert page["results"][0]["user_id"] == target.id
+
+    page = time_tracking_service.search_time_records_with_user_info(
+        db, user_id=target.id, user_full_name="no existe", include_archived=False)
+    assert page["total"] == 0
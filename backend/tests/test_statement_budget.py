@@ -0,0 +1,45 @@
+"""Presupuesto de sentencias SQL por peticion en los listados: un N+1 rompe
+el presupuesto en cuanto hay mas de un puñado de filas en el dataset."""
+import pytest
+
+import app.main
+from app.core.config import settings
+from app.core.principal_cache import principal_cache
+
+# Sentencias por peticion, autenticacion incluida (sin cache de usuario)
+LIST_ENDPOINT_BUDGETS = {
+    "/leave_balances/": 2,
+    "/time_off_requests/": 2,
+    "/time-adjustments/?limit=100": 2,
+    # selectinload de los saldos: una sentencia mas, no una por usuario
+    "/users/": 3,
+}
+
+
+@pytest.fixture
+def request_db_stats(monkeypatch):
+    """RequestDbStats de cada peticion hecha durante el test."""
+    captured = []
+    start = app.main.start_request_db_stats
+
+    def capture():
+        stats = start()
+        captured.append(stats)
+        return stats
+
+    monkeypatch.setattr(app.main, "start_request_db_stats", capture)
+    return captured
+
+
+@pytest.mark.parametrize("fast_json", [False, True], ids=["pydantic", "fast_json"])
+@pytest.mark.parametrize("path", list(LIST_ENDPOINT_BUDGETS))
+def test_list_endpoint_statement_budget(client, hr_headers, request_db_stats, monkeypatch, path, fast_json):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast_json)
+    principal_cache.clear()
+
+    response = client.get(path, headers=hr_headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) > 10
+
+    stats, = request_db_stats
+    assert stats.queries <= LIST_ENDPOINT_BUDGETS[path], f"{path}: {stats.queries} sentencias"